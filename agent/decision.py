@@ -6,6 +6,11 @@ Responsável por tomar decisões de aprendizado do agente:
 
 - Recebe input processado (texto ou imagem)
 - Verifica similaridade com memória existente
+- Fast path exato: conteúdo idêntico a um conhecimento (digest, O(1)) é
+  reforçado sem vetorizar
+- Imagens: fast path por fingerprint perceptual (tela já vista → reforça
+  sem vetorizar)
+- Conhecimentos do nível frio encontrados são promovidos de volta à RAM
 - Decide entre:
     - Aprender
     - Perguntar ao humano
@@ -15,12 +20,33 @@ Responsável por tomar decisões de aprendizado do agente:
 # =========================
 # IMPORTAÇÕES
 # =========================
+from typing import List
 from memory.vectorizer import vectorize_text, vectorize_image
-from memory.similarity import find_most_similar
-from memory.store import MEMORY_STORE
+from memory.embeddings import dedupe_batch, stack_vectors
+from memory.fingerprint import find_seen, is_image, to_hex
+from memory.store import memory_store
+from memory.tiers import promote
+from memory.digests import find_exact
 from cognition.learner import learn
 from memory.history import log_event
-from core.config import LEARNER_DEFAULT_CONFIDENCE
+from core.config import LEARNER_DEFAULT_CONFIDENCE, SIMILARITY_THRESHOLD
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def _find_exact(input_data: dict):
+    """
+    Conhecimento com conteúdo idêntico ao input (promovido, se estava no nível frio).
+    """
+    hit = find_exact(input_data)
+    if hit is None:
+        return None
+    kind, knowledge_id = hit
+    if kind == "cold":
+        return promote(knowledge_id)
+    memory_store.touch(knowledge_id)
+    return memory_store.get(knowledge_id)
 
 # =========================
 # FUNÇÕES PRINCIPAIS
@@ -39,58 +65,128 @@ def decide_action(input_data: dict) -> dict:
     Returns:
         dict: Decisão com ação e payload
     """
-    input_type = input_data.get("type")
-    content = input_data.get("data")
-    confidence = input_data.get("confidence", LEARNER_DEFAULT_CONFIDENCE)
-
-    # =========================
-    # Vetorização
-    # =========================
-    if input_type == "text":
-        input_vector = vectorize_text(content)
-        mem_vectors = [vectorize_text(item["content"]) for item in MEMORY_STORE if item["type"] == "text"]
-    elif input_type == "vision":
-        # Placeholder: já vetoriza imagem antes de enviar
-        input_vector = vectorize_image(content)
-        mem_vectors = [vectorize_image(item["content"]) for item in MEMORY_STORE if item["type"] == "vision"]
-    else:
-        # Tipo desconhecido
-        log_event("unknown_type", input_data)
-        return {"action": "ignore", "payload": input_data}
-
-    # =========================
-    # Similaridade
-    # =========================
-    if mem_vectors:
-        sim, idx = find_most_similar(input_vector, mem_vectors)
-    else:
-        sim, idx = 0.0, -1
-
-    # =========================
-    # Decisão
-    # =========================
-    threshold = 0.8  # Similaridade acima disso considera conhecido
-
-    if sim >= threshold:
-        # Conhecimento já existe → reforça
-        log_event("reinforce", {"existing_id": MEMORY_STORE[idx]["id"], "similarity": sim})
-        return {"action": "reinforce", "payload": MEMORY_STORE[idx]}
-    else:
-        # Conhecimento novo → aprende
-        payload = {
-            "type": input_type,
-            "data": content,
-            "confidence": confidence
-        }
-        learn(payload)
-        log_event("learn", payload)
-        return {"action": "learn", "payload": payload}
+    return decide_actions([input_data])[0]
+
+def decide_actions(inputs: List[dict]) -> List[dict]:
+    """
+    Decide a ação para um micro-lote de inputs de uma só vez.
+
+    Cada modalidade é vetorizada e comparada com a memória em uma única
+    busca em lote; inputs repetidos dentro do lote são aprendidos uma vez
+    e os demais reforçam o conhecimento recém-criado.
+
+    Args:
+        inputs (List[dict]): Inputs no formato de decide_action()
+
+    Returns:
+        List[dict]: Decisão para cada input, na mesma ordem
+    """
+    decisions: List[dict] = [None] * len(inputs)
+
+    for input_type in {item.get("type") for item in inputs}:
+        positions = [i for i, item in enumerate(inputs) if item.get("type") == input_type]
+        fingerprints = {}
+
+        # =========================
+        # Fast path: conteúdo idêntico a um conhecimento (digest, sem vetorizar)
+        # =========================
+        pending = []
+        for i in positions:
+            existing = _find_exact(inputs[i])
+            if existing is None:
+                pending.append(i)
+                continue
+            log_event("reinforce", {"existing_id": existing["id"], "exact": True})
+            decisions[i] = {"action": "reinforce", "payload": existing}
+        positions = pending
+        if not positions:
+            continue
+
+        # =========================
+        # Fast path: tela já vista (fingerprint perceptual, sem vetorizar)
+        # =========================
+        if input_type == "vision":
+            pending = []
+            for i in positions:
+                if not is_image(inputs[i].get("data")):
+                    pending.append(i)
+                    continue
+                code, seen = find_seen(inputs[i]["data"])
+                existing = memory_store.get(seen[0], blobs=False) if seen else None  # Frame já está na entrada: sem ler o blob
+                if existing is not None:
+                    memory_store.touch(existing["id"])
+                if existing is None:
+                    fingerprints[i] = to_hex(code)
+                    pending.append(i)
+                    continue
+                log_event("reinforce", {"existing_id": existing["id"], "hamming": seen[1]})
+                decisions[i] = {"action": "reinforce", "payload": existing}
+            positions = pending
+            if not positions:
+                continue
+
+        # =========================
+        # Vetorização (apenas dos inputs; a memória já está vetorizada)
+        # =========================
+        if input_type == "text":
+            vectors = [vectorize_text(inputs[i].get("data")) for i in positions]
+        elif input_type == "vision":
+            # Placeholder: já vetoriza imagem antes de enviar
+            vectors = [vectorize_image(inputs[i].get("data")) for i in positions]
+        else:
+            # Tipo desconhecido
+            for i in positions:
+                log_event("unknown_type", inputs[i])
+                decisions[i] = {"action": "ignore", "payload": inputs[i]}
+            continue
+
+        # =========================
+        # Similaridade (uma busca em lote por modalidade)
+        # =========================
+        verdicts = dedupe_batch(input_type, stack_vectors(vectors), SIMILARITY_THRESHOLD)
+
+        # =========================
+        # Decisão
+        # =========================
+        for (kind, ref, sim), i, vector in zip(verdicts, positions, vectors):
+            if kind == "memory":
+                existing = memory_store.get(ref)
+                memory_store.touch(ref)
+            elif kind == "cold":
+                existing = promote(ref)
+            elif kind == "batch":
+                existing = decisions[positions[ref]].get("knowledge")
+            else:
+                existing = None
+
+            if existing is not None:
+                # Conhecimento já existe → reforça
+                log_event("reinforce", {"existing_id": existing["id"], "similarity": sim})
+                decisions[i] = {"action": "reinforce", "payload": existing}
+                continue
+
+            # Conhecimento novo → aprende
+            payload = {
+                "type": input_type,
+                "data": inputs[i].get("data"),
+                "confidence": inputs[i].get("confidence", LEARNER_DEFAULT_CONFIDENCE)
+            }
+            if i in fingerprints:
+                payload["fingerprint"] = fingerprints[i]
+            knowledge = learn(payload, vector)
+            log_event("learn", payload)
+            decisions[i] = {"action": "learn", "payload": payload, "knowledge": knowledge}
+
+    return decisions
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
 # =========================
 if __name__ == "__main__":
     from perception.text_normalizer import normalize_text
+    from cognition.learner import warm_start
+
+    warm_start()
 
     # Teste de decisão com texto
     sample_text = normalize_text("Abrir janela")
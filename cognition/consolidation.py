@@ -0,0 +1,151 @@
+"""
+NE-AI V1 — Consolidation
+=========================
+
+Consolidação periódica da memória (job do Scheduler):
+
+- Cada passada examina só os conhecimentos inseridos desde a anterior (no
+  máximo CONSOLIDATION_BATCH, em ordem de "seq"); o último seq examinado
+  fica como marca no store e sobrevive a reinícios
+- Vizinhos de cada um vêm do índice de similaridade da matriz da modalidade
+  (uma busca top-k em lote); vizinhos acima de CONSOLIDATION_THRESHOLD são
+  candidatos a quase-duplicatas (ex: variações de OCR da mesma tela)
+- O candidato mais visto sobrevive e absorve só quem está acima do limiar
+  em relação a ele (sem transitividade: uma cadeia A~B~C não funde A e C);
+  os demais ficam para quando forem examinados
+- A fusão soma times_seen, faz a média da confiança ponderada por
+  times_seen e guarda os ids absorvidos em "merged_from"
+
+Assim a memória (e o conjunto de busca) deixa de crescer com cada variação
+mínima de um input já conhecido.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import threading
+from typing import Dict, List, Set, Tuple
+from memory.store import memory_store
+from memory.embeddings import EMBEDDINGS, stack_vectors
+from memory.history import log_event
+from cognition.learner import forget
+from core.config import CONSOLIDATION_THRESHOLD, CONSOLIDATION_NEIGHBORS, CONSOLIDATION_BATCH
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+MARK = "consolidated_seq"      # Marca no store: último seq já examinado
+_lock = threading.Lock()       # Uma passada por vez
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def merge_items(survivor: dict, absorbed: List[dict]):
+    """
+    Funde conhecimentos absorvidos no sobrevivente (in-place).
+    """
+    group = [survivor] + absorbed
+    seen = [max(1, item.get("times_seen") or 1) for item in group]
+    survivor["times_seen"] = sum(seen)
+    survivor["confidence"] = sum((item.get("confidence") or 0.0) * n for item, n in zip(group, seen)) / sum(seen)
+    relevances = [item["relevance"] for item in group if item.get("relevance") is not None]
+    if relevances:
+        survivor["relevance"] = max(relevances)
+    last_seen = [item["last_seen"] for item in group if item.get("last_seen") is not None]
+    if last_seen:
+        survivor["last_seen"] = max(last_seen)
+    merged_from = list(survivor.get("merged_from", []))
+    for item in absorbed:
+        merged_from.append(item["id"])
+        merged_from.extend(item.get("merged_from", []))
+    survivor["merged_from"] = merged_from
+
+# =========================
+# FUNÇÃO PRINCIPAL
+# =========================
+
+def consolidate_memory(threshold: float = CONSOLIDATION_THRESHOLD, neighbors: int = CONSOLIDATION_NEIGHBORS,
+                       batch: int = CONSOLIDATION_BATCH) -> int:
+    """
+    Funde quase-duplicatas entre os conhecimentos novos e a memória.
+
+    Args:
+        threshold (float): Similaridade mínima para fundir
+        neighbors (int): Vizinhos consultados por conhecimento novo
+        batch (int): Máximo de conhecimentos novos examinados nesta passada
+
+    Returns:
+        int: Nº de conhecimentos absorvidos (removidos)
+    """
+    with _lock:
+        mark = memory_store.get_mark(MARK)
+        by_id = {item["id"]: item for item in memory_store.snapshot(copy=False)}
+        fresh = sorted((item for item in by_id.values() if item.get("seq", 0) > mark),
+                       key=lambda item: item["seq"])[:batch]
+        if not fresh:
+            return 0
+        fresh_ids = {item["id"] for item in fresh}
+
+        # =========================
+        # Vizinhos (uma busca em lote por modalidade)
+        # =========================
+        close: Dict[str, Tuple[object, List[str]]] = {}  # id → (matriz, vizinhos acima do limiar)
+        for modality, matrix in EMBEDDINGS.items():
+            ids, vectors = [], []
+            for item in fresh:
+                vector = matrix.vector(item["id"]) if item.get("type") == modality else None
+                if vector is not None:
+                    ids.append(item["id"])
+                    vectors.append(vector)
+            if not ids:
+                continue
+            hits = matrix.search_batch(stack_vectors(vectors), k=neighbors + 1)  # +1: o próprio item
+            for knowledge_id, row in zip(ids, hits):
+                others = [other for other, sim in row
+                          if other != knowledge_id and sim >= threshold and other in by_id]
+                if others:
+                    close[knowledge_id] = (matrix, others)
+
+        # =========================
+        # Fusão no conhecimento mais visto (só quem é similar a ele)
+        # =========================
+        absorbed_total = 0
+        gone: Set[str] = set()
+        for item in fresh:
+            if item["id"] in gone or item["id"] not in close:
+                continue
+            matrix, others = close[item["id"]]
+            group = [item["id"]] + [kid for kid in others if kid not in gone]
+            if len(group) < 2:
+                continue
+            group.sort(key=lambda kid: (by_id[kid].get("times_seen") or 0, kid not in fresh_ids), reverse=True)
+            survivor_id = group[0]
+            sims = matrix.similarities(survivor_id, group[1:])
+            absorbed_ids = [kid for kid in group[1:] if sims.get(kid, 0.0) >= threshold]
+            if not absorbed_ids:
+                continue
+            absorbed = [dict(by_id[kid]) for kid in absorbed_ids]
+            if memory_store.update(survivor_id, lambda item: merge_items(item, absorbed)) is None:
+                continue  # Sobrevivente removido/rebaixado durante a passada
+            for knowledge_id in absorbed_ids:
+                forget(knowledge_id)
+            gone.update(absorbed_ids)
+            absorbed_total += len(absorbed_ids)
+            log_event("consolidate", {"survivor_id": survivor_id, "merged_ids": absorbed_ids})
+
+        memory_store.set_mark(MARK, fresh[-1]["seq"])
+
+    if absorbed_total:
+        print(f"[Consolidation] {absorbed_total} quase-duplicatas fundidas "
+              f"({len(fresh)} conhecimentos novos examinados)")
+    return absorbed_total
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    survivor = {"id": "a", "times_seen": 3, "confidence": 0.9}
+    merge_items(survivor, [{"id": "b", "times_seen": 1, "confidence": 0.5, "merged_from": ["c"]}])
+    print("[Consolidation] Fusão:", survivor)
+    print("[Consolidation] Marca atual:", memory_store.get_mark(MARK))
@@ -5,22 +5,67 @@ Responsável por:
 - Decidir se aprende ou pergunta
 - Salvar conhecimento em memória
 - Reforçar aprendizado com feedback humano
+- Aprender micro-lotes deduplicando contra a memória e dentro do lote
+- Promover do nível frio conhecimentos que voltam a ser vistos
+- Reforçar em O(1) inputs idênticos a um conhecimento (digest do conteúdo)
 """
 
+import time
 import uuid
-from typing import Dict
-from memory.store import load_memory, save_memory
+import numpy as np
+from typing import Dict, List, Optional
+from memory.store import memory_store
+from memory.blobs import attach_blob
+from memory.embeddings import (
+    EMBEDDINGS, load_embeddings, sync_embeddings, index_knowledge, embed_item, dedupe_batch,
+    stack_vectors,
+)
+from memory.fingerprint import (
+    FINGERPRINTS, fingerprint, to_hex, is_image, index_fingerprint, load_fingerprints, sync_fingerprints
+)
+from memory.tiers import promote, forget_cold
+from memory.digests import DIGESTS, find_exact, input_digest
+from core.config import SIMILARITY_THRESHOLD
 from cognition.relevance import calculate_relevance
 from cognition.confidence import calculate_confidence
 from cognition.questioner import generate_question
 
-# Carrega memória persistida
-MEMORY_STORE = load_memory()
+_warm = False
+
+def warm_start():
+    """
+    Carrega a memória persistida (só metadados), seus embeddings (mmap) e
+    fingerprints, sem revetorizar nada que já esteja no snapshot. Idempotente.
+
+    Chamada pelos pontos de entrada (main, servidores web, orquestrador), nunca
+    na importação: importar o learner (ferramentas, workers de OCR) não toca storage/.
+    """
+    global _warm
+    if _warm:
+        return
+    start = time.perf_counter()
+    load_embeddings()
+    load_fingerprints()
+    memory_store.ensure_loaded()
+    DIGESTS.load()
+    snapshot = memory_store.snapshot(copy=False)  # Só leitura: ids, tipos, fingerprints e digests
+    sync_embeddings(snapshot)
+    sync_fingerprints(snapshot)
+    DIGESTS.sync(snapshot)
+    _warm = True
+    print(f"[Learner] Warm start com {len(snapshot)} conhecimentos em {1000 * (time.perf_counter() - start):.1f}ms")
 
 def decide(data: Dict):
     """
     Decide se aprende automaticamente ou pergunta.
+
+    Um input idêntico a um conhecimento existente é reforçado direto
+    (action "reinforce"), sem calcular relevância nem vetorizar.
     """
+    existing = reinforce_exact(data)
+    if existing is not None:
+        return {"action": "reinforce", "payload": existing}
+
     relevance = calculate_relevance(data)
     confidence = calculate_confidence(relevance, data.get("confidence", 0))
 
@@ -31,9 +76,13 @@ def decide(data: Dict):
         return generate_question(data)
     return {"action": "learn", "payload": data}
 
-def learn(data: Dict):
+def _new_knowledge(data: Dict) -> Dict:
     """
-    Salva conhecimento e persiste em disco.
+    Monta o registro de conhecimento a partir de um input.
+
+    Imagens recebem o fingerprint perceptual (reaproveita o do input, se já calculado).
+    Conteúdos grandes (frames, textos longos) vão para o blob store: a memória
+    guarda só a referência e a miniatura.
     """
     knowledge = {
         "id": str(uuid.uuid4()),
@@ -41,30 +90,152 @@ def learn(data: Dict):
         "content": data.get("data"),
         "confidence": data.get("confidence"),
         "relevance": data.get("relevance"),
-        "times_seen": 1
+        "times_seen": 1,
+        "last_seen": time.time(),
+        "digest": input_digest(data.get("data"))
     }
+    if knowledge["type"] == "vision":
+        code = data.get("fingerprint")
+        if code is None and is_image(knowledge["content"]):
+            code = to_hex(fingerprint(knowledge["content"]))
+        if code is not None:
+            knowledge["fingerprint"] = code
+    return attach_blob(knowledge)
+
+def _seen_again(item: Dict):
+    item["times_seen"] += 1
+    item["last_seen"] = time.time()
+
+def reinforce_exact(data: Dict) -> Optional[Dict]:
+    """
+    Se o conteúdo do input é idêntico ao de um conhecimento (quente ou frio),
+    incrementa times_seen dele.
+
+    Returns:
+        Dict: Conhecimento reforçado, ou None se não houver repetição exata
+    """
+    hit = find_exact(data)
+    if hit is None:
+        return None
+    kind, knowledge_id = hit
+    if kind == "cold" and promote(knowledge_id) is None:
+        return None
+    return memory_store.update(knowledge_id, _seen_again)
+
+def learn(data: Dict, vector: np.ndarray = None) -> Dict:
+    """
+    Salva conhecimento e registra no journal da memória.
+
+    Args:
+        data (Dict): Input com 'type', 'data', 'confidence' e 'relevance'
+        vector (np.ndarray, opcional): Embedding já calculado do input
+
+    Returns:
+        Dict: Conhecimento criado
+    """
+    knowledge = _new_knowledge(data)
 
-    MEMORY_STORE.append(knowledge)
-    save_memory(MEMORY_STORE)
+    memory_store.add(knowledge)
+    index_knowledge(knowledge, vector)  # Vetoriza uma única vez, no aprendizado
+    index_fingerprint(knowledge)
+    DIGESTS.add(knowledge)
 
     print("[Learner] Conhecimento salvo:", knowledge["id"])
+    return knowledge
+
+def learn_batch(items: List[Dict]) -> List[Dict]:
+    """
+    Aprende um micro-lote de inputs com uma única busca em lote por modalidade
+    e uma única escrita em lote na memória.
+
+    Inputs que já existem na memória (ou que repetem outro input do mesmo
+    lote) apenas incrementam times_seen do conhecimento existente; repetições
+    exatas (digest) nem chegam a ser vetorizadas.
+
+    Returns:
+        List[Dict]: Conhecimento criado ou reaproveitado para cada input
+    """
+    results: List[Dict] = [None] * len(items)
+
+    for modality in {item.get("type") for item in items}:
+        positions = []
+        for i, item in enumerate(items):
+            if item.get("type") == modality:
+                results[i] = reinforce_exact(item)
+                if results[i] is None:
+                    positions.append(i)
+        if not positions:
+            continue
+        try:
+            vectors = [embed_item({"type": modality, "content": items[i].get("data")}) for i in positions]
+        except ValueError as e:
+            print(f"[Learner] Lote '{modality}' não vetorizado: {e}")
+            vectors = [None] * len(positions)
+
+        if any(v is None for v in vectors):
+            # Modalidade sem embedding: aprende sem deduplicar
+            verdicts = [("new", None, 0.0)] * len(positions)
+        else:
+            verdicts = dedupe_batch(modality, stack_vectors(vectors), SIMILARITY_THRESHOLD)
+
+        created = []
+        for (kind, ref, _), i, vector in zip(verdicts, positions, vectors):
+            existing = None
+            if kind == "cold" and promote(ref) is not None:
+                kind = "memory"
+            if kind == "memory":
+                existing = memory_store.update(ref, _seen_again)
+            elif kind == "batch":
+                # Conhecimento criado neste lote, ainda não publicado na memória
+                existing = results[positions[ref]]
+                _seen_again(existing)
+
+            if existing is None:
+                existing = _new_knowledge(items[i])
+                created.append((existing, vector))
+            results[i] = existing
+
+        memory_store.add_many(knowledge for knowledge, _ in created)
+        for knowledge, vector in created:
+            index_knowledge(knowledge, vector)
+            index_fingerprint(knowledge)
+            DIGESTS.add(knowledge)
+        if created:
+            print(f"[Learner] {len(created)} conhecimentos '{modality}' salvos em lote")
+
+    return results
 
 def reinforce(knowledge_id: str, positive: bool = True):
     """
     Ajusta confiança com base no feedback humano.
     """
-    for item in MEMORY_STORE:
-        if item["id"] == knowledge_id:
-            item["times_seen"] += 1
-            if positive:
-                item["confidence"] = min(1.0, item["confidence"] + 0.1)
-            else:
-                item["confidence"] = max(0.0, item["confidence"] - 0.1)
-            break
-    save_memory(MEMORY_STORE)
+    def _apply(item: Dict):
+        _seen_again(item)
+        if positive:
+            item["confidence"] = min(1.0, item["confidence"] + 0.1)
+        else:
+            item["confidence"] = max(0.0, item["confidence"] - 0.1)
+
+    if knowledge_id not in memory_store:
+        promote(knowledge_id)  # Feedback sobre um conhecimento frio → volta para a RAM
+    if memory_store.update(knowledge_id, _apply) is None:
+        print(f"[Learner] Conhecimento não encontrado: {knowledge_id}")
+
+def forget(knowledge_id: str):
+    """
+    Remove um conhecimento da memória e seu embedding.
+    """
+    matrix = EMBEDDINGS.get((memory_store.get(knowledge_id, blobs=False) or {}).get("type"))  # Só o tipo: sem ler o blob
+    if memory_store.delete(knowledge_id):
+        if matrix is not None:
+            matrix.remove(knowledge_id)
+        FINGERPRINTS.remove(knowledge_id)
+        DIGESTS.remove(knowledge_id)
+        forget_cold(knowledge_id)
 
 # Teste rápido
 if __name__ == "__main__":
+    warm_start()
     sample = {"type": "text", "data": "Botão iniciar", "confidence": 0.7}
     decision = decide(sample)
     if decision["action"] == "learn":
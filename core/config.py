@@ -17,7 +17,106 @@ Responsável por:
 # =========================
 STORAGE_RAW = "storage/raw"              # Onde ficam arquivos brutos (vídeo, upload)
 STORAGE_PROCESSED = "storage/processed"  # Onde ficam arquivos processados (frames filtrados, textos)
-MEMORY_FILE = "storage/memory.json"      # Arquivo de memória persistente
+STORAGE_TMP = "storage/tmp"              # Arquivos temporários (uploads antes do processamento)
+MEMORY_FILE = "storage/memory.json"      # Arquivo de memória persistente (snapshot de metadados)
+MEMORY_BODIES_FILE = "storage/memory.bodies"    # Corpos (content) dos conhecimentos, append-only
+MEMORY_JOURNAL_FILE = "storage/memory.journal"  # Journal append-only de mutações da memória
+MEMORY_COLD_FILE = "storage/memory.cold.sqlite"  # Nível frio da memória (itens rebaixados, SQLite)
+MEMORY_COLD_DIR = f"{STORAGE_PROCESSED}/cold"   # Embeddings do nível frio (matrizes mapeadas)
+EMBEDDINGS_DIR = f"{STORAGE_PROCESSED}/embeddings"  # Matrizes de embeddings por modalidade
+VECTORIZER_STATE_FILE = f"{STORAGE_PROCESSED}/vectorizer_state.npz"  # IDF incremental do vetorizador
+FINGERPRINTS_DIR = f"{STORAGE_PROCESSED}/fingerprints"  # Fingerprints perceptuais dos conhecimentos 'vision'
+DIGESTS_DIR = f"{STORAGE_PROCESSED}/digests"  # Bloom filter dos digests do nível frio
+BLOBS_DIR = f"{STORAGE_PROCESSED}/blobs"  # Payloads grandes (frames, textos longos), endereçados por conteúdo
+OCR_CACHE_FILE = "storage/ocr_cache.sqlite"  # Cache persistente de resultados de OCR (hash perceptual → texto)
+
+# =========================
+# MEMÓRIA PERSISTENTE
+# =========================
+MEMORY_COMPACT_EVERY = 1000     # Nº de operações no journal antes de compactar em snapshot
+MEMORY_COMPACT_INTERVAL = 60    # Intervalo (s) do job que grava o snapshot pendente deixado pelo load
+MEMORY_JOURNAL_FSYNC = False    # Força fsync a cada operação (mais seguro, mais lento)
+EMBEDDINGS_INITIAL_CAPACITY = 1024  # Linhas pré-alocadas por matriz de embeddings (cresce em dobro)
+EMBEDDINGS_DTYPE = "float32"    # Armazenamento das matrizes densas: "float32", "float16" ou "int8" (escala por linha)
+EMBEDDINGS_RERANK = 32          # Candidatos re-ranqueados em float32 quando a matriz é quantizada
+EMBEDDINGS_SHARED = True        # Matrizes em arquivos np.memmap, mapeados somente leitura por outros processos
+BLOB_MIN_BYTES = 64 * 1024      # Textos/bytes acima disso (e todo array) vão para o blob store
+BLOB_THUMBNAIL_SIZE = 96        # Lado maior (px) da miniatura JPEG guardada no registro das imagens
+
+# =========================
+# NÍVEIS DA MEMÓRIA (QUENTE / FRIA)
+# =========================
+MEMORY_HOT_MAX_ITEMS = 100000   # Orçamento de itens residentes (RAM); excedentes vão para o nível frio
+MEMORY_HOT_MAX_BYTES = 512 * 1024 * 1024  # Orçamento estimado de bytes residentes (metadados + corpos + embeddings)
+MEMORY_EVICT_TARGET = 0.9       # Ao estourar o orçamento, rebaixa até esta fração dele (histerese)
+MEMORY_HEAT_HALF_LIFE = 7 * 24 * 3600  # Meia-vida (s) da temperatura desde o último acerto
+MEMORY_TIER_INTERVAL = 60       # Intervalo (s) do job do Scheduler que aplica o orçamento
+
+# =========================
+# DUPLICATAS EXATAS
+# =========================
+DIGEST_BLOOM_CAPACITY = 1000000   # Digests do nível frio previstos no Bloom filter (dobra se encher)
+DIGEST_BLOOM_ERROR_RATE = 0.01    # Falsos positivos aceitos (cada um custa uma consulta ao SQLite)
+
+# =========================
+# CONSOLIDAÇÃO DA MEMÓRIA
+# =========================
+CONSOLIDATION_THRESHOLD = 0.75  # Similaridade para fundir quase-duplicatas (abaixo de SIMILARITY_THRESHOLD, que já reforça no aprendizado)
+CONSOLIDATION_NEIGHBORS = 5     # Vizinhos consultados por conhecimento novo
+CONSOLIDATION_BATCH = 5000      # Máximo de conhecimentos novos examinados por passada
+CONSOLIDATION_INTERVAL = 300    # Intervalo (s) do job de consolidação no Scheduler
+
+# =========================
+# VETORIZADOR DE TEXTO
+# =========================
+VECTORIZER_MODE = "hashing"     # "hashing" (sem estado, dimensão fixa) ou "tfidf" (requer scikit-learn)
+HASHING_N_FEATURES = 2 ** 20    # Dimensão fixa dos vetores de texto (esparsos) no modo hashing
+HASHING_NGRAM_MAX = 2           # Usa palavras e n-gramas de palavras até este tamanho
+HASHING_USE_IDF = True          # Pondera as consultas por IDF incremental (vetores salvos não mudam)
+IDF_NORMS_REFRESH = 0.1         # Recalcula as normas ponderadas das linhas quando o nº de documentos varia >10%
+EMBEDDING_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Limite do cache LRU de embeddings (por conteúdo)
+
+# =========================
+# FINGERPRINTS PERCEPTUAIS
+# =========================
+FINGERPRINT_METHOD = "dhash"    # "dhash" (mais rápido) ou "phash" (DCT, mais robusto)
+FINGERPRINT_BITS = 64           # 64 ou 256 bits por fingerprint
+FINGERPRINT_MAX_DISTANCE = 6    # Distância de Hamming máxima para considerar a tela já vista
+FINGERPRINT_INDEX_CHUNKS = 4    # Substrings do índice; manter MAX_DISTANCE // CHUNKS ≤ 1 (ex: 256 bits → 16+)
+
+# =========================
+# ÍNDICE DE SIMILARIDADE
+# =========================
+MEMORY_INDEX_BACKEND = "exact"  # Backend de busca: "exact", "ivf" ou "hnsw"
+IVF_NLIST = 64                  # Nº de listas invertidas (centróides) do IVF
+IVF_NPROBE = 8                  # Nº de listas visitadas por consulta no IVF
+HNSW_M = 16                     # Grau máximo por nó nas camadas superiores do HNSW
+HNSW_EF_CONSTRUCTION = 100      # Largura da busca ao inserir no HNSW
+HNSW_EF_SEARCH = 64             # Largura da busca nas consultas HNSW
+SIMILARITY_CHUNK_ROWS = 8192    # Linhas da matriz por bloco na busca top-k em lote (limita RAM)
+SIMILARITY_THRESHOLD = 0.8      # Similaridade a partir da qual um input é considerado conhecido
+
+# =========================
+# CONCEITOS (BUSCA EM DOIS NÍVEIS)
+# =========================
+CONCEPTS_ENABLED = True         # Agrupa os embeddings em conceitos (k-means em mini-lotes, incremental)
+CONCEPT_COUNT = 64              # Nº de conceitos (centróides) por modalidade
+CONCEPT_BATCH_SIZE = 256        # Inserções acumuladas antes de mover os centróides
+CONCEPT_CENTROID_TERMS = 512    # Não nulos mantidos por centróide de texto (esparso)
+CONCEPT_PROBES = 4              # Conceitos visitados por consulta
+CONCEPT_SEARCH_MIN_ITEMS = 20000  # Abaixo disso a busca exata é barata: conceitos só agrupam
+CONCEPT_REASSIGN_ROWS = 4096    # Membros reatribuídos (em rodízio) a cada passo dos centróides
+
+# =========================
+# HISTÓRICO
+# =========================
+HISTORY_DIR = f"{STORAGE_PROCESSED}/history"   # Segmentos JSONL do histórico de eventos
+HISTORY_FLUSH_EVENTS = 256                  # Descarrega o buffer ao atingir N eventos
+HISTORY_FLUSH_INTERVAL = 1.0                # ... ou a cada N segundos
+HISTORY_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Tamanho máximo de um segmento antes de rotacionar
+HISTORY_RECENT_EVENTS = 1000                # Eventos recentes mantidos em RAM
+HISTORY_INDEX_STRIDE = 128                  # Eventos entre entradas do índice temporal esparso
+HISTORY_QUERY_MAX_LIMIT = 1000              # Máximo de eventos por página nas consultas
 
 # =========================
 # STREAMING
@@ -29,12 +128,37 @@ SCREEN_STREAM_RESIZE = (64, 64)  # Redimensionamento para filtragem e comparaç
 # FRAME FILTER
 # =========================
 FRAME_SIMILARITY_THRESHOLD = 0.95  # Threshold de similaridade para considerar frame repetido
+FRAME_TILE_SIZE = 128              # Lado de um tile do mapa de mudanças (pixels do frame original)
+FRAME_TILE_CELLS = 8               # Pixels por lado de cada tile na versão reduzida comparada
+FRAME_PIXEL_DELTA = 0              # Diferença de cinza tolerada por pixel (aumentar para câmera com ruído)
+FRAME_TILE_CHANGED_RATIO = 0.02    # Fração mínima de pixels diferentes para marcar um tile como alterado
 
 # =========================
 # OCR
 # =========================
 OCR_THRESHOLD_VALUE = 150           # Thresholding para melhorar contraste
 OCR_LANG = "eng"                    # Idioma padrão do Tesseract
+OCR_BLOCK_ROW_GAP = 12              # Linhas vazias (px) que separam blocos de texto na vertical (ordem de leitura)
+OCR_BLOCK_COL_GAP = 32              # Colunas vazias (px) que separam blocos na horizontal (> espaço entre palavras)
+OCR_BLOCK_PADDING = 4               # Margem (px) em volta de cada região recortada para o Tesseract
+OCR_BLOCK_CACHE_SIZE = 4096         # Textos de regiões mantidos em cache (LRU, chave = hash dos pixels)
+OCR_WORKERS = 0                     # Processos Tesseract simultâneos no serviço de OCR (0 = nº de núcleos)
+OCR_QUEUE_SIZE = 64                 # Imagens pendentes (na fila + em execução) antes de submit() bloquear
+OCR_SUBMIT_TIMEOUT = 30.0           # Espera máxima (s) por uma vaga na fila antes de recusar (queue.Full)
+OCR_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Tamanho máximo dos textos no cache persistente de OCR
+OCR_CACHE_EVICT_TARGET = 0.9        # Ao passar do limite, remove os menos usados até esta fração
+OCR_CACHE_HASH_CELL = 2             # Lado (px) da célula do hash perceptual (maior = mais tolerante a ruído)
+OCR_CACHE_TOUCH_BATCH = 256         # Acertos no cache de OCR acumulados antes de gravar last_used (uma transação)
+OCR_REGION_GRADIENT_KERNEL = 3      # Elemento estruturante do gradiente morfológico (px)
+OCR_REGION_JOIN_WIDTH = 12          # Fechamento horizontal (px) que une letras e palavras em linhas
+OCR_REGION_MIN_HEIGHT = 6           # Altura mínima (px) de uma região de texto
+OCR_REGION_MAX_HEIGHT = 120         # Altura máxima (px): acima disso é imagem/ilustração, não texto
+OCR_REGION_MIN_WIDTH = 6            # Largura mínima (px) de uma região de texto
+OCR_REGION_MIN_FILL = 0.2           # Fração mínima de pixels de borda na caixa (descarta contornos vazios)
+OCR_REGION_TEXT_HEIGHT = 32         # Altura para a qual cada recorte é escalado antes do OCR (0 = sem escala)
+OCR_REGION_MAX_SCALE = 4.0          # Fator máximo de ampliação de um recorte
+OCR_SHEET_MAX_HEIGHT = 2048         # Altura máxima (px) de uma folha de recortes lida em uma chamada do Tesseract
+OCR_SHEET_GAP = 16                  # Espaço em branco (px) entre recortes empilhados na folha
 
 # =========================
 # LEARNER
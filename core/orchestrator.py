@@ -26,6 +26,11 @@ from inputs.upload_handler import handle_upload
 from inputs.text_input import TextInput
 from api.web_server import app  # Servidor Flask
 from memory.history import log_event
+from memory.tiers import enforce_memory_budget
+from memory.store import memory_store
+from cognition.consolidation import consolidate_memory
+from cognition.learner import warm_start
+from core.config import MEMORY_TIER_INTERVAL, CONSOLIDATION_INTERVAL, MEMORY_COMPACT_INTERVAL
 
 # =========================
 # CLASSE ORCHESTRATOR
@@ -36,6 +41,9 @@ class Orchestrator:
         Inicializa todos os módulos com estado OFF.
         """
         self.scheduler = Scheduler()
+        self.scheduler.add_job(enforce_memory_budget, MEMORY_TIER_INTERVAL, "memory_tiering")
+        self.scheduler.add_job(consolidate_memory, CONSOLIDATION_INTERVAL, "memory_consolidation")
+        self.scheduler.add_job(memory_store.compact_if_needed, MEMORY_COMPACT_INTERVAL, "memory_compaction")
         self.screen_stream = ScreenStream()
         self.video_stream = VideoStream()
         self.text_input = TextInput()
@@ -104,6 +112,7 @@ class Orchestrator:
         """
         Mantém orquestrador rodando, podendo monitorar ou reiniciar módulos.
         """
+        warm_start()  # Memória persistida, embeddings e fingerprints
         self.start_all()
         print("[Orchestrator] Loop principal ativo")
         try:
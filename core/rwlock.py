@@ -0,0 +1,104 @@
+"""
+NE-AI V1 — ReadWriteLock
+=========================
+
+Lock de leitores/escritor para estruturas compartilhadas entre threads
+(screen stream, VideoStream, scheduler e requisições Flask):
+
+- Vários leitores simultâneos
+- Um escritor por vez, com exclusividade
+- Preferência para escritores (leitores novos esperam se há escritor na fila)
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import threading
+from contextlib import contextmanager
+
+# =========================
+# CLASSE READ WRITE LOCK
+# =========================
+
+class ReadWriteLock:
+    """
+    Lock com modos de leitura (compartilhado) e escrita (exclusivo).
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """
+        Contexto de leitura: `with lock.read(): ...`
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """
+        Contexto de escrita: `with lock.write(): ...`
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import time
+
+    lock = ReadWriteLock()
+    shared = []
+
+    def reader(n):
+        with lock.read():
+            print(f"[RWLock] Leitor {n} vê {len(shared)} itens")
+            time.sleep(0.1)
+
+    def writer(n):
+        with lock.write():
+            shared.append(n)
+            print(f"[RWLock] Escritor {n} adicionou item")
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(3)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
@@ -61,6 +61,9 @@ def process_text_input(text: str, source: str = "web") -> Dict:
 # FUNÇÃO DE TESTE ISOLADO
 # =========================
 if __name__ == "__main__":
+    from cognition.learner import warm_start
+
+    warm_start()
     test_texts = [
         "Botão Iniciar",
         "  abrir janela   ",
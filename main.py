@@ -4,7 +4,7 @@ NE-AI V1 — Main
 
 Ponto de entrada do sistema NE-AI V1:
 
-- Inicializa memória persistente
+- Inicializa memória persistente (warm start: metadados + embeddings mapeados)
 - Inicializa histórico
 - Cria diretórios necessários
 - Roda servidor web para interações
@@ -15,8 +15,9 @@ Ponto de entrada do sistema NE-AI V1:
 # IMPORTAÇÕES
 # =========================
 import os
-from memory.store import load_memory, save_memory
+from memory.store import memory_store
 from memory.history import init_history
+from cognition.learner import warm_start
 from core.config import STORAGE_RAW, STORAGE_PROCESSED, STORAGE_TMP, MEMORY_FILE
 from api.web_server import app  # Servidor Flask
 
@@ -38,9 +39,9 @@ def initialize_system():
     os.makedirs(STORAGE_PROCESSED, exist_ok=True)
     os.makedirs(STORAGE_TMP, exist_ok=True)
 
-    # Carregar memória
-    memory = load_memory()
-    print(f"[Main] Memória carregada com {len(memory)} itens")
+    # Carregar memória, embeddings e estado do vetorizador (sem revetorizar)
+    warm_start()
+    print(f"[Main] Memória carregada com {len(memory_store)} itens")
 
     # Inicializar histórico
     init_history()
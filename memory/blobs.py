@@ -0,0 +1,161 @@
+"""
+NE-AI V1 — Blobs
+=================
+
+Armazenamento externo, endereçado por conteúdo, para payloads grandes
+(frames BGR de imagens e vídeos, textos muito longos):
+
+- Um arquivo por digest em BLOBS_DIR/ab/abcd....{npy,txt,bin}, gravado uma
+  única vez: o mesmo conteúdo aprendido N vezes ocupa o disco uma vez
+- Arrays em .npy, lidos por mmap (só as páginas acessadas vão para a RAM)
+- O registro do conhecimento guarda só a referência ("_blob"), a miniatura
+  (imagens) e o embedding (nas matrizes); o conteúdo é carregado sob demanda
+  (memory_store.get() / load_body())
+
+Blobs de conhecimentos removidos permanecem em disco (podem ser
+compartilhados por outros conhecimentos com o mesmo conteúdo).
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import base64
+import os
+import uuid
+from typing import Optional
+import cv2
+import numpy as np
+from memory.embedding_cache import content_digest
+from core.config import BLOBS_DIR, BLOB_MIN_BYTES, BLOB_THUMBNAIL_SIZE
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+_EXTENSIONS = {"ndarray": "npy", "text": "txt", "bytes": "bin"}
+
+def should_store_blob(content) -> bool:
+    """
+    Indica se o conteúdo vai para o blob store: arrays sempre (não passam
+    pelo JSON), textos e bytes acima de BLOB_MIN_BYTES.
+    """
+    if isinstance(content, np.ndarray):
+        return True
+    if isinstance(content, str):
+        return len(content.encode("utf-8")) > BLOB_MIN_BYTES
+    if isinstance(content, (bytes, bytearray)):
+        return len(content) > BLOB_MIN_BYTES
+    return False
+
+def make_thumbnail(image: np.ndarray, size: int = BLOB_THUMBNAIL_SIZE) -> Optional[str]:
+    """
+    Miniatura JPEG (data URI base64) de uma imagem, com o lado maior em `size` px.
+
+    Returns:
+        str: "data:image/jpeg;base64,...", ou None se não for uma imagem
+    """
+    if image.ndim not in (2, 3) or min(image.shape[:2]) < 2:
+        return None
+    height, width = image.shape[:2]
+    scale = min(1.0, size / max(height, width))
+    thumb = cv2.resize(image.astype(np.uint8), (max(1, round(width * scale)), max(1, round(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    if not ok:
+        return None
+    return "data:image/jpeg;base64," + base64.b64encode(encoded.tobytes()).decode("ascii")
+
+# =========================
+# CLASSE BLOB STORE
+# =========================
+
+class BlobStore:
+    """
+    Diretório de blobs imutáveis, nomeados pelo digest do conteúdo.
+    """
+    def __init__(self, directory: str = BLOBS_DIR):
+        self.directory = directory
+
+    def path(self, ref: dict) -> str:
+        digest = ref["digest"]
+        return os.path.join(self.directory, digest[:2], f"{digest}.{_EXTENSIONS[ref['kind']]}")
+
+    def put(self, content) -> dict:
+        """
+        Grava o conteúdo (se ainda não existir) e retorna a referência.
+
+        Returns:
+            dict: {"digest", "kind", "bytes"} (+ "shape" e "dtype" para arrays)
+        """
+        if isinstance(content, np.ndarray):
+            ref = {"kind": "ndarray", "bytes": int(content.nbytes),
+                   "shape": list(content.shape), "dtype": str(content.dtype)}
+        elif isinstance(content, str):
+            content = content.encode("utf-8")
+            ref = {"kind": "text", "bytes": len(content)}
+        else:
+            content = bytes(content)
+            ref = {"kind": "bytes", "bytes": len(content)}
+        ref["digest"] = content_digest(content)
+
+        path = self.path(ref)
+        if not os.path.exists(path):
+            # Grava em arquivo temporário e renomeia: leitores nunca veem blobs parciais
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                if ref["kind"] == "ndarray":
+                    np.save(f, content)
+                else:
+                    f.write(content)
+            os.replace(tmp_path, path)
+        return ref
+
+    def get(self, ref: dict):
+        """
+        Lê o conteúdo de uma referência (arrays por mmap, somente leitura).
+        """
+        path = self.path(ref)
+        if ref["kind"] == "ndarray":
+            return np.load(path, mmap_mode="r")
+        with open(path, "rb") as f:
+            data = f.read()
+        return data.decode("utf-8") if ref["kind"] == "text" else data
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+blob_store = BlobStore()
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def attach_blob(knowledge: dict) -> dict:
+    """
+    Move o conteúdo grande de um conhecimento para o blob store: o registro
+    ganha "_blob" (e "thumbnail", se for imagem). O content continua no dict
+    recebido — o learner ainda o usa para vetorizar —, mas a memória só
+    guarda a referência.
+    """
+    content = knowledge.get("content")
+    if content is None or "_blob" in knowledge or not should_store_blob(content):
+        return knowledge
+    knowledge["_blob"] = blob_store.put(content)
+    if isinstance(content, np.ndarray):
+        thumbnail = make_thumbnail(content)
+        if thumbnail is not None:
+            knowledge["thumbnail"] = thumbnail
+    return knowledge
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    first = attach_blob({"content": frame})
+    second = attach_blob({"content": frame.copy()})
+    print("[Blobs] Referência:", first["_blob"])
+    print("[Blobs] Mesmo digest (deduplicado):", first["_blob"]["digest"] == second["_blob"]["digest"])
+    print("[Blobs] Miniatura:", len(first["thumbnail"]), "caracteres")
+    print("[Blobs] Conteúdo igual:", np.array_equal(blob_store.get(first["_blob"]), frame))
@@ -0,0 +1,156 @@
+"""
+NE-AI V1 — Cold Store
+======================
+
+Nível frio da memória: conhecimentos rebaixados pelo orçamento de residência
+(memory.tiers) ficam em um banco SQLite, fora da RAM:
+
+- Uma linha por conhecimento: id, tipo, digest do conteúdo e o item (metadados, JSON)
+- Índice (tipo, digest): repetições exatas de um conhecimento frio são
+  encontradas sem vetorizar (memory.digests)
+- Corpos e blobs continuam onde estavam (referências "_body" / "_blob")
+- Acesso por id via chave primária; nada é mantido em memória
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional
+from core.config import MEMORY_COLD_FILE
+
+# =========================
+# CLASSE COLD STORE
+# =========================
+
+class ColdStore:
+    """
+    Tabela SQLite id → item, segura para uso entre threads (uma conexão + lock).
+    """
+    def __init__(self, path: str = MEMORY_COLD_FILE):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        """
+        Abre o banco na primeira utilização (chamar com o lock adquirido).
+        """
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cold ("
+                "id TEXT PRIMARY KEY, type TEXT, item TEXT NOT NULL, evicted_at REAL, digest TEXT)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cold)")]
+            if "digest" not in columns:
+                self._conn.execute("ALTER TABLE cold ADD COLUMN digest TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cold_digest ON cold (type, digest)")
+        return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM cold").fetchone()[0]
+
+    def __contains__(self, knowledge_id: str) -> bool:
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM cold WHERE id = ?", (knowledge_id,)).fetchone() is not None
+
+    def put_many(self, items: Iterable[dict]) -> List[str]:
+        """
+        Grava (ou substitui) itens no nível frio, em uma única transação.
+
+        Returns:
+            List[str]: Ids gravados (itens não serializáveis ficam de fora)
+        """
+        now = time.time()
+        rows = []
+        for item in items:
+            try:
+                rows.append((item["id"], item.get("type"), json.dumps(item), now, item.get("digest")))
+            except (TypeError, ValueError):
+                continue
+        with self._lock:
+            with self._db() as conn:
+                conn.executemany("INSERT OR REPLACE INTO cold (id, type, item, evicted_at, digest) "
+                                 "VALUES (?, ?, ?, ?, ?)", rows)
+        return [row[0] for row in rows]
+
+    def get(self, knowledge_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db().execute("SELECT item FROM cold WHERE id = ?", (knowledge_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_digest(self, item_type: str, digest: str) -> Optional[str]:
+        """
+        Id de um conhecimento frio com exatamente este conteúdo, ou None.
+        """
+        with self._lock:
+            row = self._db().execute("SELECT id FROM cold WHERE type = ? AND digest = ? LIMIT 1",
+                                     (item_type, digest)).fetchone()
+        return row[0] if row else None
+
+    def digests(self, chunk: int = 10000) -> Iterator[str]:
+        """
+        Todos os digests do nível frio, em blocos (reconstrução do Bloom filter).
+        """
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT id, digest FROM cold WHERE id > ? AND digest IS NOT NULL ORDER BY id LIMIT ?",
+                    (last, chunk)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, digest in rows:
+                yield digest
+
+    def delete_many(self, knowledge_ids: Iterable[str]) -> int:
+        """
+        Remove itens do nível frio.
+
+        Returns:
+            int: Nº de itens removidos
+        """
+        with self._lock:
+            with self._db() as conn:
+                cursor = conn.executemany("DELETE FROM cold WHERE id = ?", [(kid,) for kid in knowledge_ids])
+                return cursor.rowcount
+
+    def existing(self, knowledge_ids: List[str], chunk: int = 500) -> List[str]:
+        """
+        Subconjunto dos ids que estão no nível frio (consultas em blocos).
+        """
+        found = []
+        with self._lock:
+            db = self._db()
+            for start in range(0, len(knowledge_ids), chunk):
+                part = knowledge_ids[start:start + chunk]
+                marks = ",".join("?" * len(part))
+                found.extend(row[0] for row in db.execute(f"SELECT id FROM cold WHERE id IN ({marks})", part))
+        return found
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import tempfile
+
+    cold = ColdStore(os.path.join(tempfile.mkdtemp(), "cold.sqlite"))
+    cold.put_many([{"id": f"k{i}", "type": "text", "digest": f"d{i}", "_body": [0, 10]} for i in range(5)])
+    print("[ColdStore] Itens:", len(cold), "| k3:", cold.get("k3"), "| digest d2:", cold.find_digest("text", "d2"))
+    print("[ColdStore] Existentes:", cold.existing(["k1", "x", "k4"]))
+    print("[ColdStore] Removidos:", cold.delete_many(["k1", "k2"]), "| restantes:", len(cold))
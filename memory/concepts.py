@@ -0,0 +1,336 @@
+"""
+NE-AI V1 — Concepts
+====================
+
+Camada de conceitos sobre uma matriz de embeddings (k-means esférico em
+mini-lotes, incremental):
+
+- Cada conhecimento pertence ao centróide (conceito) mais próximo
+- Os centróides acompanham a memória: a cada CONCEPT_BATCH_SIZE inserções
+  eles se movem na direção dos novos membros (taxa 1/n por centróide)
+- Busca em dois níveis: consulta × centróides, depois só os membros dos
+  CONCEPT_PROBES conceitos mais próximos (custo sublinear no tamanho da memória)
+- Centróides de vetores esparsos (texto) são truncados nos
+  CONCEPT_CENTROID_TERMS maiores pesos: cabem na RAM mesmo com 2^20 dimensões
+
+Os membros são slots da matriz. Centróides e atribuições (por id do
+conhecimento, estável entre compactações) são persistidos juntos: o
+carregamento só atribui as linhas que não estavam no arquivo.
+
+Como os centróides se movem, os membros antigos são reatribuídos em
+rodízio pela matriz (CONCEPT_REASSIGN_ROWS a cada passo, ver `updates`),
+e as listas de membros não se afastam dos seus centróides.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import os
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import scipy.sparse as sp
+from memory.similarity import normalize_rows
+from core.config import CONCEPT_COUNT, CONCEPT_BATCH_SIZE, CONCEPT_CENTROID_TERMS
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def _truncate(rows: sp.csr_matrix, terms: int) -> sp.csr_matrix:
+    """
+    Mantém os `terms` maiores valores de cada linha de uma matriz esparsa.
+    """
+    rows = sp.csr_matrix(rows)
+    kept = []
+    for i in range(rows.shape[0]):
+        row = rows.getrow(i)
+        if row.nnz > terms:
+            top = np.argpartition(-row.data, terms - 1)[:terms]
+            row = sp.csr_matrix((row.data[top], row.indices[top], [0, terms]), shape=row.shape)
+        kept.append(row)
+    return sp.vstack(kept, format="csr")
+
+# =========================
+# CLASSE CONCEPT INDEX
+# =========================
+
+class ConceptIndex:
+    """
+    Centróides de conceitos e seus membros (slots de uma matriz de embeddings).
+    """
+    def __init__(self, sparse: bool = False, n_concepts: int = CONCEPT_COUNT,
+                 batch_size: int = CONCEPT_BATCH_SIZE, max_terms: int = CONCEPT_CENTROID_TERMS,
+                 seed: int = 42):
+        """
+        Args:
+            sparse (bool): Vetores esparsos (centróides CSR truncados)
+            n_concepts (int): Nº de conceitos
+            batch_size (int): Inserções acumuladas antes de mover os centróides
+            max_terms (int): Não nulos mantidos por centróide esparso
+            seed (int): Semente da inicialização
+        """
+        self.sparse = sparse
+        self.n_concepts = n_concepts
+        self.batch_size = batch_size
+        self.max_terms = max_terms
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self.centroids = None                  # (k, d) denso ou CSR
+        self._transposed = None                # (d, k) pronto para o produto (CSR, se esparso)
+        self.counts: Optional[np.ndarray] = None  # Vetores absorvidos por centróide
+        self.members: List[Set[int]] = []
+        self.assignment: Dict[int, int] = {}   # slot → conceito
+        self._buffer: List[tuple] = []         # (slot, vetor) antes do treino / do próximo mini-lote
+        self.updates = 0                       # Passos do mini-lote (centróides movidos) desde o reset
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self.assignment)
+
+    # =========================
+    # SIMILARIDADE
+    # =========================
+
+    def _stack(self, vectors: list):
+        return sp.vstack(vectors, format="csr") if self.sparse else np.vstack(vectors).astype(np.float32)
+
+    def _set_centroids(self, centroids, finish: bool = True):
+        """
+        Troca os centróides, normalizando-os (e truncando, se esparsos).
+
+        A transposta é mantida pronta: transpor um CSR de 2^20 colunas a cada
+        consulta custaria mais que o próprio produto.
+        """
+        if finish:
+            if self.sparse:
+                centroids = normalize_rows(_truncate(centroids, self.max_terms)).tocsr()
+            else:
+                centroids = normalize_rows(np.asarray(centroids, dtype=np.float32))
+        self.centroids = centroids
+        self._transposed = centroids.T.tocsr() if self.sparse else np.ascontiguousarray(centroids.T)
+
+    def similarities(self, rows) -> np.ndarray:
+        """
+        Similaridade coseno (linhas normalizadas) de cada linha com cada centróide.
+
+        Returns:
+            np.ndarray: (n, k)
+        """
+        if not sp.issparse(rows):
+            rows = np.atleast_2d(np.asarray(rows, dtype=np.float32))
+        scores = rows @ self._transposed
+        return scores.toarray() if sp.issparse(scores) else np.asarray(scores)
+
+    # =========================
+    # TREINO E ATRIBUIÇÃO
+    # =========================
+
+    def train(self, slots: List[int], rows, iterations: int = 5):
+        """
+        Inicializa os centróides (k-means esférico) sobre um conjunto de linhas
+        e atribui essas linhas.
+        """
+        n = rows.shape[0]
+        if n == 0:
+            return
+        k = min(self.n_concepts, n)
+        rng = np.random.default_rng(self.seed)
+        self._set_centroids(rows[np.sort(rng.choice(n, k, replace=False))])
+        for _ in range(iterations):
+            labels = np.argmax(self.similarities(rows), axis=1)
+            sums = sp.csr_matrix((np.ones(n, dtype=np.float32), (labels, np.arange(n))), shape=(k, n)) @ rows
+            empty = np.bincount(labels, minlength=k) == 0
+            if empty.any():
+                sums = (sp.lil_matrix(sums) if self.sparse else sums)
+                sums[np.flatnonzero(empty)] = self.centroids[np.flatnonzero(empty)]
+            self._set_centroids(sums)
+        labels = np.argmax(self.similarities(rows), axis=1)
+        self.counts = np.bincount(labels, minlength=k).astype(np.float64)
+        self.members = [set() for _ in range(k)]
+        self.assignment = {}
+        self._store(slots, labels)
+        print(f"[Concepts] {k} conceitos treinados sobre {n} vetores")
+
+    def _store(self, slots: List[int], labels: np.ndarray):
+        """
+        Registra (ou move) membros; agrupado por conceito para atribuir a
+        matriz inteira de uma vez no carregamento.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        labels = np.asarray(labels, dtype=np.int64)
+        slot_list = slots.tolist()
+        for slot in [slot for slot in slot_list if slot in self.assignment]:
+            self.members[self.assignment[slot]].discard(slot)
+        self.assignment.update(zip(slot_list, labels.tolist()))
+        order = np.argsort(labels, kind="stable")
+        concepts, starts = np.unique(labels[order], return_index=True)
+        for c, group in zip(concepts.tolist(), np.split(slots[order], starts[1:])):
+            self.members[c].update(group.tolist())
+
+    def assign(self, slots: List[int], rows) -> np.ndarray:
+        """
+        Atribui linhas ao conceito mais próximo, sem mover os centróides.
+
+        Returns:
+            np.ndarray: Conceito de cada linha
+        """
+        labels = np.argmax(self.similarities(rows), axis=1)
+        self._store(slots, labels)
+        return labels
+
+    def add(self, slot: int, vector, min_train: Optional[int] = None):
+        """
+        Registra uma linha nova. Antes do treino, acumula até `min_train`
+        linhas (padrão: 8 por conceito); depois, atribui e acumula para o
+        próximo mini-lote.
+        """
+        self._buffer.append((slot, vector))
+        if not self.trained:
+            if len(self._buffer) >= (min_train or 8 * self.n_concepts):
+                slots, vectors = zip(*self._buffer)
+                self._buffer = []
+                self.train(list(slots), self._stack(list(vectors)))
+            return
+        self.assign([slot], vector)
+        if len(self._buffer) >= self.batch_size:
+            self._update()
+
+    def _update(self):
+        """
+        Passo do k-means em mini-lote: cada centróide vira a média ponderada
+        entre ele (peso = vetores já absorvidos) e seus novos membros.
+        """
+        slots, vectors = zip(*self._buffer)
+        self._buffer = []
+        rows = self._stack(list(vectors))
+        labels = np.array([self.assignment.get(slot, -1) for slot in slots])
+        keep = labels >= 0
+        if not keep.any():
+            return
+        rows, labels = rows[np.flatnonzero(keep)], labels[keep]
+        k = self.centroids.shape[0]
+        new = np.bincount(labels, minlength=k).astype(np.float64)
+        sums = sp.csr_matrix((np.ones(len(labels), dtype=np.float32), (labels, np.arange(len(labels)))),
+                             shape=(k, len(labels))) @ rows
+        total = self.counts + new
+        old_weight = sp.diags((self.counts / np.maximum(total, 1)).astype(np.float32))
+        new_weight = sp.diags((1.0 / np.maximum(total, 1)).astype(np.float32))
+        self._set_centroids(old_weight @ self.centroids + new_weight @ sums)
+        self.counts = total
+        self.updates += 1
+
+    def remove(self, slot: int):
+        label = self.assignment.pop(int(slot), None)
+        if label is not None:
+            self.members[label].discard(int(slot))
+        elif not self.trained:
+            self._buffer = [(s, v) for s, v in self._buffer if s != slot]
+
+    # =========================
+    # BUSCA
+    # =========================
+
+    def probe(self, queries, n_probes: int) -> np.ndarray:
+        """
+        Conceitos mais próximos de cada consulta (a ordem por consulta não
+        depende da norma dela: dispensa normalizar).
+
+        Returns:
+            np.ndarray: (q, n_probes) índices de conceitos
+        """
+        scores = self.similarities(queries)
+        n_probes = min(n_probes, scores.shape[1])
+        return np.argpartition(-scores, n_probes - 1, axis=1)[:, :n_probes]
+
+    def candidates(self, concepts) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Slots membros dos conceitos informados e o conceito de cada um.
+
+        Returns:
+            (np.ndarray, np.ndarray): Slots e conceitos, na mesma ordem
+        """
+        slots, labels = [], []
+        for c in np.unique(concepts):
+            members = self.members[int(c)]
+            slots.append(np.fromiter(members, dtype=np.int64, count=len(members)))
+            labels.append(np.full(len(members), c, dtype=np.int64))
+        if not slots:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(slots), np.concatenate(labels)
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def save(self, path: str, ids: Optional[List[Optional[str]]] = None):
+        """
+        Salva centróides, contagens e (com `ids`, slot → id) as atribuições (.npz).
+        """
+        if not self.trained:
+            return
+        members = {}
+        if ids is not None and self.assignment:
+            slots = np.fromiter(self.assignment.keys(), dtype=np.int64, count=len(self.assignment))
+            labels = np.fromiter(self.assignment.values(), dtype=np.int64, count=len(self.assignment))
+            known = [ids[slot] if slot < len(ids) else None for slot in slots.tolist()]
+            alive = np.array([kid is not None for kid in known], dtype=bool)
+            members = {"member_ids": np.array([kid for kid in known if kid is not None], dtype=str),
+                       "member_labels": labels[alive].astype(np.int32)}
+        if self.sparse:
+            arrays = {"data": self.centroids.data, "indices": self.centroids.indices,
+                      "indptr": self.centroids.indptr, "shape": np.array(self.centroids.shape)}
+        else:
+            arrays = {"centroids": self.centroids}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, counts=self.counts, **arrays, **members)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, slots: Optional[Dict[str, int]] = None) -> bool:
+        """
+        Carrega os centróides salvos e, com `slots` (id → slot), as atribuições
+        dos ids ainda presentes; as linhas restantes ficam para assign().
+
+        Returns:
+            bool: True se havia centróides compatíveis
+        """
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as saved:
+            if ("data" in saved) != self.sparse:
+                return False
+            if self.sparse:
+                centroids = sp.csr_matrix((saved["data"], saved["indices"], saved["indptr"]),
+                                          shape=tuple(saved["shape"]))
+            else:
+                centroids = saved["centroids"]
+            counts = saved["counts"]
+            members = (saved["member_ids"].tolist(), saved["member_labels"]) if "member_ids" in saved else None
+        self.reset()
+        self._set_centroids(centroids, finish=False)
+        self.counts = counts
+        self.members = [set() for _ in range(centroids.shape[0])]
+        if slots is not None and members is not None:
+            member_slots = np.array([slots.get(kid, -1) for kid in members[0]], dtype=np.int64)
+            known = (member_slots >= 0) & (members[1] < centroids.shape[0])
+            self._store(member_slots[known], members[1][known])
+        return True
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    centers = normalize_rows(rng.normal(size=(8, 32)))
+    concepts = ConceptIndex(n_concepts=8, batch_size=32)
+    for slot in range(2000):
+        concepts.add(slot, normalize_rows(centers[slot % 8] + 0.1 * rng.normal(size=32))[0])
+    query = centers[3:4]
+    found, _ = concepts.candidates(concepts.probe(query, 1)[0])
+    print(f"[Concepts] {len(concepts)} membros | candidatos para a consulta: {len(found)} "
+          f"(corretos: {np.mean(found % 8 == 3):.2f})")
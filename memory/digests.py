@@ -0,0 +1,249 @@
+"""
+NE-AI V1 — Digests
+===================
+
+Filtro de duplicatas exatas, na frente da vetorização:
+
+- Cada conhecimento guarda o digest do seu conteúdo ("digest")
+- Nível quente: dicionário por modalidade digest → id (O(1))
+- Nível frio: Bloom filter dos digests rebaixados; só um "talvez" consulta o
+  índice (tipo, digest) do SQLite — um input novo não toca o disco
+
+Um input byte a byte idêntico a um conhecimento (mesmo texto normalizado,
+mesmo arquivo, mesmo frame) vai direto para o reforço, sem vetorizar nem
+buscar similaridade. Falsos negativos (ex: Bloom filter de um snapshot
+antigo) só fazem o input seguir o caminho normal.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+from memory.store import memory_store
+from memory.embedding_cache import content_digest
+from core.config import DIGESTS_DIR, DIGEST_BLOOM_CAPACITY, DIGEST_BLOOM_ERROR_RATE
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def input_digest(content) -> Optional[str]:
+    """
+    Digest de um conteúdo de input (texto, bytes ou array); None para outros tipos.
+    """
+    if isinstance(content, (str, bytes, bytearray, np.ndarray)):
+        return content_digest(content)
+    return None
+
+# =========================
+# CLASSE BLOOM FILTER
+# =========================
+
+class BloomFilter:
+    """
+    Bloom filter sobre digests hexadecimais (128 bits): as k posições vêm de
+    duas metades do próprio digest (h1 + i·h2), sem hash adicional.
+    """
+    def __init__(self, capacity: int = DIGEST_BLOOM_CAPACITY, error_rate: float = DIGEST_BLOOM_ERROR_RATE):
+        """
+        Args:
+            capacity (int): Nº de elementos previsto
+            error_rate (float): Taxa de falsos positivos nessa capacidade
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, digest: str) -> np.ndarray:
+        value = int(digest[:32], 16)
+        h1, h2 = value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+        return np.array([(h1 + i * h2) % self.size for i in range(self.hashes)], dtype=np.int64)
+
+    def add(self, digest: str):
+        positions = self._positions(digest)
+        np.bitwise_or.at(self.bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+        self.count += 1
+
+    def __contains__(self, digest: str) -> bool:
+        positions = self._positions(digest)
+        return bool(np.all(self.bits[positions >> 3] & (1 << (positions & 7)).astype(np.uint8)))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, bits=self.bits, params=np.array([self.capacity, self.count]),
+                 error_rate=np.array([self.error_rate]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BloomFilter"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            capacity, count = (int(v) for v in saved["params"])
+            bloom = cls(capacity, float(saved["error_rate"][0]))
+            if saved["bits"].shape != bloom.bits.shape:
+                return None
+            bloom.bits = saved["bits"].copy()
+        bloom.count = count
+        return bloom
+
+# =========================
+# CLASSE DIGEST INDEX
+# =========================
+
+class DigestIndex:
+    """
+    Digests dos conhecimentos: dicionário para o nível quente, Bloom filter
+    (+ SQLite) para o frio.
+    """
+    def __init__(self, directory: str = DIGESTS_DIR):
+        self.directory = directory
+        self.hot: Dict[str, Dict[str, str]] = {}       # modalidade → digest → id
+        self._keys: Dict[str, Tuple[str, str]] = {}    # id → (modalidade, digest)
+        self.bloom = BloomFilter()
+        self._lock = threading.Lock()
+
+    @property
+    def bloom_path(self) -> str:
+        return os.path.join(self.directory, "cold.bloom.npz")
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, item: dict):
+        """
+        Registra o digest de um conhecimento quente (se houver).
+        """
+        digest, modality = item.get("digest"), item.get("type")
+        if digest is None:
+            return
+        with self._lock:
+            self._drop(item["id"])
+            self.hot.setdefault(modality, {})[digest] = item["id"]
+            self._keys[item["id"]] = (modality, digest)
+
+    def _drop(self, knowledge_id: str) -> Optional[str]:
+        key = self._keys.pop(knowledge_id, None)
+        if key is None:
+            return None
+        modality, digest = key
+        if self.hot.get(modality, {}).get(digest) == knowledge_id:
+            del self.hot[modality][digest]
+        return digest
+
+    def remove(self, knowledge_id: str):
+        with self._lock:
+            self._drop(knowledge_id)
+
+    def evict(self, knowledge_id: str):
+        """
+        Conhecimento rebaixado: o digest sai do dicionário e entra no Bloom filter.
+        """
+        with self._lock:
+            digest = self._drop(knowledge_id)
+            if digest is not None:
+                self._grow_bloom()
+                self.bloom.add(digest)
+
+    def _grow_bloom(self):
+        """
+        Bloom filter cheio (taxa de erro acima da prevista): reconstrói com o dobro
+        da capacidade a partir do SQLite (chamar com o lock adquirido).
+        """
+        if self.bloom.count < self.bloom.capacity:
+            return
+        self.bloom = BloomFilter(2 * self.bloom.capacity, self.bloom.error_rate)
+        for digest in memory_store.cold.digests():
+            self.bloom.add(digest)
+
+    def lookup(self, modality: str, digest: Optional[str]) -> Optional[Tuple[str, str]]:
+        """
+        Busca um conhecimento com exatamente este conteúdo.
+
+        Returns:
+            (str, str): ("memory" | "cold", id), ou None
+        """
+        if digest is None:
+            return None
+        knowledge_id = self.hot.get(modality, {}).get(digest)
+        if knowledge_id is not None:
+            return "memory", knowledge_id
+        if digest in self.bloom:
+            knowledge_id = memory_store.cold.find_digest(modality, digest)
+            if knowledge_id is not None:
+                return "cold", knowledge_id
+        return None
+
+    def sync(self, store: list):
+        """
+        Reconstrói o dicionário quente a partir da memória (snapshot()).
+        """
+        with self._lock:
+            self.hot, self._keys = {}, {}
+        for item in store:
+            self.add(item)
+
+    def save(self):
+        with self._lock:
+            self.bloom.save(self.bloom_path)
+
+    def load(self):
+        """
+        Carrega o Bloom filter do nível frio (ou o reconstrói a partir do SQLite).
+        """
+        bloom = BloomFilter.load(self.bloom_path)
+        if bloom is None:
+            cold = memory_store.cold_count()
+            bloom = BloomFilter(max(DIGEST_BLOOM_CAPACITY, 2 * cold))
+            for digest in memory_store.cold.digests():
+                bloom.add(digest)
+        with self._lock:
+            self.bloom = bloom
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+DIGESTS = DigestIndex()
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def find_exact(data: dict) -> Optional[Tuple[str, str]]:
+    """
+    Conhecimento com conteúdo idêntico ao de um input ({"type", "data"}).
+
+    Returns:
+        (str, str): ("memory" | "cold", id), ou None
+    """
+    return DIGESTS.lookup(data.get("type"), input_digest(data.get("data")))
+
+def save_digests():
+    DIGESTS.save()
+
+# O Bloom filter do nível frio é persistido junto com cada snapshot da memória
+memory_store.add_compaction_hook(save_digests)
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(content_digest(f"texto {i}"))
+    false_positives = sum(content_digest(f"outro {i}") in bloom for i in range(10000))
+    print(f"[Digests] Bloom: {bloom.size} bits, {bloom.hashes} hashes, "
+          f"falsos positivos {false_positives / 10000:.3%}, 'texto 5' presente: {content_digest('texto 5') in bloom}")
+
+    index = DigestIndex()
+    index.add({"id": "k1", "type": "text", "digest": input_digest("abrir janela")})
+    print("[Digests] Exato:", index.lookup("text", input_digest("abrir janela")),
+          "| outro:", index.lookup("text", input_digest("fechar janela")))
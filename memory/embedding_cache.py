@@ -0,0 +1,129 @@
+"""
+NE-AI V1 — Embedding Cache
+===========================
+
+Cache LRU de embeddings endereçado por conteúdo, na frente dos vetorizadores:
+
+- Chave: digest blake2b do conteúdo (texto ou bytes da imagem) + versão do modelo
+- Limite por tamanho em bytes (EMBEDDING_CACHE_MAX_BYTES), evicção do menos usado
+- Contadores de acertos/erros para monitoramento
+- invalidate() descarta tudo quando o modelo de embedding muda (ex: refit TF-IDF)
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+import numpy as np
+import scipy.sparse as sp
+from core.config import EMBEDDING_CACHE_MAX_BYTES
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def content_digest(content) -> str:
+    """
+    Digest do conteúdo: texto (UTF-8), bytes ou array (bytes + shape + dtype).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(content, np.ndarray):
+        h.update(f"{content.shape}{content.dtype}".encode())
+        h.update(np.ascontiguousarray(content).data)
+    elif isinstance(content, (bytes, bytearray)):
+        h.update(content)
+    else:
+        h.update(str(content).encode("utf-8"))
+    return h.hexdigest()
+
+def _nbytes(vector) -> int:
+    if sp.issparse(vector):
+        return vector.data.nbytes + vector.indices.nbytes + vector.indptr.nbytes
+    return np.asarray(vector).nbytes
+
+# =========================
+# CLASSE EMBEDDING CACHE
+# =========================
+
+class EmbeddingCache:
+    """
+    Cache LRU limitado por bytes. Os vetores devolvidos são compartilhados:
+    quem precisar alterá-los deve copiar antes (arrays densos ficam somente leitura).
+    """
+    def __init__(self, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """
+        Retorna o vetor em cache para `key` ou o calcula e armazena.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        # Calcula fora do lock (vetorizar é o trecho caro)
+        vector = compute()
+        if isinstance(vector, np.ndarray):
+            vector.setflags(write=False)
+        size = _nbytes(vector)
+        if size > self.max_bytes:
+            return vector
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = vector
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= _nbytes(evicted)
+                    self.evictions += 1
+        return vector
+
+    def invalidate(self):
+        """
+        Descarta todas as entradas (o modelo de embedding mudou).
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Contadores do cache (para /status e logs).
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    cache = EmbeddingCache(max_bytes=3 * 1024 * 8)
+    for i in [1, 2, 1, 3, 4, 1]:
+        cache.get_or_compute(("test", i), lambda: np.zeros(1024))
+    print("[EmbeddingCache] Estatísticas:", cache.stats())
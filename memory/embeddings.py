@@ -0,0 +1,1517 @@
+"""
+NE-AI V1 — Embeddings
+======================
+
+Mantém os embeddings da memória em matrizes NumPy contíguas, uma por modalidade:
+
+- Cada conhecimento é vetorizado uma única vez (no learn)
+- Linhas normalizadas → similaridade coseno vira um único produto matriz × vetor
+- Crescimento incremental (capacidade dobra quando enche)
+- Remoção por tombstone (linha zerada), sem deslocar as demais
+- Persistência em disco junto com a compactação da memória
+- Opcionalmente delega a busca a um índice aproximado (memory.index)
+- Textos em formato esparso (CSR): SparseEmbeddingMatrix, persistida em .npy
+- Carregamento por mmap (copy-on-write): pronto em milissegundos, sem ler as linhas
+- Matrizes densas opcionalmente quantizadas (EMBEDDINGS_DTYPE = float16/int8):
+  a busca roda sobre a matriz compacta e os EMBEDDINGS_RERANK melhores
+  candidatos são re-ranqueados em float32, lidos de um arquivo lateral em disco
+- Com EMBEDDINGS_SHARED, as matrizes vivem em arquivos np.memmap (memory.shared_array):
+  o learner escreve e publica linhas novas num log de ids; outros processos
+  (viewer web, jobs em lote) mapeiam os mesmos arquivos somente leitura,
+  sem cópia — o page cache do SO é compartilhado entre todos
+- Matrizes quentes agrupam as linhas em conceitos (memory.concepts): a partir
+  de CONCEPT_SEARCH_MIN_ITEMS, a busca exata visita só os membros dos
+  conceitos mais próximos da consulta
+- COLD_EMBEDDINGS: matrizes do nível frio da memória (memory.tiers), em
+  disco, sem índice aproximado; consultadas só quando a quente não encontra
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import json
+import os
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import Callable, Dict, List, Optional, Tuple
+from memory.vectorizer import (
+    vectorize_text, vectorize_image, text_dimension, observe_text_vector, idf_weights, idf_version,
+    save_vectorizer_state, load_vectorizer_state, reset_idf,
+)
+from memory.store import memory_store
+from memory.shared_array import SharedArray, IdLog
+from memory.index import create_index, load_index
+from memory.concepts import ConceptIndex
+from memory.similarity import find_top_k, normalize_rows
+from core.config import (
+    CONCEPTS_ENABLED,
+    CONCEPT_PROBES,
+    CONCEPT_REASSIGN_ROWS,
+    CONCEPT_SEARCH_MIN_ITEMS,
+    EMBEDDINGS_DIR,
+    EMBEDDINGS_INITIAL_CAPACITY,
+    EMBEDDINGS_DTYPE,
+    EMBEDDINGS_RERANK,
+    EMBEDDINGS_SHARED,
+    IDF_NORMS_REFRESH,
+    MEMORY_COLD_DIR,
+    MEMORY_INDEX_BACKEND,
+)
+
+# =========================
+# QUANTIZAÇÃO
+# =========================
+
+def quantize_rows(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Converte linhas float32 para o dtype de armazenamento.
+
+    Returns:
+        (np.ndarray, np.ndarray): Linhas quantizadas e escalas por linha (só int8)
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0)
+    return np.round(vectors / safe[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def dequantize_rows(vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Inverso de quantize_rows() (com a perda da quantização).
+    """
+    vectors = vectors.astype(np.float32)
+    if scales is not None:
+        vectors *= scales[:, None]
+    return vectors
+
+# =========================
+# CLASSE FULL PRECISION ROWS
+# =========================
+
+class FullPrecisionRows:
+    """
+    Arquivo lateral com as linhas em float32 (slot → linha), só para o re-ranking.
+
+    Fica em disco: a cada consulta são lidas apenas as linhas candidatas.
+    """
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * 4
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "r+b" if os.path.exists(path) else "w+b")
+
+    def __len__(self) -> int:
+        self._fh.seek(0, os.SEEK_END)
+        return self._fh.tell() // self.row_bytes
+
+    def write(self, slot: int, vector: np.ndarray):
+        self._fh.seek(slot * self.row_bytes)
+        self._fh.write(np.asarray(vector, dtype=np.float32).tobytes())
+
+    def read(self, slots: np.ndarray) -> np.ndarray:
+        rows = np.empty((len(slots), self.dim), dtype=np.float32)
+        for i, slot in enumerate(slots):
+            self._fh.seek(int(slot) * self.row_bytes)
+            rows[i] = np.frombuffer(self._fh.read(self.row_bytes), dtype=np.float32)
+        return rows
+
+    def truncate(self, rows: int = 0):
+        self._fh.truncate(rows * self.row_bytes)
+
+    def flush(self):
+        self._fh.flush()
+
+# =========================
+# CLASSE EMBEDDING MATRIX
+# =========================
+
+class EmbeddingMatrix:
+    """
+    Matriz de embeddings normalizados de uma modalidade (text, vision).
+    """
+    kind = "dense"  # Tipo registrado nos metadados dos arquivos compartilhados
+
+    def __init__(self, modality: str, capacity: int = EMBEDDINGS_INITIAL_CAPACITY,
+                 dtype: str = EMBEDDINGS_DTYPE, directory: str = EMBEDDINGS_DIR,
+                 shared: bool = EMBEDDINGS_SHARED, readonly: bool = False, indexed: bool = True):
+        """
+        Args:
+            modality (str): Modalidade dos conhecimentos ('text' ou 'vision')
+            capacity (int): Linhas pré-alocadas
+            dtype (str): Armazenamento das linhas ('float32', 'float16' ou 'int8')
+            directory (str): Onde ficam os arquivos compartilhados e o de re-ranking
+            shared (bool): Linhas em arquivos mapeados (np.memmap) compartilháveis
+            readonly (bool): Leitor dos arquivos de outro processo (implica shared;
+                acompanha o escritor via refresh(), busca sempre exata)
+            indexed (bool): Usa o índice aproximado configurado e os conceitos
+                (False = busca sempre exata, sem estruturas em RAM; ex: nível frio)
+        """
+        self.modality = modality
+        self.capacity = capacity
+        self.dtype = dtype
+        self.directory = directory
+        self.shared = shared or readonly
+        self.readonly = readonly
+        self.indexed = indexed and not readonly
+        self.generation = 0                          # Geração dos arquivos compartilhados
+        self._storage: Dict[str, SharedArray] = {}   # Arrays mapeados (nome do atributo → arquivo)
+        self._log: Optional[IdLog] = None            # Publicação das linhas (slot → id)
+        self._mutations = 0
+        self.dim: Optional[int] = None
+        self.vectors: Optional[np.ndarray] = None   # (capacity, dim) no dtype de armazenamento
+        self.scales: Optional[np.ndarray] = None    # (capacity,) escala por linha (int8)
+        self.full: Optional[FullPrecisionRows] = None  # Linhas float32 para re-ranking
+        self.ids: List[Optional[str]] = []           # slot → id (None = removido)
+        self.slots: Dict[str, int] = {}              # id → slot
+        self.index = self._new_index() if self.indexed else None  # Índice aproximado (None = busca exata)
+        self.concepts = ConceptIndex(sparse=self.kind == "sparse") if self.indexed and CONCEPTS_ENABLED else None
+        self._concept_cursor = 0  # Próximo slot do rodízio de reatribuição dos conceitos
+        self._concepts_base: Optional[str] = None  # Conceitos salvos ainda não restaurados (load preguiçoso)
+        self._lock = threading.RLock()  # Reentrante: compact() reconstrói a matriz sob o lock
+
+    def _new_index(self):
+        """
+        Cria o índice configurado em MEMORY_INDEX_BACKEND ('exact' dispensa índice),
+        pontuando as linhas desta matriz pelo slot (sem cópia própria dos vetores).
+        """
+        if MEMORY_INDEX_BACKEND == "exact":
+            return None
+        return create_index(self._raw_rows, MEMORY_INDEX_BACKEND)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, knowledge_id: str) -> bool:
+        return knowledge_id in self.slots
+
+    def _grow(self):
+        """
+        Dobra a capacidade da matriz preservando as linhas existentes.
+        """
+        new_capacity = max(self.capacity * 2, 1)
+        self.vectors = self._resize("vectors", self.vectors, new_capacity)
+        if self.scales is not None:
+            self.scales = self._resize("scales", self.scales, new_capacity)
+        self.capacity = new_capacity
+
+    def _allocate(self, dim: int, keep_full: bool = False):
+        """
+        Aloca a matriz (e, se quantizada, escalas e arquivo de re-ranking).
+
+        Args:
+            dim (int): Dimensão das linhas
+            keep_full (bool): Reaproveita o arquivo de re-ranking existente
+        """
+        self.dim = dim
+        if self.shared:
+            self._new_generation(dim)
+        self.vectors = self._array("vectors", self.capacity)
+        self.scales = self._array("scales", self.capacity) if self.dtype == "int8" else None
+        if self.dtype != "float32":
+            self.full = FullPrecisionRows(os.path.join(self.directory, f"{self.modality}.f32"), dim)
+            if not keep_full:
+                self.full.truncate(0)
+
+    def _write_row(self, slot: int, vector: np.ndarray):
+        """
+        Grava uma linha normalizada (quantizando, se for o caso).
+        """
+        quantized, scales = quantize_rows(vector, self.dtype)
+        self.vectors[slot] = quantized[0]
+        if self.scales is not None:
+            self.scales[slot] = scales[0]
+        if self.full is not None:
+            self.full.write(slot, vector)
+
+    def add(self, knowledge_id: str, vector: np.ndarray):
+        """
+        Adiciona (ou substitui) o embedding de um conhecimento.
+        """
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        self._check_writable()
+        with self._lock:
+            if self.vectors is None:
+                self._allocate(vector.shape[0])
+            elif vector.shape[0] != self.dim:
+                raise ValueError(
+                    f"Dimensão {vector.shape[0]} incompatível com a matriz '{self.modality}' ({self.dim})"
+                )
+
+            slot = self.slots.get(knowledge_id)
+            if slot is None:
+                if len(self.ids) >= self.capacity:
+                    self._grow()
+                slot = len(self.ids)
+                self.ids.append(knowledge_id)
+                self.slots[knowledge_id] = slot
+                self._write_row(slot, vector)
+                self._publish(slot, knowledge_id)
+            else:
+                self._write_row(slot, vector)  # Substituição no lugar: já publicado
+            if self.index is not None:
+                self.index.add(knowledge_id, slot, vector)
+            if self.concepts is not None:
+                self._add_to_concepts(slot, vector)
+
+    def _add_to_concepts(self, slot: int, vector):
+        """
+        Registra a linha nos conceitos; se os centróides se moveram, reatribui
+        os próximos CONCEPT_REASSIGN_ROWS membros do rodízio (chamar com o lock adquirido).
+        """
+        self._ensure_concepts()
+        updates = self.concepts.updates
+        self.concepts.add(slot, vector)
+        if self.concepts.updates == updates:
+            return
+        rows = len(self.ids)
+        start = self._concept_cursor if self._concept_cursor < rows else 0
+        part = np.arange(start, min(rows, start + CONCEPT_REASSIGN_ROWS), dtype=np.int64)
+        part = part[[self.ids[slot] is not None for slot in part.tolist()]]
+        if len(part):
+            self.concepts.assign(part.tolist(), self._raw_rows(part))
+        self._concept_cursor = start + CONCEPT_REASSIGN_ROWS
+
+    def remove(self, knowledge_id: str):
+        """
+        Remove o embedding de um conhecimento (tombstone).
+        """
+        self._check_writable()
+        with self._lock:
+            slot = self.slots.pop(knowledge_id, None)
+            if slot is not None:
+                self.ids[slot] = None
+                self.vectors[slot] = 0
+                if self.scales is not None:
+                    self.scales[slot] = 0.0
+                self._publish(slot, None)
+                if self.index is not None:
+                    self.index.remove(knowledge_id)
+                if self.concepts is not None:
+                    self._ensure_concepts()
+                    self.concepts.remove(slot)
+
+    def reset(self):
+        """
+        Descarta todos os embeddings (ex: mudança de dimensão do vetorizador).
+        """
+        self._check_writable()
+        with self._lock:
+            self.dim = None
+            self.vectors = None
+            self.scales = None
+            if self.full is not None:
+                self.full.truncate(0)
+                self.full = None
+            self.ids = []
+            self.slots = {}
+            self.index = self._new_index() if self.indexed else None
+            if self.concepts is not None:
+                self.concepts.reset()
+                self._concepts_base = None
+            if self.shared:
+                self._new_generation(None)
+
+    def vector(self, knowledge_id: str) -> Optional[np.ndarray]:
+        """
+        Embedding armazenado de um conhecimento (float32, normalizado), ou None.
+        """
+        with self._lock:
+            slot = self.slots.get(knowledge_id)
+            if slot is None:
+                return None
+            if self.full is not None:
+                return self.full.read(np.array([slot]))[0]
+            scales = self.scales[slot:slot + 1] if self.scales is not None else None
+            return dequantize_rows(self.vectors[slot:slot + 1], scales)[0]
+
+    def row_nbytes(self, knowledge_id: str) -> int:
+        """
+        Bytes ocupados pela linha de um conhecimento (0 se não houver).
+        """
+        if knowledge_id not in self.slots:
+            return 0
+        return self.dim * np.dtype(self.dtype).itemsize
+
+    def compact(self, min_tombstones: int = 1024) -> bool:
+        """
+        Reconstrói a matriz só com as linhas vivas quando os tombstones
+        passam das linhas vivas (ex: após rebaixar itens para o nível frio).
+
+        Returns:
+            bool: True se compactou
+        """
+        with self._lock:
+            if len(self.ids) - len(self.slots) < max(min_tombstones, len(self.slots)):
+                return False
+            live = [(kid, self.vector(kid)) for kid in self.ids if kid is not None]
+            self.reset()
+            for knowledge_id, vector in live:
+                self.add(knowledge_id, vector)
+        print(f"[Embeddings] Matriz '{self.modality}' compactada com {len(live)} vetores")
+        return True
+
+    @staticmethod
+    def _as_batch(vectors):
+        """
+        Converte consultas para um lote 2D float32 (denso).
+        """
+        return np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+
+    def _rows(self):
+        """
+        Linhas ocupadas da matriz (chamar com o lock adquirido).
+        """
+        return self.vectors[:len(self.ids)]
+
+    def _search_space(self, vectors, slots: Optional[np.ndarray] = None):
+        """
+        Consultas prontas (normalizadas), linhas e escala por linha da busca:
+        score = (consulta · linha) × escala (chamar com o lock adquirido).
+
+        Com `slots`, devolve só essas linhas (e escalas), na mesma ordem.
+        """
+        if slots is None:
+            scales = self.scales[:len(self.ids)] if self.scales is not None else None
+            return normalize_rows(vectors), self._rows(), scales
+        scales = self.scales[slots] if self.scales is not None else None
+        return normalize_rows(vectors), self.vectors[slots], scales
+
+    def search(self, vector: np.ndarray) -> Tuple[float, Optional[str]]:
+        """
+        Busca o conhecimento mais similar ao vetor (coseno).
+
+        Returns:
+            (float, str): Similaridade máxima e id do conhecimento (None se vazio)
+        """
+        results = self.search_batch(vector, k=1)[0]
+        if not results:
+            return 0.0, None
+        knowledge_id, sim = results[0]
+        return sim, knowledge_id
+
+    def search_batch(self, vectors: np.ndarray, k: int = 1) -> List[List[Tuple[str, float]]]:
+        """
+        Busca os k conhecimentos mais similares para um lote de vetores.
+
+        Args:
+            vectors (np.ndarray): Lote de consultas (q, d)
+            k (int): Vizinhos por consulta
+
+        Returns:
+            List[List[(str, float)]]: Para cada consulta, pares (id, similaridade)
+        """
+        if self.readonly:
+            self.refresh()
+        vectors = self._as_batch(vectors)
+        n_queries = vectors.shape[0]
+        non_empty = (vectors.getnnz(axis=1) if sp.issparse(vectors) else np.any(vectors, axis=1)) > 0
+
+        with self._lock:
+            if not self.slots:
+                return [[] for _ in range(n_queries)]
+            if vectors.shape[1] != self.dim:
+                print(f"[Embeddings] Dimensão incompatível na busca '{self.modality}', ignorando")
+                return [[] for _ in range(n_queries)]
+
+            if self.index is not None:
+                return [self.index.search(v, k) if ok else [] for v, ok in zip(vectors, non_empty)]
+            if self.concepts is not None and len(self.slots) >= CONCEPT_SEARCH_MIN_ITEMS:
+                self._ensure_concepts()
+                if self.concepts.trained:
+                    return self._search_concepts(vectors, k, non_empty)
+
+            queries, rows, scales = self._search_space(vectors)
+            if self.full is None:
+                indices, scores = find_top_k(queries, rows, k, scales=scales, normalize_queries=False)
+            else:
+                # Busca na matriz compacta, re-ranking dos melhores em float32
+                indices, _ = find_top_k(queries, rows, max(k, EMBEDDINGS_RERANK), scales=scales,
+                                        normalize_queries=False)
+                indices, scores = self._rerank(queries, indices, k)
+
+        results = []
+        for row_idx, row_scores, ok in zip(indices, scores, non_empty):
+            if not ok:
+                results.append([])
+                continue
+            results.append([(self.ids[i], float(score)) for i, score in zip(row_idx, row_scores)
+                            if i >= 0 and self.ids[i] is not None])
+        return results
+
+    def similarities(self, knowledge_id: str, others: List[str]) -> Dict[str, float]:
+        """
+        Similaridade de um conhecimento com outros específicos, na mesma
+        métrica da busca (só as linhas deles são lidas).
+
+        Returns:
+            Dict[str, float]: id → similaridade (ids sem embedding ficam de fora)
+        """
+        if self.readonly:
+            self.refresh()
+        with self._lock:
+            query = self.vector(knowledge_id)
+            present = [kid for kid in others if kid in self.slots]
+            if query is None or not present:
+                return {}
+            slots = np.array([self.slots[kid] for kid in present])
+            if self.full is not None:
+                scores = self.full.read(slots) @ normalize_rows(self._as_batch(query))[0]
+            else:
+                queries, rows, scales = self._search_space(self._as_batch(query), slots)
+                indices, ranked = find_top_k(queries, rows, len(present), scales=scales, normalize_queries=False)
+                scores = np.empty(len(present), dtype=np.float32)
+                scores[indices[0]] = ranked[0]
+        return {kid: float(score) for kid, score in zip(present, scores)}
+
+    def _search_concepts(self, vectors, k: int, non_empty: np.ndarray) -> List[List[Tuple[str, float]]]:
+        """
+        Busca em dois níveis (chamar com o lock adquirido): consulta ×
+        centróides, depois busca exata só nos membros dos CONCEPT_PROBES
+        conceitos mais próximos — só as linhas desses membros são lidas.
+
+        O lote inteiro é comparado de uma vez com a união dos candidatos;
+        cada consulta só enxerga os membros dos seus próprios conceitos.
+        """
+        probes = self.concepts.probe(vectors, CONCEPT_PROBES)
+        probes[~non_empty] = -1
+        candidates, labels = self.concepts.candidates(probes[non_empty].ravel())
+        if not len(candidates):
+            return [[] for _ in range(len(non_empty))]
+
+        queries, rows, scales = self._search_space(vectors, candidates)
+        scores = queries @ rows.T
+        scores = scores.toarray() if sp.issparse(scores) else np.asarray(scores, dtype=np.float32)
+        if scales is not None:
+            scores = scores * scales
+        allowed = (labels[None, None, :] == probes[:, :, None]).any(axis=1)
+        scores = np.where(allowed, scores, -np.inf)
+
+        top = min(len(candidates), k if self.full is None else max(k, EMBEDDINGS_RERANK))
+        order = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+        order = np.take_along_axis(order, np.argsort(-np.take_along_axis(scores, order, axis=1), axis=1), axis=1)
+        best = np.take_along_axis(scores, order, axis=1)
+        indices = np.where(np.isfinite(best), candidates[order], -1)
+        if self.full is not None:
+            indices, best = self._rerank(queries, indices, k)
+
+        return [[(self.ids[i], float(score)) for i, score in zip(row_idx[:k], row_scores[:k])
+                 if i >= 0 and self.ids[i] is not None]
+                for row_idx, row_scores in zip(indices, best)]
+
+    def _rerank(self, queries: np.ndarray, indices: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recalcula em float32 os scores dos candidatos e mantém os k melhores.
+        """
+        queries = normalize_rows(queries)
+        best_idx = np.full((len(queries), k), -1, dtype=np.int64)
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, (query, candidates) in enumerate(zip(queries, indices)):
+            candidates = candidates[candidates >= 0]
+            if not len(candidates):
+                continue
+            exact = self.full.read(candidates) @ query
+            order = np.argsort(-exact, kind="stable")[:k]
+            best_idx[q, :len(order)] = candidates[order]
+            best_scores[q, :len(order)] = exact[order]
+        return best_idx, best_scores
+
+    # =========================
+    # ARQUIVOS COMPARTILHADOS
+    # =========================
+    #
+    # {modality}.shared.json       → tipo, dtype, dimensão e geração atual
+    # {modality}.g{N}.{array}.mm   → arrays da geração N (np.memmap)
+    # {modality}.g{N}.ids.log      → publicações slot → id da geração N
+    # {modality}.g{N}.ids.json     → checkpoint do log (ids até um offset), gravado em save()
+    #
+    # Um único processo escritor (o learner); a linha é escrita no arquivo
+    # mapeado antes de ser publicada no log, então leitores nunca veem
+    # linhas incompletas. reset() inicia uma geração nova.
+
+    def _layout(self) -> Dict[str, Tuple[str, Tuple[int, ...]]]:
+        """
+        Arrays da matriz: nome do atributo → (dtype, formato da linha).
+        """
+        layout = {"vectors": (self.dtype, (self.dim,))}
+        if self.dtype == "int8":
+            layout["scales"] = ("float32", ())
+        return layout
+
+    def _shared_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{self.modality}.g{self.generation}.{name}")
+
+    def _read_shared_meta(self) -> Optional[dict]:
+        """
+        Metadados da geração atual (None se não houver arquivos compartilhados).
+        """
+        path = os.path.join(self.directory, f"{self.modality}.shared.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta if meta.get("kind") == self.kind else None
+
+    def _new_generation(self, dim: Optional[int]):
+        """
+        (Escritor) Inicia uma geração nova e vazia dos arquivos compartilhados.
+        Os arquivos das gerações anteriores são apagados — leitores que ainda
+        os mapeiam continuam válidos até trocarem de geração.
+        """
+        meta = self._read_shared_meta()
+        self.generation = max(self.generation, meta["generation"] if meta else 0) + 1
+        if self._log is not None:
+            self._log.close()
+        self._storage = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self._log = IdLog(self._shared_path("ids.log")) if dim is not None else None
+
+        path = os.path.join(self.directory, f"{self.modality}.shared.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"kind": self.kind, "dtype": self.dtype, "dim": dim, "generation": self.generation}, f)
+        os.replace(f"{path}.tmp", path)
+
+        current = f"{self.modality}.g{self.generation}."
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{self.modality}.g") and not name.startswith(current):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _array(self, name: str, rows: int) -> np.ndarray:
+        """
+        Aloca um array zerado do layout: em RAM ou, se compartilhada, em arquivo mapeado.
+        """
+        dtype, row_shape = self._layout()[name]
+        if not self.shared:
+            return np.zeros((rows, *row_shape), dtype=dtype)
+        storage = SharedArray(self._shared_path(f"{name}.mm"), dtype, row_shape, readonly=self.readonly)
+        self._storage[name] = storage
+        return storage.open(rows)
+
+    def _resize(self, name: str, array: np.ndarray, rows: int) -> np.ndarray:
+        """
+        Cresce um array para `rows` linhas preservando o conteúdo.
+        """
+        if name in self._storage:
+            return self._storage[name].resize(rows)
+        grown = np.zeros((rows, *array.shape[1:]), dtype=array.dtype)
+        grown[:array.shape[0]] = array
+        return grown
+
+    def _publish(self, slot: int, knowledge_id: Optional[str]):
+        """
+        Torna um slot (ou sua remoção) visível aos leitores.
+        """
+        if self._log is not None:
+            self._log.append(slot, knowledge_id)
+
+    def _apply_published(self, entries: List[Tuple[int, Optional[str]]]):
+        """
+        Aplica publicações do log ao mapeamento slot ↔ id.
+        """
+        for slot, knowledge_id in entries:
+            if slot >= len(self.ids):
+                self.ids.extend([None] * (slot + 1 - len(self.ids)))
+            previous = self.ids[slot]
+            if previous is not None and self.slots.get(previous) == slot:
+                del self.slots[previous]
+            self.ids[slot] = knowledge_id
+            if knowledge_id is not None:
+                self.slots[knowledge_id] = slot
+        self._mutations += 1
+
+    def _remap(self):
+        """
+        Reatribui os arrays mapeados (o escritor pode ter estendido os arquivos).
+        """
+        for name, storage in self._storage.items():
+            setattr(self, name, storage.refresh())
+        self.capacity = self.vectors.shape[0]
+
+    def _open_shared(self, meta: dict):
+        """
+        Mapeia os arrays da geração descrita em `meta` e reaplica o seu log.
+        """
+        if self._log is not None:
+            self._log.close()
+        self.generation = meta["generation"]
+        self.dim = meta["dim"]
+        self.dtype = meta["dtype"]
+        self.ids, self.slots = [], {}
+        self._storage, self._log = {}, None
+        if self.dim is None:
+            self._clear_arrays()
+            return
+
+        for name, (dtype, row_shape) in self._layout().items():
+            storage = SharedArray(self._shared_path(f"{name}.mm"), dtype, row_shape, readonly=self.readonly)
+            self._storage[name] = storage
+            setattr(self, name, storage.open())
+        self._log = IdLog(self._shared_path("ids.log"), readonly=self.readonly)
+        try:
+            # Checkpoint evita reaplicar o log inteiro: só a cauda após o offset
+            with open(self._shared_path("ids.json"), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            self.ids = checkpoint["ids"]
+            self.slots = {kid: slot for slot, kid in enumerate(self.ids) if kid is not None}
+            self._log.offset = checkpoint["offset"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+        self._apply_published(self._log.read_new())
+        self._remap()
+
+    def _save_shared(self):
+        """
+        (Escritor) Descarrega os arquivos mapeados e grava o checkpoint do log.
+        """
+        for storage in self._storage.values():
+            storage.flush()
+        if self._log is None:
+            return
+        path = self._shared_path("ids.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"offset": self._log.offset, "ids": self.ids}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _clear_arrays(self):
+        self.vectors = None
+        self.scales = None
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError(f"Matriz '{self.modality}' aberta somente leitura")
+
+    def refresh(self) -> bool:
+        """
+        (Leitores) Acompanha o escritor: troca de geração, crescimento dos
+        arquivos e linhas publicadas desde a última chamada.
+
+        Returns:
+            bool: True se a matriz mudou
+        """
+        meta = self._read_shared_meta()
+        with self._lock:
+            if meta is not None and (meta["generation"], meta["dim"]) != (self.generation, self.dim):
+                self._open_shared(meta)
+                return True
+            entries = self._log.read_new() if self._log is not None else []
+            if not entries:
+                return False
+            self._apply_published(entries)
+            self._remap()
+            return True
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def save(self, directory: str):
+        """
+        Salva a matriz (.npy, no dtype de armazenamento), as escalas (int8)
+        e o mapeamento de ids (.ids.json).
+
+        Compartilhada, a matriz já está nos arquivos mapeados: só descarrega
+        as páginas alteradas.
+        """
+        with self._lock:
+            if self.vectors is None:
+                return
+            if self.concepts is not None:
+                self._ensure_concepts()
+                self.concepts.save(os.path.join(directory, f"{self.modality}.concepts.npz"), self.ids)
+            if self.shared:
+                self._save_shared()
+                if self.full is not None:
+                    self.full.flush()
+                if self.index is not None:
+                    self.index.save(os.path.join(directory, f"{self.modality}.index"))
+                return
+            rows = len(self.ids)
+            vectors = self.vectors[:rows].copy()
+            scales = self.scales[:rows].copy() if self.scales is not None else None
+            ids = list(self.ids)
+            if self.full is not None:
+                self.full.flush()
+            if self.index is not None:
+                self.index.save(os.path.join(directory, f"{self.modality}.index"))
+
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.modality)
+        if scales is not None:
+            np.save(f"{base}.scales.tmp.npy", scales)
+            os.replace(f"{base}.scales.tmp.npy", f"{base}.scales.npy")
+        np.save(f"{base}.tmp.npy", vectors)
+        with open(f"{base}.ids.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        os.replace(f"{base}.tmp.npy", f"{base}.npy")
+        os.replace(f"{base}.ids.tmp.json", f"{base}.ids.json")
+
+    def load(self, directory: str) -> bool:
+        """
+        Carrega a matriz salva por save().
+
+        A matriz é mapeada em memória (copy-on-write): o carregamento não lê
+        as linhas, o SO as traz sob demanda. A primeira inserção que precisar
+        crescer a matriz a copia para a RAM.
+
+        Compartilhada, mapeia os arquivos da geração atual (leitura e escrita);
+        um .npy anterior é migrado para uma geração nova.
+
+        Returns:
+            bool: True se havia dados persistidos
+        """
+        base = os.path.join(directory, self.modality)
+        if self.shared and self._load_shared(base):
+            self._restore_concepts(base)
+            return True
+        if not (os.path.exists(f"{base}.npy") and os.path.exists(f"{base}.ids.json")):
+            return False
+
+        vectors = np.load(f"{base}.npy", mmap_mode="c")
+        with open(f"{base}.ids.json", "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        if len(ids) != vectors.shape[0]:
+            print(f"[Embeddings] Arquivos de '{self.modality}' inconsistentes, ignorando")
+            return False
+        scales = None
+        if vectors.dtype == np.int8:
+            if not os.path.exists(f"{base}.scales.npy"):
+                print(f"[Embeddings] Escalas de '{self.modality}' ausentes, ignorando")
+                return False
+            scales = np.load(f"{base}.scales.npy")
+
+        # Mesmo dtype e arquivo de re-ranking íntegro → carrega direto; senão requantiza
+        full_path = os.path.join(self.directory, f"{self.modality}.f32")
+        direct = not self.shared and vectors.dtype == np.dtype(self.dtype) and (
+            self.dtype == "float32"
+            or (os.path.exists(full_path) and os.path.getsize(full_path) >= vectors.size * 4)
+        )
+
+        with self._lock:
+            if direct:
+                self.capacity = len(ids)
+                self._allocate(vectors.shape[1], keep_full=True)
+                self.vectors = vectors
+                if scales is not None:
+                    self.scales = np.array(scales, dtype=np.float32)
+            else:
+                self.capacity = max(EMBEDDINGS_INITIAL_CAPACITY, len(ids))
+                self._allocate(vectors.shape[1])
+                print(f"[Embeddings] Convertendo '{self.modality}' de {vectors.dtype} para {self.dtype}")
+                restored = dequantize_rows(vectors, scales)
+                for slot in range(len(ids)):
+                    self._write_row(slot, restored[slot])
+            self.ids = ids
+            self.slots = {kid: slot for slot, kid in enumerate(ids) if kid is not None}
+            if self._log is not None:
+                self._log.extend([(slot, kid) for slot, kid in enumerate(ids) if kid is not None])
+            self.index = self._load_or_rebuild_index(f"{base}.index")
+        self._restore_concepts(base)
+        return True
+
+    def _load_shared(self, base: str) -> bool:
+        """
+        (Escritor) Reabre os arquivos compartilhados da geração atual.
+
+        Returns:
+            bool: True se havia uma geração compatível (mesmo dtype)
+        """
+        meta = self._read_shared_meta()
+        if meta is None or meta["dim"] is None:
+            return False
+        if meta["dtype"] != self.dtype:
+            print(f"[Embeddings] Arquivos compartilhados de '{self.modality}' em {meta['dtype']}, "
+                  f"configurado {self.dtype}: ignorando")
+            return False
+
+        with self._lock:
+            self._open_shared(meta)
+            if self.dtype != "float32":
+                self.full = FullPrecisionRows(os.path.join(self.directory, f"{self.modality}.f32"), self.dim)
+                if len(self.full) < len(self.ids):
+                    # Arquivo de re-ranking perdido: reconstrói a partir das linhas quantizadas
+                    rows = len(self.ids)
+                    scales = self.scales[:rows] if self.scales is not None else None
+                    restored = dequantize_rows(self.vectors[:rows], scales)
+                    for slot in range(rows):
+                        self.full.write(slot, restored[slot])
+            self.index = self._load_or_rebuild_index(f"{base}.index")
+        return True
+
+    def _raw_rows(self, slots: np.ndarray):
+        """
+        Linhas armazenadas (float32, sem ponderação) dos slots informados.
+        """
+        scales = self.scales[slots] if self.scales is not None else None
+        return dequantize_rows(self.vectors[slots], scales)
+
+    def _restore_concepts(self, base: str):
+        """
+        Marca os conceitos para restauração no primeiro uso (inserção, remoção,
+        busca acima de CONCEPT_SEARCH_MIN_ITEMS ou resumo): o carregamento não
+        lê nada além das linhas.
+        """
+        if self.concepts is not None:
+            with self._lock:
+                self._concepts_base = base
+
+    def _ensure_concepts(self):
+        """
+        Refaz os conceitos pendentes: centróides e atribuições salvos; só as
+        linhas fora do arquivo (ou todas, se ele não existir e os centróides
+        forem treinados sobre uma amostra) são atribuídas, em blocos.
+        """
+        if self._concepts_base is None:
+            return
+        with self._lock:
+            base, self._concepts_base = self._concepts_base, None
+            if base is None or not self.slots:
+                return
+            alive = np.array(sorted(self.slots.values()), dtype=np.int64)
+            concepts = self.concepts
+            loaded = concepts.load(f"{base}.concepts.npz", self.slots) and concepts.centroids.shape[1] == self.dim
+            if not loaded:
+                concepts.reset()
+                sample_size = 8 * concepts.n_concepts
+                if len(alive) < sample_size:
+                    for i in range(len(alive)):
+                        concepts.add(int(alive[i]), self._raw_rows(alive[i:i + 1]))
+                    return
+                sample = np.sort(np.random.default_rng(concepts.seed).choice(alive, sample_size, replace=False))
+                concepts.train(sample.tolist(), self._raw_rows(sample))
+            else:
+                alive = alive[[slot not in concepts.assignment for slot in alive.tolist()]]
+            for start in range(0, len(alive), EMBEDDINGS_INITIAL_CAPACITY):
+                part = alive[start:start + EMBEDDINGS_INITIAL_CAPACITY]
+                concepts.assign(part.tolist(), self._raw_rows(part))
+
+    def concept_summaries(self, limit: int = 20) -> List[dict]:
+        """
+        Resumo dos conceitos: nº de membros, coesão (similaridade média com o
+        centróide) e o membro mais central de cada um, do maior para o menor.
+
+        Leitores (sem conceitos próprios) usam os centróides salvos pelo escritor.
+        """
+        if self.readonly:
+            self.refresh()
+        self._ensure_concepts()
+        concepts = self.concepts
+        if concepts is None or not concepts.trained:
+            concepts = ConceptIndex(sparse=self.kind == "sparse")
+            if not concepts.load(os.path.join(self.directory, f"{self.modality}.concepts.npz")):
+                return []
+
+        with self._lock:
+            if not self.slots or concepts.centroids.shape[1] != self.dim:
+                return []
+            alive = np.array(sorted(self.slots.values()), dtype=np.int64)
+            k = concepts.centroids.shape[0]
+            sizes = np.zeros(k, dtype=np.int64)
+            totals = np.zeros(k)
+            best_scores = np.full(k, -np.inf)
+            best_slots = np.full(k, -1, dtype=np.int64)
+            for start in range(0, len(alive), EMBEDDINGS_INITIAL_CAPACITY):
+                part = alive[start:start + EMBEDDINGS_INITIAL_CAPACITY]
+                sims = concepts.similarities(self._raw_rows(part))
+                labels = np.argmax(sims, axis=1)
+                scores = sims[np.arange(len(part)), labels]
+                sizes += np.bincount(labels, minlength=k)
+                totals += np.bincount(labels, weights=scores, minlength=k)
+                for c in np.unique(labels):
+                    members = np.flatnonzero(labels == c)
+                    j = members[np.argmax(scores[members])]
+                    if scores[j] > best_scores[c]:
+                        best_scores[c], best_slots[c] = scores[j], part[j]
+            summaries = [{"concept": int(c), "size": int(sizes[c]),
+                          "cohesion": float(totals[c] / sizes[c]), "representative": self.ids[best_slots[c]]}
+                         for c in np.argsort(-sizes) if sizes[c] > 0]
+        return summaries[:limit]
+
+    def _load_or_rebuild_index(self, path: str):
+        """
+        Carrega o índice salvo ou o reconstrói a partir das linhas da matriz.
+        """
+        if MEMORY_INDEX_BACKEND == "exact":
+            return None
+        if os.path.exists(f"{path}.json"):
+            index = load_index(path, self._raw_rows)
+            if index.backend == MEMORY_INDEX_BACKEND and index.slots == self.slots:
+                return index
+        index = self._new_index()
+        for knowledge_id, slot in self.slots.items():
+            index.add(knowledge_id, slot, self._raw_rows(np.array([slot]))[0])
+        return index
+
+# =========================
+# CLASSE SPARSE EMBEDDING MATRIX
+# =========================
+
+def _inverse_weighted_norms(matrix: sp.csr_matrix, weights: Optional[np.ndarray]) -> np.ndarray:
+    """
+    1 / |W·linha| de cada linha CSR, com pesos alinhados a matrix.data
+    (None = sem ponderação); linhas nulas ficam com 0.
+    """
+    counts = np.diff(matrix.indptr)
+    weighted = matrix.data.astype(np.float64) * (weights if weights is not None else 1.0)
+    norms = np.sqrt(np.bincount(np.repeat(np.arange(len(counts)), counts), weights=weighted ** 2,
+                                minlength=len(counts)))
+    return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms != 0)
+
+class SparseEmbeddingMatrix(EmbeddingMatrix):
+    """
+    Matriz de embeddings esparsos (CSR) normalizados, para textos.
+
+    Os arrays data/indices/indptr crescem em dobro como a matriz densa; a
+    busca monta uma csr_matrix sobre eles sem copiar e faz um único produto
+    esparso × esparso. Substituir um embedding cria um slot novo e deixa o
+    antigo como tombstone (o nº de não nulos de cada linha é variável).
+    A busca é sempre exata (MEMORY_INDEX_BACKEND vale só para matrizes densas).
+
+    Com `weights` (ex: IDF), a busca é o coseno ponderado
+    (q·W²·r) / (|Wq|·|Wr|): os pesos entram só na consulta (O(nnz) dela) e as
+    linhas armazenadas, sem ponderação, são usadas como estão. As normas
+    ponderadas |Wr| ficam num array em RAM (4 bytes por linha), calculadas
+    para as linhas novas e recalculadas por inteiro só quando a versão dos
+    pesos varia mais que IDF_NORMS_REFRESH — nunca uma cópia ponderada da matriz.
+
+    Compartilhada, data/indices/indptr são três arquivos mapeados; as linhas
+    substituídas ficam como tombstones no arquivo (não há compactação).
+    """
+    kind = "sparse"
+
+    def __init__(self, modality: str, capacity: int = EMBEDDINGS_INITIAL_CAPACITY,
+                 weights: Optional[Callable[[np.ndarray], Optional[np.ndarray]]] = None,
+                 weights_version: Optional[Callable[[], int]] = None,
+                 directory: str = EMBEDDINGS_DIR, shared: bool = EMBEDDINGS_SHARED,
+                 readonly: bool = False, indexed: bool = True):
+        """
+        Args:
+            modality (str): Modalidade dos conhecimentos
+            capacity (int): Linhas pré-alocadas
+            weights (callable, opcional): dimensões → pesos (None = sem ponderação)
+            weights_version (callable, opcional): Versão dos pesos (nº de documentos
+                do IDF); decide quando as normas ponderadas são recalculadas
+            directory, shared, readonly, indexed: Como em EmbeddingMatrix
+        """
+        super().__init__(modality, capacity, dtype="float32", directory=directory,
+                         shared=shared, readonly=readonly, indexed=indexed)
+        self.data = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.weights = weights
+        self.weights_version = weights_version or (lambda: 0)
+        self._inverse_norms = np.zeros(0, dtype=np.float32)  # 1 / |Wr| das primeiras linhas
+        self._norms_version: Optional[int] = None            # Versão dos pesos do último recálculo
+
+    def _new_index(self):
+        return None
+
+    @staticmethod
+    def _as_batch(vectors):
+        return sp.csr_matrix(vectors, dtype=np.float32)
+
+    def _rows(self):
+        rows = len(self.ids)
+        nnz = int(self.indptr[rows])
+        return sp.csr_matrix((self.data[:nnz], self.indices[:nnz], self.indptr[:rows + 1]),
+                             shape=(rows, self.dim))
+
+    def _forget_norms(self):
+        """
+        Descarta as normas ponderadas (as linhas foram trocadas por inteiro).
+        """
+        self._inverse_norms = np.zeros(0, dtype=np.float32)
+        self._norms_version = None
+
+    def _row_inverse_norms(self) -> np.ndarray:
+        """
+        1 / |Wr| de cada linha ocupada (chamar com o lock adquirido).
+
+        Só as linhas adicionadas desde a última busca são calculadas; todas
+        são recalculadas, em O(nnz) sem copiar a matriz, quando a versão dos
+        pesos se afasta mais que IDF_NORMS_REFRESH da usada no último recálculo.
+        Tombstones têm os valores zerados e pontuam 0 com qualquer norma.
+        """
+        rows = len(self.ids)
+        version = self.weights_version()
+        start = len(self._inverse_norms)
+        if (self._norms_version is None or start > rows
+                or abs(version - self._norms_version) > IDF_NORMS_REFRESH * self._norms_version):
+            start, self._norms_version = 0, version
+        if start < rows:
+            pending = self._take_rows(np.arange(start, rows))
+            inverse = _inverse_weighted_norms(pending, self.weights(pending.indices))
+            self._inverse_norms = np.concatenate([self._inverse_norms[:start], inverse.astype(np.float32)])
+        return self._inverse_norms[:rows]
+
+    def _take_rows(self, slots: np.ndarray) -> sp.csr_matrix:
+        """
+        Linhas dos slots informados, lidas direto dos arrays CSR: O(nnz delas),
+        sem montar a matriz inteira.
+        """
+        starts = self.indptr[slots].astype(np.int64)
+        counts = self.indptr[slots + 1] - starts
+        indptr = np.zeros(len(slots) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], counts) + np.arange(indptr[-1])
+        return sp.csr_matrix((self.data[positions], self.indices[positions], indptr),
+                             shape=(len(slots), self.dim))
+
+    def _search_space(self, vectors, slots: Optional[np.ndarray] = None):
+        queries = normalize_rows(vectors)
+        rows = self._rows() if slots is None else self._take_rows(slots)
+        w = self.weights(queries.indices) if self.weights is not None else None
+        if w is None:
+            return queries, rows, None
+
+        # Coseno ponderado: consulta × W² / |Wq| contra as linhas cruas, × 1/|Wr| por linha
+        inverse = _inverse_weighted_norms(queries, w)
+        queries.data = (queries.data * w * w * np.repeat(inverse, np.diff(queries.indptr))).astype(np.float32)
+        if slots is None:
+            return queries, rows, self._row_inverse_norms()
+        # Só os candidatos: normas exatas com os pesos atuais, O(nnz deles)
+        return queries, rows, _inverse_weighted_norms(rows, self.weights(rows.indices)).astype(np.float32)
+
+    def _layout(self) -> Dict[str, Tuple[str, Tuple[int, ...]]]:
+        return {"data": ("float32", ()), "indices": ("int32", ()), "indptr": ("int64", ())}
+
+    def _remap(self):
+        for name, storage in self._storage.items():
+            setattr(self, name, storage.refresh())
+        self.capacity = self.indptr.shape[0] - 1
+
+    def _open_shared(self, meta: dict):
+        super()._open_shared(meta)
+        self._forget_norms()
+
+    def _clear_arrays(self):
+        self.data = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+
+    def _reserve(self, rows: int, nnz: int):
+        """
+        Garante espaço para `rows` linhas e `nnz` não nulos (capacidade dobra).
+        """
+        if rows + 1 > self.indptr.shape[0]:
+            self.indptr = self._resize("indptr", self.indptr, max(rows + 1, 2 * self.indptr.shape[0]))
+        if nnz > self.data.shape[0]:
+            size = max(nnz, 2 * self.data.shape[0])
+            self.data = self._resize("data", self.data, size)
+            self.indices = self._resize("indices", self.indices, size)
+
+    def add(self, knowledge_id: str, vector):
+        """
+        Adiciona (ou substitui) o embedding esparso de um conhecimento.
+        """
+        vector = normalize_rows(sp.csr_matrix(vector, dtype=np.float32))
+        if vector.shape[0] != 1:
+            raise ValueError(f"Esperado um vetor (1, d), recebido {vector.shape}")
+        vector.sort_indices()
+
+        self._check_writable()
+        with self._lock:
+            if self.dim is None:
+                self.dim = vector.shape[1]
+                if self.shared:
+                    self._new_generation(self.dim)
+                self.indptr = self._array("indptr", self.capacity + 1)
+                self.data = self._array("data", 0)
+                self.indices = self._array("indices", 0)
+            elif vector.shape[1] != self.dim:
+                raise ValueError(
+                    f"Dimensão {vector.shape[1]} incompatível com a matriz '{self.modality}' ({self.dim})"
+                )
+
+            old_slot = self.slots.get(knowledge_id)
+            if old_slot is not None:
+                self._clear_slot(old_slot)
+
+            slot = len(self.ids)
+            start = int(self.indptr[slot])
+            end = start + vector.nnz
+            self._reserve(slot + 1, end)
+            self.data[start:end] = vector.data
+            self.indices[start:end] = vector.indices
+            self.indptr[slot + 1] = end
+            self.ids.append(knowledge_id)
+            self.slots[knowledge_id] = slot
+            self.capacity = self.indptr.shape[0] - 1
+            self._mutations += 1
+            self._publish(slot, knowledge_id)
+            if old_slot is not None:
+                self._publish(old_slot, None)
+            if self.concepts is not None:
+                self._ensure_concepts()
+                if old_slot is not None:
+                    self.concepts.remove(old_slot)
+                self._add_to_concepts(slot, vector)
+
+    def _clear_slot(self, slot: int):
+        """
+        Tombstone: zera os valores da linha (a estrutura CSR é mantida).
+        """
+        self.data[self.indptr[slot]:self.indptr[slot + 1]] = 0.0
+        self.ids[slot] = None
+        self._mutations += 1
+
+    def remove(self, knowledge_id: str):
+        """
+        Remove o embedding de um conhecimento (tombstone).
+        """
+        self._check_writable()
+        with self._lock:
+            slot = self.slots.pop(knowledge_id, None)
+            if slot is not None:
+                self._clear_slot(slot)
+                self._publish(slot, None)
+                if self.concepts is not None:
+                    self._ensure_concepts()
+                    self.concepts.remove(slot)
+
+    def reset(self):
+        self._check_writable()
+        with self._lock:
+            self.dim = None
+            self.ids = []
+            self.slots = {}
+            self.data = np.zeros(0, dtype=np.float32)
+            self.indices = np.zeros(0, dtype=np.int32)
+            self.indptr = np.zeros(1, dtype=np.int64)
+            self._forget_norms()
+            self._mutations += 1
+            if self.concepts is not None:
+                self.concepts.reset()
+                self._concepts_base = None
+            if self.shared:
+                self._new_generation(None)
+
+    def vector(self, knowledge_id: str) -> Optional[sp.csr_matrix]:
+        with self._lock:
+            slot = self.slots.get(knowledge_id)
+            if slot is None:
+                return None
+            start, end = int(self.indptr[slot]), int(self.indptr[slot + 1])
+            return sp.csr_matrix((self.data[start:end].copy(), self.indices[start:end].copy(),
+                                  np.array([0, end - start])), shape=(1, self.dim))
+
+    def _raw_rows(self, slots: np.ndarray):
+        return self._take_rows(np.asarray(slots))
+
+    def row_nbytes(self, knowledge_id: str) -> int:
+        slot = self.slots.get(knowledge_id)
+        if slot is None:
+            return 0
+        return 8 * int(self.indptr[slot + 1] - self.indptr[slot])  # float32 + int32 por não nulo
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def save(self, directory: str):
+        """
+        Salva a matriz em formato esparso — arrays CSR em .npy (data, indices,
+        indptr) + dimensão em .csr.json — e o mapeamento de ids (.ids.json).
+
+        Tombstones são descartados na gravação (a matriz salva é compacta).
+        Compartilhada, só descarrega as páginas alteradas dos arquivos mapeados.
+        """
+        with self._lock:
+            if self.dim is None:
+                return
+            if self.concepts is not None:
+                self._ensure_concepts()
+                self.concepts.save(os.path.join(directory, f"{self.modality}.concepts.npz"), self.ids)
+            if self.shared:
+                self._save_shared()
+                return
+            alive = [slot for slot, kid in enumerate(self.ids) if kid is not None]
+            matrix = self._rows()[alive]
+            ids = [self.ids[slot] for slot in alive]
+
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.modality)
+        for name in ("data", "indices", "indptr"):
+            np.save(f"{base}.csr.{name}.tmp.npy", getattr(matrix, name))
+            os.replace(f"{base}.csr.{name}.tmp.npy", f"{base}.csr.{name}.npy")
+        with open(f"{base}.csr.tmp.json", "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "rows": len(ids)}, f)
+        with open(f"{base}.ids.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        os.replace(f"{base}.csr.tmp.json", f"{base}.csr.json")
+        os.replace(f"{base}.ids.tmp.json", f"{base}.ids.json")
+
+    def load(self, directory: str) -> bool:
+        """
+        Carrega a matriz salva por save(), mapeando os arrays CSR em memória
+        (copy-on-write, como a matriz densa). Compartilhada, como na densa.
+
+        Returns:
+            bool: True se havia dados persistidos
+        """
+        base = os.path.join(directory, self.modality)
+        if self.shared:
+            meta = self._read_shared_meta()
+            if meta is not None and meta["dim"] is not None:
+                with self._lock:
+                    self._open_shared(meta)
+                self._restore_concepts(base)
+                return True
+        if not (os.path.exists(f"{base}.csr.json") and os.path.exists(f"{base}.ids.json")):
+            return False
+
+        with open(f"{base}.csr.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(f"{base}.ids.json", "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        arrays = {name: np.load(f"{base}.csr.{name}.npy", mmap_mode="c")
+                  for name in ("data", "indices", "indptr")}
+        if len(ids) != meta["rows"] or arrays["indptr"].shape[0] != len(ids) + 1:
+            print(f"[Embeddings] Arquivos de '{self.modality}' inconsistentes, ignorando")
+            return False
+
+        with self._lock:
+            self.dim = meta["dim"]
+            self.capacity = len(ids)
+            if self.shared:
+                # Migração do formato .npy para arquivos compartilhados
+                self._new_generation(self.dim)
+                for name, array in arrays.items():
+                    setattr(self, name, self._array(name, array.shape[0]))
+                    getattr(self, name)[:array.shape[0]] = array
+            else:
+                self.indptr = arrays["indptr"].astype(np.int64, copy=False)
+                self.data = arrays["data"].astype(np.float32, copy=False)
+                self.indices = arrays["indices"].astype(np.int32, copy=False)
+            self.ids = ids
+            self.slots = {kid: slot for slot, kid in enumerate(ids)}
+            if self._log is not None:
+                self._log.extend(list(enumerate(ids)))
+            self._forget_norms()
+            self._mutations += 1
+        self._restore_concepts(base)
+        return True
+
+def stack_vectors(vectors: list):
+    """
+    Empilha embeddings de uma modalidade em um lote (CSR se forem esparsos).
+    """
+    if any(sp.issparse(v) for v in vectors):
+        return sp.vstack(vectors, format="csr")
+    return np.vstack(vectors)
+
+def open_shared_embeddings(directory: str = EMBEDDINGS_DIR) -> Dict[str, EmbeddingMatrix]:
+    """
+    Abre as matrizes do learner somente leitura, para outros processos
+    (viewer web, jobs em lote): os arquivos são mapeados sem cópia e cada
+    busca acompanha as linhas publicadas desde a anterior.
+
+    O IDF das consultas de texto é o do processo leitor
+    (load_vectorizer_state() carrega o último salvo pelo learner).
+    """
+    return {
+        "text": SparseEmbeddingMatrix("text", weights=idf_weights, weights_version=idf_version,
+                                      directory=directory, readonly=True),
+        "vision": EmbeddingMatrix("vision", directory=directory, readonly=True),
+    }
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+EMBEDDINGS: Dict[str, EmbeddingMatrix] = {
+    "text": SparseEmbeddingMatrix("text", weights=idf_weights, weights_version=idf_version),
+    "vision": EmbeddingMatrix("vision"),
+}
+
+# Nível frio: arquivos mapeados (o SO decide o que fica residente), busca exata
+COLD_EMBEDDINGS: Dict[str, EmbeddingMatrix] = {
+    "text": SparseEmbeddingMatrix("text", weights=idf_weights, weights_version=idf_version,
+                                  directory=MEMORY_COLD_DIR, shared=True, indexed=False),
+    "vision": EmbeddingMatrix("vision", directory=MEMORY_COLD_DIR, shared=True, indexed=False),
+}
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def embed_item(item: dict) -> Optional[np.ndarray]:
+    """
+    Calcula o embedding de um conhecimento conforme sua modalidade.
+
+    Returns:
+        np.ndarray | sp.csr_matrix: Vetor do conhecimento (CSR para textos), ou None
+    """
+    content = memory_store.load_body(item)  # Corpo pode estar só em disco (carregamento lazy)
+    if content is None:
+        return None
+
+    if item.get("type") == "text":
+        return vectorize_text(content)
+    if item.get("type") == "vision":
+        array = np.asarray(content)
+        # Frames já vetorizados (ex: VideoStream) são usados diretamente
+        if array.ndim == 1:
+            return array.astype(np.float32)
+        return vectorize_image(array.astype(np.uint8))
+    return None
+
+def index_knowledge(item: dict, vector: Optional[np.ndarray] = None):
+    """
+    Vetoriza um conhecimento e o adiciona à matriz da sua modalidade.
+
+    Args:
+        item (dict): Conhecimento
+        vector (np.ndarray, opcional): Embedding já calculado (evita revetorizar)
+    """
+    matrix = EMBEDDINGS.get(item.get("type"))
+    if matrix is None:
+        return
+    if vector is None:
+        try:
+            vector = embed_item(item)
+        except ValueError as e:
+            print(f"[Embeddings] Conhecimento {item['id']} não vetorizado: {e}")
+            return
+    if vector is not None:
+        if item["type"] == "text" and item["id"] not in matrix:
+            observe_text_vector(vector)  # Novo documento → atualiza o IDF das consultas
+        matrix.add(item["id"], vector)
+
+def dedupe_batch(modality: str, vectors: np.ndarray, threshold: float) -> List[Tuple[str, object, float]]:
+    """
+    Classifica um micro-lote de inputs de uma modalidade em uma única passada:
+    uma busca top-1 em lote contra a memória e uma matriz de similaridade
+    intra-lote (inputs repetidos dentro do próprio lote).
+
+    Args:
+        modality (str): 'text' ou 'vision'
+        vectors (np.ndarray | sp.csr_matrix): Embeddings do lote (q, d)
+        threshold (float): Similaridade mínima para considerar duplicado
+
+    Returns:
+        List[(str, object, float)]: Para cada input, um de:
+            ("memory", knowledge_id, sim) → já existe na memória
+            ("cold", knowledge_id, sim)   → existe no nível frio (promover: memory.tiers.promote)
+            ("batch", j, sim)             → repete o input j (anterior) do lote
+            ("new", None, sim)            → conhecimento novo
+    """
+    matrix = EMBEDDINGS[modality]
+    vectors = matrix._as_batch(vectors)
+    memory_hits = matrix.search_batch(vectors, k=1)
+
+    # Caminho lento: só as consultas sem acerto na memória quente vão ao nível frio
+    cold_hits = {}
+    cold = COLD_EMBEDDINGS.get(modality)
+    misses = [i for i, hits in enumerate(memory_hits) if not hits or hits[0][1] < threshold]
+    if cold is not None and len(cold) and misses:
+        for i, hits in zip(misses, cold.search_batch(vectors[misses], k=1)):
+            if hits and hits[0][1] >= threshold:
+                cold_hits[i] = hits[0]
+
+    normalized = normalize_rows(vectors)
+    intra = normalized @ normalized.T
+    if sp.issparse(intra):
+        intra = intra.toarray()  # (q, q): pequeno, o lote é um micro-lote
+
+    verdicts = []
+    leaders: List[int] = []  # Inputs do lote que serão aprendidos
+    for i, hits in enumerate(memory_hits):
+        if hits and hits[0][1] >= threshold:
+            verdicts.append(("memory", hits[0][0], hits[0][1]))
+            continue
+        if i in cold_hits:
+            verdicts.append(("cold", cold_hits[i][0], cold_hits[i][1]))
+            continue
+        best_sim = hits[0][1] if hits else 0.0
+        if leaders:
+            sims = intra[i, leaders]
+            j = int(np.argmax(sims))
+            if sims[j] >= threshold:
+                verdicts.append(("batch", leaders[j], float(sims[j])))
+                continue
+        leaders.append(i)
+        verdicts.append(("new", None, best_sim))
+    return verdicts
+
+def sync_embeddings(store: list):
+    """
+    Garante que as matrizes reflitam a memória: vetoriza itens sem embedding
+    e remove embeddings de itens que não existem mais.
+
+    Args:
+        store (list): Snapshot da memória (memory_store.snapshot())
+    """
+    known = {item["id"] for item in store}
+    for matrix in EMBEDDINGS.values():
+        for knowledge_id in [kid for kid in matrix.slots if kid not in known]:
+            matrix.remove(knowledge_id)
+
+    missing = [item for item in store
+               if item.get("type") in EMBEDDINGS and item["id"] not in EMBEDDINGS[item["type"]]]
+    for item in missing:
+        index_knowledge(item)
+    if missing:
+        print(f"[Embeddings] {len(missing)} conhecimentos vetorizados na sincronização")
+
+def save_embeddings():
+    """
+    Persiste todas as matrizes em EMBEDDINGS_DIR (e o estado do vetorizador).
+    """
+    for matrix in EMBEDDINGS.values():
+        matrix.save(EMBEDDINGS_DIR)
+    for matrix in COLD_EMBEDDINGS.values():
+        matrix.save(MEMORY_COLD_DIR)
+    save_vectorizer_state()
+
+def load_embeddings():
+    """
+    Carrega as matrizes persistidas em EMBEDDINGS_DIR (e o estado do vetorizador).
+    """
+    for matrix in EMBEDDINGS.values():
+        if matrix.load(EMBEDDINGS_DIR):
+            print(f"[Embeddings] Matriz '{matrix.modality}' carregada com {len(matrix)} vetores")
+    for matrix in COLD_EMBEDDINGS.values():
+        if matrix.load(MEMORY_COLD_DIR):
+            print(f"[Embeddings] Matriz fria '{matrix.modality}' carregada com {len(matrix)} vetores")
+
+    # O IDF incremental só vale junto com a matriz de texto que o gerou;
+    # sem ela, a sincronização o recalcula
+    text = EMBEDDINGS["text"]
+    load_vectorizer_state(idf=text.dim is not None)
+
+    # Matriz de texto salva em outro modo do vetorizador → revetoriza na sincronização
+    if text.dim is not None and text.dim != text_dimension():
+        print("[Embeddings] Dimensão do texto mudou (VECTORIZER_MODE), descartando matriz de texto")
+        text.reset()
+        reset_idf()
+    cold_text = COLD_EMBEDDINGS["text"]
+    if cold_text.dim is not None and cold_text.dim != text_dimension():
+        print("[Embeddings] Descartando matriz fria de texto (itens frios revetorizados ao serem promovidos)")
+        cold_text.reset()
+
+# Embeddings são persistidos junto com cada snapshot da memória
+memory_store.add_compaction_hook(save_embeddings)
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    matrix = EmbeddingMatrix("vision", capacity=2, shared=False)
+    for i in range(5):
+        matrix.add(f"item{i}", np.random.rand(16))
+
+    target = np.random.rand(16)
+    sim, knowledge_id = matrix.search(target)
+    print(f"[Embeddings] Mais similar: {knowledge_id} com similaridade {sim:.3f}")
+
+    matrix.remove(knowledge_id)
+    print(f"[Embeddings] Após remover: {matrix.search(target)}")
@@ -0,0 +1,336 @@
+"""
+NE-AI V1 — Fingerprint
+=======================
+
+Fingerprints perceptuais de imagens/frames para detectar telas já vistas:
+
+- dHash (gradiente horizontal) ou pHash (DCT), com 64 ou 256 bits
+- Distância de Hamming entre fingerprints ≈ diferença visual
+- HammingIndex: multi-index hashing — o código é dividido em substrings e
+  cada substring tem sua tabela hash. Pelo princípio da casa dos pombos,
+  um código a distância ≤ r tem ao menos uma substring a distância ≤ r // m
+  da consulta; só esses candidatos são verificados (popcount vetorizado).
+  A consulta custa microssegundos mesmo com milhões de frames.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import itertools
+import json
+import os
+import threading
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from memory.store import memory_store
+from core.config import (
+    FINGERPRINTS_DIR,
+    FINGERPRINT_METHOD,
+    FINGERPRINT_BITS,
+    FINGERPRINT_MAX_DISTANCE,
+    FINGERPRINT_INDEX_CHUNKS,
+)
+
+# Popcount de cada byte (numpy 1.x não tem bitwise_count)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# =========================
+# FUNÇÕES DE HASH
+# =========================
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    image = np.asarray(image)
+    if image.ndim == 3:
+        return cv2.cvtColor(image.astype(np.uint8), cv2.COLOR_BGR2GRAY)
+    return image.astype(np.uint8)
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def dhash(image: np.ndarray, bits: int = FINGERPRINT_BITS) -> int:
+    """
+    Difference hash: cada bit indica se um pixel é mais claro que o vizinho à direita.
+
+    Args:
+        image (np.ndarray): Imagem BGR ou em tons de cinza
+        bits (int): 64 ou 256
+
+    Returns:
+        int: Fingerprint com `bits` bits
+    """
+    side = int(np.sqrt(bits))
+    small = cv2.resize(_gray(image), (side + 1, side), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+def phash(image: np.ndarray, bits: int = FINGERPRINT_BITS) -> int:
+    """
+    Perceptual hash: sinais das frequências baixas da DCT em relação à mediana.
+
+    Args:
+        image (np.ndarray): Imagem BGR ou em tons de cinza
+        bits (int): 64 ou 256
+
+    Returns:
+        int: Fingerprint com `bits` bits
+    """
+    side = int(np.sqrt(bits))
+    small = cv2.resize(_gray(image), (side * 4, side * 4), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small.astype(np.float32))[:side, :side]
+    return _bits_to_int(low > np.median(low))
+
+def fingerprint(image: np.ndarray) -> int:
+    """
+    Fingerprint de uma imagem conforme FINGERPRINT_METHOD ('dhash' ou 'phash').
+    """
+    if FINGERPRINT_METHOD == "phash":
+        return phash(image)
+    return dhash(image)
+
+def hamming(a: int, b: int) -> int:
+    """
+    Distância de Hamming entre dois fingerprints.
+    """
+    return bin(a ^ b).count("1")
+
+def to_hex(code: int) -> str:
+    """
+    Representação textual (registros da memória, JSON).
+    """
+    return f"{code:0{FINGERPRINT_BITS // 4}x}"
+
+def from_hex(text: str) -> int:
+    return int(text, 16)
+
+def is_image(data) -> bool:
+    """
+    Indica se o dado é uma imagem (e não um vetor já calculado).
+    """
+    return isinstance(data, np.ndarray) and data.ndim in (2, 3)
+
+# =========================
+# CLASSE HAMMING INDEX
+# =========================
+
+class HammingIndex:
+    """
+    Índice multi-substring para busca por distância de Hamming.
+    """
+    def __init__(self, bits: int = FINGERPRINT_BITS, chunks: int = FINGERPRINT_INDEX_CHUNKS,
+                 capacity: int = 1024):
+        """
+        Args:
+            bits (int): Tamanho dos fingerprints
+            chunks (int): Nº de substrings (tabelas)
+            capacity (int): Códigos pré-alocados (cresce em dobro)
+        """
+        self.bits = bits
+        self.chunks = chunks
+        self.words = (bits + 63) // 64
+        # Limites (offset, largura) de cada substring; a última absorve o resto
+        width = bits // chunks
+        self.bounds = [(i * width, width if i < chunks - 1 else bits - i * width) for i in range(chunks)]
+
+        self.codes = np.zeros((capacity, self.words), dtype=np.uint64)
+        self.ids: List[Optional[str]] = []
+        self.slots: Dict[str, int] = {}
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, knowledge_id: str) -> bool:
+        return knowledge_id in self.slots
+
+    def _substrings(self, code: int) -> List[int]:
+        return [(code >> offset) & ((1 << width) - 1) for offset, width in self.bounds]
+
+    def _words(self, code: int) -> np.ndarray:
+        return np.array([(code >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(self.words)], dtype=np.uint64)
+
+    def add(self, knowledge_id: str, code: int):
+        """
+        Adiciona (ou substitui) o fingerprint de um conhecimento.
+        """
+        with self._lock:
+            if knowledge_id in self.slots:
+                self._remove(knowledge_id)
+            slot = len(self.ids)
+            if slot >= self.codes.shape[0]:
+                grown = np.zeros((self.codes.shape[0] * 2, self.words), dtype=np.uint64)
+                grown[:slot] = self.codes[:slot]
+                self.codes = grown
+            self.codes[slot] = self._words(code)
+            self.ids.append(knowledge_id)
+            self.slots[knowledge_id] = slot
+            for table, sub in zip(self.tables, self._substrings(code)):
+                table.setdefault(sub, []).append(slot)
+
+    def _remove(self, knowledge_id: str):
+        slot = self.slots.pop(knowledge_id)
+        code = sum(int(w) << (64 * i) for i, w in enumerate(self.codes[slot]))
+        for table, sub in zip(self.tables, self._substrings(code)):
+            bucket = table[sub]
+            bucket.remove(slot)
+            if not bucket:
+                del table[sub]
+        self.ids[slot] = None
+
+    def remove(self, knowledge_id: str):
+        """
+        Remove o fingerprint de um conhecimento.
+        """
+        with self._lock:
+            if knowledge_id in self.slots:
+                self._remove(knowledge_id)
+
+    def _probes(self, sub: int, width: int, radius: int):
+        """
+        Valores a distância ≤ radius de uma substring.
+        """
+        yield sub
+        for r in range(1, radius + 1):
+            for positions in itertools.combinations(range(width), r):
+                flipped = sub
+                for p in positions:
+                    flipped ^= 1 << p
+                yield flipped
+
+    def search(self, code: int, max_distance: int = FINGERPRINT_MAX_DISTANCE) -> Optional[Tuple[str, int]]:
+        """
+        Busca o fingerprint mais próximo a distância ≤ max_distance.
+
+        Returns:
+            (str, int): Id do conhecimento e distância, ou None se não houver
+        """
+        radius = max_distance // self.chunks
+        with self._lock:
+            candidates = set()
+            for table, sub, (_, width) in zip(self.tables, self._substrings(code), self.bounds):
+                for probe in self._probes(sub, width, radius):
+                    bucket = table.get(probe)
+                    if bucket:
+                        candidates.update(bucket)
+            if not candidates:
+                return None
+
+            slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            xor = np.bitwise_xor(self.codes[slots], self._words(code))
+            distances = _POPCOUNT[xor.view(np.uint8)].reshape(len(slots), -1).sum(axis=1)
+            best = int(np.argmin(distances))
+            if distances[best] > max_distance:
+                return None
+            return self.ids[slots[best]], int(distances[best])
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def save(self, directory: str):
+        """
+        Salva os códigos (.npy) e os ids (.ids.json); as tabelas são reconstruídas no load.
+        """
+        with self._lock:
+            alive = [slot for slot, kid in enumerate(self.ids) if kid is not None]
+            codes = self.codes[alive].copy()
+            ids = [self.ids[slot] for slot in alive]
+
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"fingerprints-{self.bits}")
+        np.save(f"{base}.tmp.npy", codes)
+        with open(f"{base}.ids.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        os.replace(f"{base}.tmp.npy", f"{base}.npy")
+        os.replace(f"{base}.ids.tmp.json", f"{base}.ids.json")
+
+    def load(self, directory: str) -> bool:
+        """
+        Carrega os fingerprints salvos por save().
+
+        Returns:
+            bool: True se havia dados persistidos
+        """
+        base = os.path.join(directory, f"fingerprints-{self.bits}")
+        if not (os.path.exists(f"{base}.npy") and os.path.exists(f"{base}.ids.json")):
+            return False
+        codes = np.load(f"{base}.npy")
+        with open(f"{base}.ids.json", "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        if len(ids) != codes.shape[0]:
+            print("[Fingerprint] Arquivos de fingerprints inconsistentes, ignorando")
+            return False
+        for knowledge_id, words in zip(ids, codes):
+            self.add(knowledge_id, sum(int(w) << (64 * i) for i, w in enumerate(words)))
+        return True
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+FINGERPRINTS = HammingIndex()  # Fingerprints dos conhecimentos 'vision'
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def index_fingerprint(item: dict):
+    """
+    Adiciona ao índice o fingerprint de um conhecimento (se houver).
+    """
+    code = item.get("fingerprint")
+    if code is not None:
+        FINGERPRINTS.add(item["id"], from_hex(code))
+
+def find_seen(image: np.ndarray) -> Tuple[int, Optional[Tuple[str, int]]]:
+    """
+    Calcula o fingerprint de uma imagem e busca uma tela já vista.
+
+    Returns:
+        (int, (str, int)): Fingerprint e (id, distância) do conhecimento mais
+        próximo, ou None se nenhum estiver a ≤ FINGERPRINT_MAX_DISTANCE
+    """
+    code = fingerprint(image)
+    return code, FINGERPRINTS.search(code)
+
+def sync_fingerprints(store: list):
+    """
+    Garante que o índice reflita a memória (mesmo contrato de sync_embeddings).
+    """
+    known = {item["id"] for item in store}
+    for knowledge_id in [kid for kid in FINGERPRINTS.slots if kid not in known]:
+        FINGERPRINTS.remove(knowledge_id)
+    for item in store:
+        if item.get("fingerprint") is not None and item["id"] not in FINGERPRINTS:
+            index_fingerprint(item)
+
+def save_fingerprints():
+    FINGERPRINTS.save(FINGERPRINTS_DIR)
+
+def load_fingerprints():
+    if FINGERPRINTS.load(FINGERPRINTS_DIR):
+        print(f"[Fingerprint] {len(FINGERPRINTS)} fingerprints carregados")
+
+# Fingerprints são persistidos junto com cada snapshot da memória
+memory_store.add_compaction_hook(save_fingerprints)
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    index = HammingIndex()
+    base_codes = rng.integers(0, 2 ** 63, size=200000, dtype=np.int64)
+    for i, c in enumerate(base_codes):
+        index.add(f"frame{i}", int(c))
+
+    target = int(base_codes[1234]) ^ 0b101  # 2 bits de diferença
+    start = time.perf_counter()
+    result = index.search(target)
+    print(f"[Fingerprint] Busca em {len(index)} códigos: {result} "
+          f"({1e6 * (time.perf_counter() - start):.0f}µs)")
+
+    frame = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    noisy = np.clip(frame.astype(int) + rng.integers(-5, 5, frame.shape), 0, 255).astype(np.uint8)
+    print(f"[Fingerprint] dHash frame × frame com ruído: {hamming(dhash(frame), dhash(noisy))} bits")
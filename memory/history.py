@@ -8,23 +8,242 @@ Responsável por registrar o histórico de inputs e decisões:
 - Ações tomadas (learn, ask)
 - Reforço aplicado (positivo ou negativo)
 - Permite auditoria, análise e futuras melhorias no aprendizado
+
+Persistência:
+- Um evento por linha (JSONL) em segmentos history-NNNNNN.jsonl
+- Escrita bufferizada: o buffer é descarregado por uma thread em background
+  ao atingir HISTORY_FLUSH_EVENTS eventos ou a cada HISTORY_FLUSH_INTERVAL segundos
+- Rotação por tamanho (HISTORY_SEGMENT_MAX_BYTES)
+- Em RAM ficam apenas os HISTORY_RECENT_EVENTS eventos mais recentes
+
+Consulta:
+- query_history() filtra por tipo e intervalo de tempo, com paginação,
+  usando os índices de cada segmento (memory/history_index.py)
 """
 
 # =========================
 # IMPORTAÇÕES
 # =========================
+import atexit
 import json
+import os
+import threading
 import time
-from typing import Dict, List
-from memory.store import MEMORY_STORE  # Integração com memória principal
-from core.config import STORAGE_PROCESSED  # Caminhos de armazenamento
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from memory.history_index import SegmentIndex, read_at, scan_newest
+from core.config import (
+    HISTORY_DIR,
+    HISTORY_FLUSH_EVENTS,
+    HISTORY_FLUSH_INTERVAL,
+    HISTORY_SEGMENT_MAX_BYTES,
+    HISTORY_RECENT_EVENTS,
+    HISTORY_QUERY_MAX_LIMIT,
+)
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def _json_default(obj):
+    """
+    Representa valores não serializáveis (ex: frames numpy) de forma resumida.
+    """
+    shape = getattr(obj, "shape", None)
+    if shape is not None:
+        return {"__type__": type(obj).__name__, "shape": list(shape)}
+    return str(obj)
+
+def segment_path(directory: str, segment_id: int) -> str:
+    """
+    Caminho do segmento de histórico com o id informado.
+    """
+    return os.path.join(directory, f"history-{segment_id:06d}.jsonl")
+
+def _drop_partial_line(path: str) -> int:
+    """
+    Trunca o segmento no fim da última linha completa: uma queda durante a
+    escrita deixa um fragmento sem '\\n', e o próximo evento seria colado nele.
+
+    Returns:
+        int: Tamanho do arquivo após a truncagem
+    """
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+            print(f"[History] Linha incompleta descartada no fim de {os.path.basename(path)} ({size - end} bytes)")
+        return end
+
+def list_segments(directory: str = HISTORY_DIR) -> List[str]:
+    """
+    Lista os segmentos de histórico em ordem cronológica.
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.startswith("history-") and n.endswith(".jsonl"))
+    return [os.path.join(directory, n) for n in names]
+
+# =========================
+# CLASSE HISTORY WRITER
+# =========================
+
+class HistoryWriter:
+    """
+    Escritor bufferizado de eventos em segmentos JSONL com rotação por tamanho.
+
+    Mantém o índice do segmento ativo; ao rotacionar, o índice é salvo em disco.
+    """
+    def __init__(self, directory: str = HISTORY_DIR, flush_events: int = HISTORY_FLUSH_EVENTS,
+                 flush_interval: float = HISTORY_FLUSH_INTERVAL,
+                 segment_max_bytes: int = HISTORY_SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.flush_events = flush_events
+        self.flush_interval = flush_interval
+        self.segment_max_bytes = segment_max_bytes
+
+        self._buffer: List[Tuple[float, str, bytes]] = []  # (timestamp, tipo, linha)
+        self._last_ts = 0.0
+        self._buffer_lock = threading.Lock()  # Protege o buffer (caminho quente)
+        self._io_lock = threading.Lock()      # Um único escritor no arquivo
+        self._wake = threading.Event()
+        self._thread = None
+        self._fh = None
+        self.segment_id = 0
+        self.segment_bytes = 0
+        self.index: Optional[SegmentIndex] = None  # Índice do segmento ativo
+
+    def start(self):
+        """
+        Inicia a thread de descarga em background (idempotente).
+        """
+        with self._buffer_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def append(self, entry: Dict) -> Dict:
+        """
+        Carimba o timestamp do evento e o enfileira serializado. Não toca o disco.
+
+        O timestamp é atribuído sob o lock do buffer e nunca decresce, então
+        a ordem no arquivo é cronológica (requisito dos índices por segmento).
+        """
+        with self._buffer_lock:
+            timestamp = max(time.time(), self._last_ts)
+            self._last_ts = timestamp
+            entry["timestamp"] = timestamp
+            line = json.dumps(entry, default=_json_default, ensure_ascii=False) + "\n"
+            self._buffer.append((timestamp, entry["type"], line.encode("utf-8")))
+            full = len(self._buffer) >= self.flush_events
+        if self._thread is None:
+            self.start()
+        if full:
+            self._wake.set()
+        return entry
+
+    def flush(self):
+        """
+        Descarrega o buffer no segmento atual, rotacionando se necessário.
+        """
+        with self._io_lock:
+            with self._buffer_lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            data = b"".join(line for _, _, line in lines)
+            if self._fh is None:
+                self._open_segment()
+            if self.segment_bytes and self.segment_bytes + len(data) > self.segment_max_bytes:
+                self._rotate()
+            self._fh.write(data)
+            self._fh.flush()
+
+            offset = self.segment_bytes
+            for timestamp, event_type, line in lines:
+                self.index.add(timestamp, event_type, offset, len(line))
+                offset += len(line)
+            self.segment_bytes = offset
+
+    def close(self):
+        """
+        Descarrega o buffer e fecha o segmento atual.
+        """
+        self.flush()
+        with self._io_lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+                self.index.save()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[History] Erro ao descarregar histórico: {e}")
+
+    def _open_segment(self):
+        """
+        Abre (em append) o segmento mais recente, ou cria o primeiro.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        segments = list_segments(self.directory)
+        if segments:
+            self.segment_id = int(os.path.basename(segments[-1])[8:14])
+        else:
+            self.segment_id = 1
+        path = segment_path(self.directory, self.segment_id)
+        if os.path.exists(path):
+            _drop_partial_line(path)
+            self.index = SegmentIndex.load(path)
+        else:
+            self.index = SegmentIndex(path)
+        self._fh = open(path, "ab")
+        self.segment_bytes = self._fh.tell()
+        if self.index.count:
+            self._last_ts = max(self._last_ts, self.index.max_ts)
+
+    def _rotate(self):
+        """
+        Fecha o segmento atual e inicia o próximo.
+        """
+        self._fh.close()
+        self.index.save()
+        self.segment_id += 1
+        path = segment_path(self.directory, self.segment_id)
+        self.index = SegmentIndex(path)
+        self._fh = open(path, "ab")
+        self.segment_bytes = 0
+
+    def active_index(self) -> Optional[SegmentIndex]:
+        """
+        Índice do segmento ativo (None se nada foi gravado nesta execução).
+        """
+        with self._io_lock:
+            return self.index
 
 # =========================
 # VARIÁVEIS GLOBAIS
 # =========================
-history_log: List[Dict] = []  # Lista em memória do histórico
+history_log: Deque[Dict] = deque(maxlen=HISTORY_RECENT_EVENTS)  # Eventos recentes em RAM
+
+_writer = HistoryWriter()
+atexit.register(_writer.close)
 
-HISTORY_FILE = f"{STORAGE_PROCESSED}/history.json"  # Arquivo persistente
+_index_cache: Dict[str, SegmentIndex] = {}  # Índices de segmentos fechados
 
 # =========================
 # FUNÇÕES PRINCIPAIS
@@ -38,48 +257,148 @@ def log_event(event_type: str, payload: Dict):
         event_type (str): Tipo de evento (ex: 'learn', 'ask', 'reinforce')
         payload (Dict): Dados associados ao evento
     """
-    timestamp = time.time()
     entry = {
-        "timestamp": timestamp,
+        "timestamp": None,  # Atribuído pelo writer (monotônico)
         "type": event_type,
         "payload": payload
     }
 
-    history_log.append(entry)
-    save_history()
-    print(f"[History] Evento '{event_type}' registrado em {timestamp}")
+    history_log.append(_writer.append(entry))
 
 def save_history():
     """
-    Salva histórico em disco no arquivo HISTORY_FILE
+    Força a descarga dos eventos pendentes em disco.
     """
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history_log, f, indent=2)
+        _writer.flush()
     except Exception as e:
         print(f"[History] Erro ao salvar histórico: {e}")
 
 def load_history():
     """
-    Carrega histórico do disco para memória
+    Carrega os eventos mais recentes do disco para memória
     """
-    global history_log
+    history_log.clear()
+    recent: List[Dict] = []
     try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            history_log = json.load(f)
-            print(f"[History] Histórico carregado com {len(history_log)} eventos")
-    except FileNotFoundError:
-        history_log = []
-        print("[History] Nenhum histórico encontrado, iniciando vazio")
+        # Percorre segmentos do mais novo para o mais antigo até preencher a janela
+        for path in reversed(list_segments()):
+            with open(path, "rb") as f:
+                lines = f.readlines()
+            events = []
+            for line in lines[-HISTORY_RECENT_EVENTS:]:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Linha incompleta (queda durante a escrita)
+            recent = events + recent
+            if len(recent) >= HISTORY_RECENT_EVENTS:
+                break
+        history_log.extend(recent[-HISTORY_RECENT_EVENTS:])
+        print(f"[History] Histórico carregado com {len(history_log)} eventos recentes")
     except Exception as e:
         print(f"[History] Erro ao carregar histórico: {e}")
-        history_log = []
+
+def _segment_indexes() -> List[SegmentIndex]:
+    """
+    Índices de todos os segmentos, em ordem cronológica.
+    """
+    active = _writer.active_index()
+    indexes = []
+    for path in list_segments():
+        if active is not None and path == active.path:
+            indexes.append(active)
+            continue
+        index = _index_cache.get(path)
+        if index is None or index.bytes != os.path.getsize(path):
+            index = SegmentIndex.load(path)
+            _index_cache[path] = index
+        indexes.append(index)
+    return indexes
+
+def query_history(event_type: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None, limit: int = 100, offset: int = 0) -> Dict:
+    """
+    Consulta o histórico, do evento mais recente para o mais antigo.
+
+    Segmentos fora do intervalo são descartados pelo min/max do índice.
+    Com filtro de tipo, só as linhas daquele tipo são lidas (seek por offset);
+    sem filtro, os blocos do índice temporal esparso são lidos do fim para o
+    início até completar offset + limit eventos.
+
+    Args:
+        event_type (str, opcional): Tipo de evento (ex: 'reinforce')
+        since (float, opcional): Timestamp mínimo (epoch, inclusive)
+        until (float, opcional): Timestamp máximo (epoch, inclusive)
+        limit (int): Eventos por página (até HISTORY_QUERY_MAX_LIMIT)
+        offset (int): Eventos a pular (paginação)
+
+    Returns:
+        Dict: {"events": [...], "offset", "limit", "next_offset" (None se acabou)}
+
+    Raises:
+        ValueError: Se limit ou offset forem negativos
+    """
+    if limit < 0 or offset < 0:
+        raise ValueError("limit e offset não podem ser negativos")
+    save_history()  # Torna visíveis os eventos ainda no buffer
+    limit = min(limit, HISTORY_QUERY_MAX_LIMIT)
+    skip = offset
+    events: List[Dict] = []
+
+    for index in reversed(_segment_indexes()):
+        if len(events) >= limit:
+            break
+        if not index.overlaps(since, until):
+            continue
+
+        wanted = limit - len(events)
+        if event_type is not None:
+            offsets = index.type_offsets(event_type, since, until)
+            if skip >= len(offsets):
+                skip -= len(offsets)
+                continue
+            newest = offsets[::-1][skip:skip + wanted]
+            events.extend(read_at(index.path, newest))
+        else:
+            matches = scan_newest(index, since, until, skip + wanted)
+            if skip >= len(matches):
+                skip -= len(matches)
+                continue
+            events.extend(matches[skip:skip + wanted])
+        skip = 0
+
+    return {
+        "events": events,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + len(events) if limit and len(events) == limit else None,
+    }
+
+def init_history():
+    """
+    Prepara o diretório de histórico, carrega eventos recentes e inicia a descarga em background.
+    """
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    load_history()
+    _writer.start()
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
 # =========================
 if __name__ == "__main__":
-    load_history()
+    init_history()
     log_event("learn", {"id": "abc123", "content": "Teste de aprendizado"})
     log_event("ask", {"question": "O que é isso?", "confidence": 0.5})
-    print("[History] Conteúdo do histórico:", history_log)
+
+    start = time.perf_counter()
+    for i in range(10000):
+        log_event("video_stream", {"frame_processed": True})
+    elapsed = time.perf_counter() - start
+    print(f"[History] Custo médio por evento: {1e6 * elapsed / 10000:.1f}µs")
+
+    save_history()
+    print("[History] Eventos recentes em RAM:", len(history_log))
+
+    last_hour = query_history("learn", since=time.time() - 3600, limit=10)
+    print("[History] 'learn' na última hora:", len(last_hour["events"]))
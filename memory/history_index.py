@@ -0,0 +1,207 @@
+"""
+NE-AI V1 — History Index
+=========================
+
+Índices por segmento do histórico (history-NNNNNN.jsonl), para consultas
+que leem apenas os bytes relevantes:
+
+- Índice temporal esparso: (timestamp, offset) a cada HISTORY_INDEX_STRIDE eventos
+- Offsets por tipo: para cada tipo de evento, timestamps e offsets de todas as linhas
+- Intervalo de tempo do segmento (min/max), para descartar segmentos inteiros
+
+O índice do segmento ativo vive em RAM (atualizado a cada descarga do buffer);
+segmentos fechados têm o índice salvo ao lado: history-NNNNNN.idx.json.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import bisect
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from core.config import HISTORY_INDEX_STRIDE
+
+# =========================
+# CLASSE SEGMENT INDEX
+# =========================
+
+class SegmentIndex:
+    """
+    Índice de um segmento de histórico.
+    """
+    def __init__(self, path: str, stride: int = HISTORY_INDEX_STRIDE):
+        """
+        Args:
+            path (str): Caminho do segmento .jsonl
+            stride (int): Eventos entre entradas do índice temporal esparso
+        """
+        self.path = path
+        self.stride = stride
+        self.count = 0
+        self.bytes = 0
+        self.min_ts: Optional[float] = None
+        self.max_ts: Optional[float] = None
+        self.sparse_ts: List[float] = []
+        self.sparse_offsets: List[int] = []
+        self.types: Dict[str, Tuple[List[float], List[int]]] = {}  # tipo → (timestamps, offsets)
+
+    @property
+    def index_path(self) -> str:
+        return self.path[:-len(".jsonl")] + ".idx.json"
+
+    def add(self, timestamp: float, event_type: str, offset: int, length: int):
+        """
+        Registra um evento gravado em `offset` com `length` bytes.
+        """
+        if self.count % self.stride == 0:
+            self.sparse_ts.append(timestamp)
+            self.sparse_offsets.append(offset)
+        timestamps, offsets = self.types.setdefault(event_type, ([], []))
+        timestamps.append(timestamp)
+        offsets.append(offset)
+
+        if self.min_ts is None:
+            self.min_ts = timestamp
+        self.max_ts = timestamp
+        self.count += 1
+        self.bytes = offset + length
+
+    def overlaps(self, since: Optional[float], until: Optional[float]) -> bool:
+        """
+        Indica se o segmento pode conter eventos no intervalo.
+        """
+        if self.count == 0:
+            return False
+        if since is not None and self.max_ts < since:
+            return False
+        if until is not None and self.min_ts > until:
+            return False
+        return True
+
+    def type_offsets(self, event_type: str, since: Optional[float], until: Optional[float]) -> List[int]:
+        """
+        Offsets (em ordem cronológica) dos eventos de um tipo no intervalo.
+        """
+        if event_type not in self.types:
+            return []
+        timestamps, offsets = self.types[event_type]
+        lo = bisect.bisect_left(timestamps, since) if since is not None else 0
+        hi = bisect.bisect_right(timestamps, until) if until is not None else len(timestamps)
+        return offsets[lo:hi]
+
+    def start_offset(self, since: Optional[float]) -> int:
+        """
+        Offset a partir do qual começar a leitura sequencial para `since`.
+        """
+        if since is None or not self.sparse_ts:
+            return 0
+        pos = bisect.bisect_right(self.sparse_ts, since) - 1
+        return self.sparse_offsets[max(pos, 0)]
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def save(self):
+        """
+        Salva o índice ao lado do segmento (chamado ao fechar o segmento).
+        """
+        data = {
+            "count": self.count,
+            "bytes": self.bytes,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "sparse_ts": self.sparse_ts,
+            "sparse_offsets": self.sparse_offsets,
+            "types": self.types,
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    @classmethod
+    def load(cls, path: str) -> "SegmentIndex":
+        """
+        Carrega o índice salvo de um segmento, reconstruindo-o se estiver
+        ausente ou desatualizado em relação ao arquivo.
+        """
+        index = cls(path)
+        size = os.path.getsize(path)
+        if os.path.exists(index.index_path):
+            with open(index.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["bytes"] == size:
+                index.count = data["count"]
+                index.bytes = data["bytes"]
+                index.min_ts = data["min_ts"]
+                index.max_ts = data["max_ts"]
+                index.sparse_ts = data["sparse_ts"]
+                index.sparse_offsets = data["sparse_offsets"]
+                index.types = {t: (v[0], v[1]) for t, v in data["types"].items()}
+                return index
+        return cls.build(path)
+
+    @classmethod
+    def build(cls, path: str) -> "SegmentIndex":
+        """
+        Reconstrói o índice lendo o segmento inteiro (recuperação).
+        """
+        index = cls(path)
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    index.add(entry["timestamp"], entry["type"], offset, len(line))
+                except (json.JSONDecodeError, KeyError):
+                    pass  # Linha incompleta (queda durante a escrita)
+                offset += len(line)
+        return index
+
+# =========================
+# LEITURA
+# =========================
+
+def read_at(path: str, offsets: List[int]) -> Iterator[dict]:
+    """
+    Lê os eventos nas posições informadas (uma leitura por linha).
+    """
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield json.loads(f.readline())
+
+def scan_newest(index: SegmentIndex, since: Optional[float], until: Optional[float],
+                count: int) -> List[dict]:
+    """
+    Eventos do intervalo, do mais recente para o mais antigo (no máximo `count`).
+
+    Percorre os blocos do índice esparso de trás para frente: só lê os blocos
+    necessários para juntar `count` eventos, parando também no primeiro
+    evento anterior a `since`.
+    """
+    events: List[dict] = []
+    if count <= 0:
+        return events
+    ends = index.sparse_offsets[1:] + [index.bytes]  # Bytes não indexados ficam de fora
+    blocks = list(zip(index.sparse_ts, index.sparse_offsets, ends))
+    with open(index.path, "rb") as f:
+        for start_ts, start, end in reversed(blocks):
+            if until is not None and start_ts > until:
+                continue  # Bloco inteiro depois de `until`
+            f.seek(start)
+            for line in reversed(f.read(end - start).splitlines()):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if until is not None and entry["timestamp"] > until:
+                    continue
+                if since is not None and entry["timestamp"] < since:
+                    return events
+                events.append(entry)
+                if len(events) >= count:
+                    return events
+    return events
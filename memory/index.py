@@ -0,0 +1,518 @@
+"""
+NE-AI V1 — Index
+=================
+
+Camada de índices de vizinhos mais próximos (similaridade coseno) plugável:
+
+- ExactIndex: força bruta vetorizada (referência exata)
+- IVFIndex: listas invertidas sobre centróides k-means (busca aproximada)
+- HNSWIndex: grafo navegável hierárquico (busca aproximada)
+
+Os índices não guardam vetores: pontuam as linhas do dono (ex: a matriz
+de embeddings) pelo slot, via a função `rows` recebida na criação, e
+guardam só rótulos, a máscara de vivos e a estrutura do backend.
+
+Todos suportam inserção incremental, remoção, consultas top-k e
+save/load em disco (só a estrutura). evaluate_index() mede recall e
+latência de um índice aproximado contra a busca exata.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import heapq
+import json
+import math
+import os
+import time
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from core.config import (
+    MEMORY_INDEX_BACKEND,
+    IVF_NLIST,
+    IVF_NPROBE,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+)
+
+# =========================
+# CLASSE BASE
+# =========================
+
+RowSource = Callable[[np.ndarray], np.ndarray]  # slots → linhas float32 normalizadas (n, d)
+
+class BaseIndex(ABC):
+    """
+    Estrutura comum: rótulo ↔ slot e máscara de slots vivos (remoção por
+    tombstone). Os slots são os do dono das linhas, lidas via `rows`.
+    """
+    backend = "base"
+
+    def __init__(self, rows: RowSource, capacity: int = 1024):
+        """
+        Args:
+            rows (RowSource): Lê as linhas (normalizadas) dos slots informados
+            capacity (int): Slots reservados na máscara de vivos
+        """
+        self.rows = rows
+        self.capacity = capacity
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.labels: List[Optional[Hashable]] = []  # slot → rótulo (None = livre/removido)
+        self.slots: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, label: Hashable) -> bool:
+        return label in self.slots
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _store(self, label: Hashable, slot: int) -> bool:
+        """
+        Registra o rótulo no slot.
+
+        Returns:
+            bool: True se o slot já era deste rótulo (linha substituída no lugar)
+        """
+        if self.slots.get(label) == slot:
+            return True
+        if label in self.slots:
+            self.remove(label)
+
+        if slot >= self.capacity:
+            self.capacity = max(self.capacity * 2, slot + 1)
+            alive = np.zeros(self.capacity, dtype=bool)
+            alive[:len(self.labels)] = self.alive[:len(self.labels)]
+            self.alive = alive
+        if slot >= len(self.labels):
+            self.labels.extend([None] * (slot + 1 - len(self.labels)))
+
+        self.alive[slot] = True
+        self.labels[slot] = label
+        self.slots[label] = slot
+        return False
+
+    @abstractmethod
+    def add(self, label: Hashable, slot: int, vector: np.ndarray):
+        """
+        Insere (ou substitui) o rótulo cuja linha está em `slot`.
+
+        Args:
+            label (Hashable): Rótulo devolvido nas buscas
+            slot (int): Slot da linha no dono (já gravada)
+            vector (np.ndarray): A mesma linha (evita relê-la na inserção)
+        """
+
+    def remove(self, label: Hashable):
+        """
+        Remove um rótulo do índice.
+        """
+        slot = self.slots.pop(label, None)
+        if slot is not None:
+            self.alive[slot] = False
+            self.labels[slot] = None
+
+    @abstractmethod
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """
+        Retorna os k vizinhos mais similares como (label, similaridade).
+        """
+
+    def _top_k(self, slots: np.ndarray, query: np.ndarray, k: int) -> List[Tuple[Hashable, float]]:
+        """
+        Pontua um conjunto de slots candidatos e retorna os k melhores vivos.
+        """
+        slots = slots[self.alive[slots]]
+        if slots.size == 0:
+            return []
+        scores = self.rows(slots) @ query
+        k = min(k, slots.size)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.labels[slots[i]], float(scores[i])) for i in best]
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def _state(self) -> dict:
+        """
+        Estado específico do backend (serializável em JSON).
+        """
+        return {}
+
+    def _restore(self, state: dict):
+        pass
+
+    def _params(self) -> dict:
+        return {}
+
+    def save(self, path: str):
+        """
+        Salva a estrutura do índice em {path}.json (as linhas ficam com o dono).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        meta = {
+            "backend": self.backend,
+            "params": self._params(),
+            "labels": self.labels,
+            "state": self._state(),
+        }
+        with open(f"{path}.tmp.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp.json", f"{path}.json")
+
+    @classmethod
+    def _from_saved(cls, rows: RowSource, params: dict, labels: list, state: dict) -> "BaseIndex":
+        index = cls(rows, **params)
+        index.capacity = max(index.capacity, len(labels))
+        index.alive = np.zeros(index.capacity, dtype=bool)
+        index.labels = labels
+        for slot, label in enumerate(labels):
+            if label is not None:
+                index.slots[label] = slot
+                index.alive[slot] = True
+        index._restore(state)
+        return index
+
+# =========================
+# BACKEND EXATO
+# =========================
+
+class ExactIndex(BaseIndex):
+    """
+    Busca exata: um produto matriz × vetor sobre todos os vetores vivos.
+    """
+    backend = "exact"
+
+    def add(self, label: Hashable, slot: int, vector: np.ndarray):
+        self._store(label, slot)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        if not self.slots:
+            return []
+        return self._top_k(np.arange(len(self.labels)), self._normalize(vector), k)
+
+# =========================
+# BACKEND IVF
+# =========================
+
+class IVFIndex(BaseIndex):
+    """
+    Listas invertidas: cada vetor pertence ao centróide mais próximo e a
+    busca só visita as nprobe listas mais promissoras.
+
+    Até reunir train_size vetores o índice funciona como busca exata;
+    então treina os centróides (k-means esférico) e distribui os vetores.
+    """
+    backend = "ivf"
+
+    def __init__(self, rows: RowSource, nlist: int = IVF_NLIST, nprobe: int = IVF_NPROBE,
+                 train_size: Optional[int] = None, seed: int = 42, capacity: int = 1024):
+        super().__init__(rows, capacity)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or nlist * 39
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+
+    def _params(self) -> dict:
+        return {"nlist": self.nlist, "nprobe": self.nprobe,
+                "train_size": self.train_size, "seed": self.seed}
+
+    def train(self, iterations: int = 10):
+        """
+        Treina os centróides sobre os vetores vivos e redistribui as listas.
+        """
+        live = np.flatnonzero(self.alive[:len(self.labels)])
+        if live.size == 0:
+            return
+        data = self.rows(live)
+        nlist = min(self.nlist, live.size)
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(live.size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self.centroids = centroids
+        assign = np.argmax(data @ centroids.T, axis=1)
+        self.lists = [[] for _ in range(nlist)]
+        for slot, c in zip(live, assign):
+            self.lists[c].append(int(slot))
+        print(f"[Index] IVF treinado com {nlist} listas sobre {live.size} vetores")
+
+    def add(self, label: Hashable, slot: int, vector: np.ndarray):
+        vector = self._normalize(vector)
+        self._store(label, slot)  # Linha substituída: a entrada antiga é deduplicada na busca
+        if self.centroids is not None:
+            self.lists[int(np.argmax(self.centroids @ vector))].append(slot)
+        elif len(self.slots) >= self.train_size:
+            self.train()
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        if not self.slots:
+            return []
+        query = self._normalize(vector)
+        if self.centroids is None:
+            return self._top_k(np.arange(len(self.labels)), query, k)
+
+        nprobe = min(self.nprobe, len(self.lists))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = [self.lists[c] for c in probes if self.lists[c]]
+        if not candidates:
+            return []
+        slots = np.unique(np.fromiter((s for lst in candidates for s in lst), dtype=np.int64))
+        return self._top_k(slots, query, k)
+
+    def _state(self) -> dict:
+        return {
+            "centroids": self.centroids.tolist() if self.centroids is not None else None,
+            "lists": self.lists,
+        }
+
+    def _restore(self, state: dict):
+        if state.get("centroids") is not None:
+            self.centroids = np.asarray(state["centroids"], dtype=np.float32)
+            self.lists = state["lists"]
+
+# =========================
+# BACKEND HNSW
+# =========================
+
+class HNSWIndex(BaseIndex):
+    """
+    Grafo de pequeno mundo navegável hierárquico (HNSW simplificado).
+
+    Cada vetor entra em um nível sorteado; a busca desce gulosamente
+    pelas camadas superiores e faz busca em largura limitada (ef) na base.
+    Remoções marcam o nó como morto: ele continua servindo de ponte no
+    grafo, mas não aparece nos resultados.
+    """
+    backend = "hnsw"
+
+    def __init__(self, rows: RowSource, m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION,
+                 ef_search: int = HNSW_EF_SEARCH, seed: int = 42, capacity: int = 1024):
+        super().__init__(rows, capacity)
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.seed = seed
+        self.level_mult = 1 / math.log(max(m, 2))
+        self.rng = np.random.default_rng(seed)
+        self.layers: List[Dict[int, List[int]]] = []
+        self.entry_point: Optional[int] = None
+        self.max_level = -1
+
+    def _params(self) -> dict:
+        return {"m": self.m, "ef_construction": self.ef_construction,
+                "ef_search": self.ef_search, "seed": self.seed}
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """
+        Busca limitada por ef em uma camada. Retorna (score, slot) em ordem decrescente.
+        """
+        graph = self.layers[level]
+        visited = set(entry_points)
+        scores = self.rows(np.asarray(entry_points)) @ query
+        candidates = [(-float(s), p) for s, p in zip(scores, entry_points)]
+        results = [(float(s), p) for s, p in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_score, current = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+            neighbors = [n for n in graph.get(current, ()) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for score, n in zip(self.rows(np.asarray(neighbors)) @ query, neighbors):
+                score = float(score)
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, n))
+                    heapq.heappush(results, (score, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _prune(self, slot: int, level: int):
+        """
+        Mantém apenas os vizinhos mais próximos de um nó que excedeu o grau máximo.
+        """
+        max_degree = self.m0 if level == 0 else self.m
+        neighbors = self.layers[level][slot]
+        if len(neighbors) <= max_degree:
+            return
+        rows = self.rows(np.asarray(neighbors + [slot]))
+        scores = rows[:-1] @ rows[-1]
+        keep = np.argsort(-scores)[:max_degree]
+        self.layers[level][slot] = [neighbors[i] for i in keep]
+
+    def add(self, label: Hashable, slot: int, vector: np.ndarray):
+        vector = self._normalize(vector)
+        if self._store(label, slot):
+            # Linha substituída no lugar: o nó mantém o nível e é religado
+            level = max(lvl for lvl, layer in enumerate(self.layers) if slot in layer)
+        else:
+            level = int(-math.log(max(self.rng.random(), 1e-12)) * self.level_mult)
+
+        while len(self.layers) <= level:
+            self.layers.append({})
+        for lvl in range(level + 1):
+            self.layers[lvl].setdefault(slot, [])  # Religação parte dos vizinhos antigos
+
+        if self.entry_point is None:
+            self.entry_point = slot
+            self.max_level = level
+            return
+
+        entry = [self.entry_point]
+        for lvl in range(self.max_level, level, -1):
+            entry = [self._search_layer(vector, entry, 1, lvl)[0][1]]
+
+        for lvl in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vector, entry, self.ef_construction, lvl)
+            neighbors = [s for _, s in found if s != slot][:self.m]
+            self.layers[lvl][slot] = neighbors
+            for n in neighbors:
+                if slot not in self.layers[lvl][n]:
+                    self.layers[lvl][n].append(slot)
+                    self._prune(n, lvl)
+            entry = [s for _, s in found]
+
+        if level > self.max_level:
+            self.entry_point = slot
+            self.max_level = level
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[Hashable, float]]:
+        if not self.slots:
+            return []
+        query = self._normalize(vector)
+        entry = [self.entry_point]
+        for lvl in range(self.max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, lvl)[0][1]]
+
+        found = self._search_layer(query, entry, max(self.ef_search, k), 0)
+        results = [(self.labels[s], score) for score, s in found if self.alive[s]]
+        return results[:k]
+
+    def _state(self) -> dict:
+        return {
+            "layers": [{str(s): n for s, n in layer.items()} for layer in self.layers],
+            "entry_point": self.entry_point,
+            "max_level": self.max_level,
+        }
+
+    def _restore(self, state: dict):
+        self.layers = [{int(s): n for s, n in layer.items()} for layer in state.get("layers", [])]
+        self.entry_point = state.get("entry_point")
+        self.max_level = state.get("max_level", -1)
+
+# =========================
+# FÁBRICA E PERSISTÊNCIA
+# =========================
+BACKENDS = {
+    ExactIndex.backend: ExactIndex,
+    IVFIndex.backend: IVFIndex,
+    HNSWIndex.backend: HNSWIndex,
+}
+
+def create_index(rows: RowSource, backend: str = MEMORY_INDEX_BACKEND, **params) -> BaseIndex:
+    """
+    Cria um índice vazio do backend informado ('exact', 'ivf' ou 'hnsw')
+    sobre as linhas lidas por `rows`.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de índice desconhecido: {backend}")
+    return BACKENDS[backend](rows, **params)
+
+def load_index(path: str, rows: RowSource) -> BaseIndex:
+    """
+    Carrega um índice salvo com BaseIndex.save() sobre as linhas lidas por `rows`.
+    """
+    with open(f"{path}.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    cls = BACKENDS[meta["backend"]]
+    return cls._from_saved(rows, meta["params"], meta["labels"], meta["state"])
+
+# =========================
+# AVALIAÇÃO
+# =========================
+
+def evaluate_index(index: BaseIndex, exact: BaseIndex, queries: np.ndarray, k: int = 10) -> dict:
+    """
+    Compara um índice aproximado com a busca exata.
+
+    Returns:
+        dict: recall@k e latência média por consulta (ms) de cada índice
+    """
+    hits = 0
+    approx_time = 0.0
+    exact_time = 0.0
+    for query in queries:
+        start = time.perf_counter()
+        truth = {label for label, _ in exact.search(query, k)}
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = {label for label, _ in index.search(query, k)}
+        approx_time += time.perf_counter() - start
+
+        hits += len(truth & found)
+
+    n = max(len(queries), 1)
+    return {
+        "backend": index.backend,
+        "recall_at_k": hits / max(n * k, 1),
+        "latency_ms": 1000 * approx_time / n,
+        "exact_latency_ms": 1000 * exact_time / n,
+    }
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    # Benchmark sintético: vetores agrupados, como frames/textos parecidos
+    rng = np.random.default_rng(0)
+    n_items, dim, k = 20000, 64, 10
+    centers = rng.normal(size=(200, dim))
+    data = centers[rng.integers(0, 200, n_items)] + 0.3 * rng.normal(size=(n_items, dim))
+    queries = data[rng.choice(n_items, 200, replace=False)] + 0.1 * rng.normal(size=(200, dim))
+
+    rows = data / np.linalg.norm(data, axis=1, keepdims=True)
+    rows = rows.astype(np.float32)
+    exact = create_index(rows.__getitem__, "exact")
+    for i, vec in enumerate(rows):
+        exact.add(i, i, vec)
+
+    for backend in ("ivf", "hnsw"):
+        index = create_index(rows.__getitem__, backend)
+        start = time.perf_counter()
+        for i, vec in enumerate(rows):
+            index.add(i, i, vec)
+        build = time.perf_counter() - start
+        report = evaluate_index(index, exact, queries, k)
+        print(f"[Index] {backend}: recall@{k}={report['recall_at_k']:.3f} "
+              f"latência={report['latency_ms']:.3f}ms (exato {report['exact_latency_ms']:.3f}ms) "
+              f"construção={build:.1f}s")
@@ -0,0 +1,180 @@
+"""
+NE-AI V1 — Shared Array
+========================
+
+Arrays em arquivo mapeado em memória (np.memmap), compartilháveis entre processos:
+
+- SharedArray: array cujo primeiro eixo cresce por realocação do arquivo;
+  um único processo escritor mapeia em leitura/escrita, os leitores mapeiam
+  somente leitura e remapeiam quando o arquivo cresce
+- IdLog: log append-only slot → id que publica as linhas escritas; uma linha
+  só é visível aos leitores depois de registrada no log
+
+O page cache do SO é compartilhado: N processos mapeando o mesmo arquivo
+ocupam a RAM uma única vez.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import os
+from typing import List, Optional, Tuple
+import numpy as np
+
+# =========================
+# CLASSE SHARED ARRAY
+# =========================
+
+class SharedArray:
+    """
+    Array (linhas, *row_shape) em arquivo binário cru, sem cabeçalho — dtype e
+    formato das linhas ficam nos metadados de quem o usa.
+
+    O arquivo só cresce: encolher invalidaria os mapeamentos dos leitores.
+    """
+    def __init__(self, path: str, dtype, row_shape: Tuple[int, ...] = (), readonly: bool = False):
+        """
+        Args:
+            path (str): Caminho do arquivo
+            dtype: Tipo dos elementos
+            row_shape (tuple): Formato de cada linha (ex: (dim,) para matrizes)
+            readonly (bool): Mapeia somente leitura (processos leitores)
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.readonly = readonly
+        self.row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64))
+        self.array: Optional[np.ndarray] = None
+
+    def disk_rows(self) -> int:
+        """
+        Linhas que cabem no arquivo atual.
+        """
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.row_bytes
+
+    def open(self, rows: int = 0) -> np.ndarray:
+        """
+        Mapeia o arquivo; o escritor o cria/estende para ter ao menos `rows` linhas.
+        """
+        if not self.readonly and self.disk_rows() < max(rows, 1):
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.truncate(max(rows, 1) * self.row_bytes)
+        return self._map()
+
+    def resize(self, rows: int) -> np.ndarray:
+        """
+        (Escritor) Estende o arquivo para `rows` linhas e remapeia, preservando o conteúdo.
+        """
+        if self.array is not None:
+            self.array.flush()
+        return self.open(rows)
+
+    def refresh(self) -> np.ndarray:
+        """
+        (Leitor) Remapeia se o escritor estendeu o arquivo.
+        """
+        if self.array is None or self.disk_rows() != self.array.shape[0]:
+            return self._map()
+        return self.array
+
+    def flush(self):
+        """
+        Grava as páginas alteradas em disco (durabilidade; os leitores já as enxergam).
+        """
+        if self.array is not None and not self.readonly and isinstance(self.array, np.memmap):
+            self.array.flush()
+
+    def _map(self) -> np.ndarray:
+        rows = self.disk_rows()
+        if rows == 0:
+            self.array = np.zeros((0, *self.row_shape), dtype=self.dtype)
+        else:
+            self.array = np.memmap(self.path, dtype=self.dtype, mode="r" if self.readonly else "r+",
+                                   shape=(rows, *self.row_shape))
+        return self.array
+
+# =========================
+# CLASSE ID LOG
+# =========================
+
+class IdLog:
+    """
+    Log append-only de publicações: uma linha "slot\\tid" por linha escrita
+    (id vazio = slot removido). Leitores consomem só linhas completas.
+    """
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self.offset = 0  # Bytes já consumidos por read_new()
+        self._fh = None
+        if not readonly:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._fh = open(path, "ab")
+
+    def append(self, slot: int, knowledge_id: Optional[str]):
+        """
+        Publica um slot (o conteúdo da linha deve ter sido escrito antes).
+        """
+        self.extend([(slot, knowledge_id)])
+
+    def extend(self, entries: List[Tuple[int, Optional[str]]]):
+        """
+        Publica vários slots com uma única escrita.
+        """
+        data = "".join(f"{slot}\t{kid or ''}\n" for slot, kid in entries).encode("utf-8")
+        self._fh.write(data)
+        self._fh.flush()
+        self.offset += len(data)
+
+    def read_new(self) -> List[Tuple[int, Optional[str]]]:
+        """
+        Entradas publicadas desde a última leitura (linhas incompletas ficam para depois).
+
+        No escritor, uma linha incompleta no fim (queda durante a escrita) é descartada.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        if self._fh is not None and end < len(data):
+            self._fh.truncate(self.offset)
+
+        entries = []
+        for line in data[:end].decode("utf-8").splitlines():
+            slot, _, knowledge_id = line.partition("\t")
+            entries.append((int(slot), knowledge_id or None))
+        return entries
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    writer = SharedArray(os.path.join(directory, "rows.mm"), np.float32, (4,))
+    rows = writer.open(2)
+    log = IdLog(os.path.join(directory, "ids.log"))
+    rows[0] = 1.0
+    log.append(0, "a")
+
+    reader = SharedArray(writer.path, np.float32, (4,), readonly=True)
+    reader_log = IdLog(log.path, readonly=True)
+    print("[SharedArray] Leitor:", reader_log.read_new(), reader.open()[0])
+
+    rows = writer.resize(8)
+    rows[5] = 2.0
+    log.append(5, "b")
+    print("[SharedArray] Após crescer:", reader_log.read_new(), reader.refresh().shape)
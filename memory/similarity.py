@@ -5,6 +5,8 @@ NE-AI V1 — Similarity
 Responsável por calcular similaridade entre vetores:
 - Textos (TF-IDF)
 - Imagens (vetores flatten)
+- Busca top-k em lote sobre linhas pré-normalizadas, em blocos (RAM limitada)
+- Matrizes esparsas (CSR, textos) e densas (imagens) pelo mesmo caminho
 - Integração com learner para evitar aprendizado redundante
 """
 
@@ -12,7 +14,9 @@ Responsável por calcular similaridade entre vetores:
 # IMPORTAÇÕES
 # =========================
 import numpy as np
-from typing import List
+import scipy.sparse as sp
+from typing import List, Tuple
+from core.config import SIMILARITY_CHUNK_ROWS
 
 # =========================
 # FUNÇÕES PRINCIPAIS
@@ -41,25 +45,118 @@ def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
 
     return dot / (norm1 * norm2)
 
-def find_most_similar(target_vector: np.ndarray, vectors: List[np.ndarray]) -> (float, int):
+def find_most_similar(target_vector: np.ndarray, vectors: List[np.ndarray], index=None) -> (float, int):
     """
     Encontra o vetor mais similar em uma lista de vetores.
 
     Args:
         target_vector (np.ndarray): Vetor a ser comparado
         vectors (List[np.ndarray]): Lista de vetores para comparar
+        index (BaseIndex, opcional): Índice de memory.index; quando informado,
+            a busca é delegada a ele e `vectors` é ignorado
 
     Returns:
-        (float, int): Similaridade máxima e índice do vetor mais similar
+        (float, int): Similaridade máxima e índice (ou label) do vetor mais similar
     """
-    max_sim = -1
-    index = -1
-    for i, vec in enumerate(vectors):
-        sim = cosine_similarity(target_vector, vec)
-        if sim > max_sim:
-            max_sim = sim
-            index = i
-    return max_sim, index
+    if index is not None:
+        results = index.search(target_vector, k=1)
+        if not results:
+            return -1, -1
+        label, sim = results[0]
+        return sim, label
+
+    if target_vector is None or len(vectors) == 0:
+        return -1, -1
+
+    # Busca exata vetorizada: uma multiplicação matriz × vetor
+    matrix = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(target_vector)
+    dots = matrix @ target_vector
+    sims = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+    index = int(np.argmax(sims))
+    return float(sims[index]), index
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normaliza cada linha para norma 1 (linhas nulas permanecem nulas).
+
+    Com linhas pré-normalizadas, a similaridade coseno vira um produto escalar.
+
+    Args:
+        matrix (np.ndarray | sp.spmatrix): Matriz (n, d) ou vetor (d,); CSR é mantida esparsa
+
+    Returns:
+        np.ndarray | sp.csr_matrix: Matriz float32 com linhas normalizadas
+    """
+    if sp.issparse(matrix):
+        # Só sobre os não nulos: produto com diags() e sum(axis=1) custam O(colunas)
+        # (2^20 no texto hasheado), não O(nnz)
+        out = sp.csr_matrix(matrix, dtype=np.float32, copy=True)
+        out.sum_duplicates()
+        counts = np.diff(out.indptr)
+        rows = np.repeat(np.arange(out.shape[0]), counts)
+        norms = np.sqrt(np.bincount(rows, weights=out.data.astype(np.float64) ** 2, minlength=out.shape[0]))
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms != 0)
+        out.data *= np.repeat(inverse, counts).astype(np.float32)
+        return out
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms != 0)
+
+def find_top_k(queries: np.ndarray, matrix: np.ndarray, k: int = 1,
+               normalized: bool = True, chunk_size: int = SIMILARITY_CHUNK_ROWS,
+               scales: np.ndarray = None, normalize_queries: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Busca os k vetores mais similares da matriz para um lote de consultas.
+
+    A matriz é percorrida em blocos de chunk_size linhas: o pico de memória
+    fica em (n_consultas × chunk_size) em vez de (n_consultas × n_linhas).
+
+    Consultas e matriz podem ser densas ou esparsas (CSR); o produto
+    esparso × esparso só toca as dimensões não nulas.
+
+    Args:
+        queries (np.ndarray | sp.spmatrix): Consultas (q, d) ou vetor único (d,)
+        matrix (np.ndarray | sp.spmatrix): Matriz (n, d) de vetores da memória
+        k (int): Número de vizinhos por consulta
+        normalized (bool): Se as linhas de `matrix` já estão normalizadas
+        chunk_size (int): Linhas da matriz processadas por bloco
+        scales (np.ndarray, opcional): Escala por linha de uma matriz quantizada
+            (int8): score = (consulta · linha) × escala
+        normalize_queries (bool): False = consultas já preparadas pelo chamador
+            (ex: ponderadas por IDF), usadas como estão
+
+    Returns:
+        (np.ndarray, np.ndarray): Índices (q, k) e similaridades (q, k) em ordem
+        decrescente; posições sem vizinho ficam com índice -1 e score -inf
+    """
+    queries = normalize_rows(queries) if normalize_queries else queries
+    n_queries = queries.shape[0]
+    best_idx = np.full((n_queries, k), -1, dtype=np.int64)
+    best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+
+    for start in range(0, matrix.shape[0], chunk_size):
+        chunk = matrix[start:start + chunk_size]
+        if not normalized:
+            chunk = normalize_rows(chunk)
+        if not sp.issparse(chunk) and chunk.dtype != np.float32:
+            chunk = chunk.astype(np.float32)  # float16/int8: converte só o bloco
+        scores = queries @ chunk.T
+        if sp.issparse(scores):
+            scores = scores.toarray()
+        if scales is not None:
+            scores = scores * scales[start:start + chunk_size]
+
+        # Junta os melhores do bloco com os melhores acumulados
+        kk = min(k, scores.shape[1])
+        part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        cand_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+        cand_idx = np.concatenate([best_idx, part + start], axis=1)
+        top = np.argsort(-cand_scores, axis=1, kind="stable")[:, :k]
+        best_scores = np.take_along_axis(cand_scores, top, axis=1)
+        best_idx = np.take_along_axis(cand_idx, top, axis=1)
+
+    return best_idx, best_scores
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
@@ -77,3 +174,14 @@ if __name__ == "__main__":
 
     sim, idx = find_most_similar(target, vecs)
     print(f"[Similarity] Mais similar: índice {idx} com similaridade {sim:.3f}")
+
+    matrix = normalize_rows(np.random.rand(10000, 32))
+    queries = np.random.rand(4, 32)
+    indices, scores = find_top_k(queries, matrix, k=3, chunk_size=1024)
+    print(f"[Similarity] Top-3 em lote: {indices.tolist()}")
+
+    rows = np.repeat(np.arange(10000), 10)
+    cols = np.random.randint(0, 2 ** 20, size=rows.size)
+    sparse_matrix = normalize_rows(sp.csr_matrix((np.random.rand(rows.size), (rows, cols)), shape=(10000, 2 ** 20)))
+    indices, scores = find_top_k(sparse_matrix[:4], sparse_matrix, k=3)
+    print(f"[Similarity] Top-3 esparso: {indices.tolist()}")
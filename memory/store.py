@@ -2,12 +2,40 @@
 NE-AI V1 — Store
 =================
 
-Gerencia a memória persistente do NE-AI V1:
+Gerencia a memória persistente do NE-AI V1 em um único objeto (MemoryStore):
 
-- Carrega memória de disco ao iniciar
-- Salva novos conhecimentos
-- Integra com learner.py
-- Mantém consistência do arquivo memory.json
+- Carrega memória de disco ao iniciar (snapshot + replay do journal)
+- Registra cada mutação em um journal append-only (custo constante por operação)
+- Compacta periodicamente o journal em um novo snapshot, em background
+- Mantém um índice id → posição para acesso O(1) (reforço, feedback, remoção)
+- Thread-safe: lock de leitores/escritor para a memória e group commit
+  no journal (threads concorrentes gravam suas operações em um só write)
+- Leituras para visualização via snapshot(), sem segurar o lock
+- Corpos (content) ficam fora do snapshot, em um arquivo append-only
+  (MEMORY_BODIES_FILE): o snapshot e o journal guardam só metadados e a
+  referência "_body": [offset, bytes]. O carregamento lê apenas os metadados;
+  o corpo é lido sob demanda (get(), snapshot(bodies=True), load_body())
+- Payloads grandes (frames, textos longos) ficam no blob store (memory.blobs):
+  o item guarda só a referência "_blob" e nem em RAM mantém o conteúdo
+- Nível frio (memory.cold_store): evict_many() tira itens da RAM para o
+  SQLite e promote() os traz de volta; get() e delete() enxergam os dois
+  níveis, o resto da API (len, snapshot, update) só o quente
+
+Formato do journal (uma operação JSON por linha):
+    {"op": "put", "item": {...}}     # insere ou substitui o item completo
+    {"op": "delete", "id": "..."}    # remove o item
+    {"op": "mark", "name": "...", "value": N}   # marca nomeada (ex: progresso de um job)
+
+Formato do snapshot: {"items": [...], "marks": {...}} (a lista pura de
+versões anteriores continua sendo lida). Cada item recebe na inserção um
+"seq" crescente (marca "seq" = último emitido), e jobs que percorrem a
+memória guardam até onde já foram como marca (ex: consolidação).
+
+O arquivo de corpos só cresce (offsets estáveis); corpos de itens removidos
+permanecem nele como lixo.
+
+Como toda operação é idempotente, o replay pode ser repetido sem
+corromper o estado (ex: queda no meio de uma compactação).
 """
 
 # =========================
@@ -15,54 +43,666 @@ Gerencia a memória persistente do NE-AI V1:
 # =========================
 import json
 import os
-from core.config import MEMORY_FILE, STORAGE_PROCESSED
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from core.rwlock import ReadWriteLock
+from memory.blobs import blob_store
+from memory.cold_store import ColdStore
+from core.config import (
+    MEMORY_FILE,
+    MEMORY_COLD_FILE,
+    MEMORY_BODIES_FILE,
+    MEMORY_JOURNAL_FILE,
+    MEMORY_COMPACT_EVERY,
+    MEMORY_JOURNAL_FSYNC,
+)
 
 # =========================
-# VARIÁVEIS GLOBAIS
+# FUNÇÕES AUXILIARES
 # =========================
-MEMORY_STORE = []  # Lista de conhecimentos carregados em memória
+
+def _replay_journal(path: str, items: dict, marks: dict) -> int:
+    """
+    Aplica as operações de um journal sobre o dicionário id → item
+    e o dicionário de marcas.
+
+    Linhas incompletas no final (queda durante a escrita) são ignoradas.
+
+    Returns:
+        int: Número de operações aplicadas
+    """
+    if not os.path.exists(path):
+        return 0
+
+    applied = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[Store] Registro corrompido ignorado no fim de {path}")
+                break
+
+            if entry.get("op") == "put":
+                item = entry["item"]
+                items[item["id"]] = item
+                marks["seq"] = max(marks.get("seq", 0), item.get("seq", 0))  # Seq nunca é reemitido
+            elif entry.get("op") == "delete":
+                items.pop(entry["id"], None)
+            elif entry.get("op") == "mark":
+                marks[entry["name"]] = entry["value"]
+            applied += 1
+    return applied
+
+def _meta(item: dict) -> dict:
+    """
+    Forma persistida de um item: sem o corpo, se ele já está no arquivo de
+    corpos ou no blob store.
+    """
+    if ("_body" in item or "_blob" in item) and "content" in item:
+        return {k: v for k, v in item.items() if k != "content"}
+    return item
+
+def public_item(item: dict) -> dict:
+    """
+    Cópia de um item com o corpo já resolvido, sem as referências internas
+    ("_body", "_blob") — forma devolvida a quem lê a memória.
+    """
+    return {k: v for k, v in item.items() if k not in ("_body", "_blob")}
+
+def _encode(entry: dict) -> Optional[str]:
+    """
+    Serializa uma operação do journal (None se o conteúdo não for serializável).
+    """
+    try:
+        return json.dumps(entry) + "\n"
+    except (TypeError, ValueError) as e:
+        print(f"[Store] Erro ao registrar operação no journal: {e}")
+        return None
 
 # =========================
-# FUNÇÕES PRINCIPAIS
+# CLASSE MEMORY STORE
 # =========================
 
-def load_memory() -> list:
+class MemoryStore:
     """
-    Carrega a memória persistente do arquivo MEMORY_FILE.
+    Memória de conhecimentos compartilhada por todas as threads do sistema.
     """
-    global MEMORY_STORE
-    if not os.path.exists(MEMORY_FILE):
-        MEMORY_STORE = []
-        print(f"[Store] Nenhum arquivo de memória encontrado. Criando novo em {MEMORY_FILE}")
-        os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-        save_memory(MEMORY_STORE)
-    else:
+    def __init__(self, memory_file: str = MEMORY_FILE, journal_file: str = MEMORY_JOURNAL_FILE,
+                 compact_every: int = MEMORY_COMPACT_EVERY, bodies_file: str = MEMORY_BODIES_FILE,
+                 cold_file: str = MEMORY_COLD_FILE):
+        """
+        Args:
+            memory_file (str): Snapshot da memória (metadados)
+            journal_file (str): Journal append-only de mutações
+            compact_every (int): Operações no journal antes de compactar
+            bodies_file (str): Arquivo append-only com os corpos dos conhecimentos
+            cold_file (str): Banco SQLite do nível frio
+        """
+        self.memory_file = memory_file
+        self.bodies_file = bodies_file
+        self.journal_file = journal_file
+        self.compacting_file = f"{journal_file}.compacting"  # Journal congelado durante a compactação
+        self.compact_every = compact_every
+
+        self._items: List[dict] = []          # Conhecimentos em memória
+        self._id_index: Dict[str, int] = {}   # id → posição em _items
+        self._lock = ReadWriteLock()          # Protege _items e _id_index
+        self._marks: Dict[str, float] = {}    # Marcas persistidas com o snapshot ("seq" e progresso de jobs)
+        self._marks_lock = threading.Lock()
+
+        self._journal_lock = threading.Lock()  # Um único escritor no arquivo
+        self._pending_lock = threading.Lock()  # Protege a fila de group commit
+        self._pending: List[str] = []          # Linhas aguardando escrita
+        self._journal_fh = None
+        self._journal_ops = 0
+        self._needs_compaction = False            # Load recuperou journal/migrou corpos: snapshot pendente
+        self._compaction_lock = threading.Lock()  # Uma compactação/snapshot por vez
+        self._compaction_hooks: List[Callable] = []
+        self._bodies_lock = threading.Lock()      # Um único escritor no arquivo de corpos
+        self._bodies_fh = None
+        self._loaded = False
+        self.cold = ColdStore(cold_file)  # Itens rebaixados (fora da RAM)
+
+    # =========================
+    # LEITURA
+    # =========================
+
+    def __len__(self) -> int:
+        with self._lock.read():
+            return len(self._items)
+
+    def __contains__(self, knowledge_id: str) -> bool:
+        with self._lock.read():
+            return knowledge_id in self._id_index
+
+    def get(self, knowledge_id: str, blobs: bool = True) -> Optional[dict]:
+        """
+        Retorna uma cópia do conhecimento com o id informado (com o corpo), ou None (O(1)).
+
+        Itens do nível frio também são encontrados (sem promovê-los). As
+        referências internas do corpo ("_body", "_blob") não são devolvidas.
+
+        Args:
+            knowledge_id (str): Id do conhecimento
+            blobs (bool): False não lê conteúdos do blob store (o item fica sem
+                content, só com a miniatura) — para listagens e viewers
+        """
+        with self._lock.read():
+            slot = self._id_index.get(knowledge_id)
+            item = dict(self._items[slot]) if slot is not None else None
+        if item is None:
+            item = self.cold.get(knowledge_id)
+        if item is None:
+            return None
+        if "content" not in item and (blobs or "_blob" not in item):
+            item["content"] = self.load_body(item)
+        return public_item(item)
+
+    def snapshot(self, bodies: bool = False, copy: bool = True) -> List[dict]:
+        """
+        Retorna cópias rasas de todos os conhecimentos (para viewers e jobs),
+        consistentes entre si e livres para iterar sem lock.
+
+        Args:
+            bodies (bool): Materializa os corpos ainda em disco (O(N) leituras);
+                blobs ficam de fora (só sob demanda, via get()/load_body())
+            copy (bool): False devolve os próprios itens, sem copiar — somente
+                leitura, para varreduras internas (ex: sincronização no warm start)
+        """
+        with self._lock.read():
+            if not copy:
+                return list(self._items)
+            items = [dict(item) for item in self._items]
+        if bodies:
+            for item in items:
+                if "content" not in item and "_blob" not in item:
+                    item["content"] = self.load_body(item)
+        return items
+
+    def load_body(self, item: dict):
+        """
+        Corpo (content) de um conhecimento, lido do arquivo de corpos ou do
+        blob store se necessário.
+        """
+        if "content" in item:
+            return item["content"]
+        if "_blob" in item:
+            return blob_store.get(item["_blob"])
+        ref = item.get("_body")
+        if ref is None:
+            return None
+        offset, length = ref
+        with open(self.bodies_file, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    # =========================
+    # ESCRITA
+    # =========================
+
+    def add(self, item: dict):
+        """
+        Adiciona um novo conhecimento e registra no journal.
+        """
+        self.add_many([item])
+
+    def add_many(self, items: Iterable[dict]):
+        """
+        Adiciona vários conhecimentos com um único lock e um único write no journal.
+        """
+        items = list(items)
+        self._stamp(items)
+        self._externalize(items)
+        lines = [_encode({"op": "put", "item": _meta(item)}) for item in items]
+        with self._lock.write():
+            for item in items:
+                self._id_index[item["id"]] = len(self._items)
+                self._items.append(_meta(item) if "_blob" in item else item)  # Blobs não ficam em RAM
+            self._enqueue(lines)
+        self._flush_journal()
+
+    def _stamp(self, items: List[dict]):
+        """
+        Atribui o "seq" de inserção aos itens que ainda não têm um.
+        """
+        new = [item for item in items if "seq" not in item]
+        with self._marks_lock:
+            first = self._marks.get("seq", 0) + 1
+            self._marks["seq"] = first + len(new) - 1
+        for seq, item in enumerate(new, first):
+            item["seq"] = seq
+
+    def get_mark(self, name: str, default: float = 0) -> float:
+        """
+        Valor de uma marca nomeada (persistida com o snapshot).
+        """
+        with self._marks_lock:
+            return self._marks.get(name, default)
+
+    def set_mark(self, name: str, value: float):
+        """
+        Grava uma marca nomeada (ex: até que "seq" um job já processou).
+        """
+        with self._lock.write():  # Serializa com a captura do snapshot na compactação
+            with self._marks_lock:
+                self._marks[name] = value
+            self._enqueue([_encode({"op": "mark", "name": name, "value": value})])
+        self._flush_journal()
+
+    def update(self, knowledge_id: str, func: Callable[[dict], None]) -> Optional[dict]:
+        """
+        Aplica `func` ao conhecimento (leitura-modificação-escrita atômica)
+        e registra o novo estado no journal.
+
+        Returns:
+            dict: Cópia do conhecimento atualizado (como em get()), ou None se não existir
+        """
+        with self._lock.write():
+            slot = self._id_index.get(knowledge_id)
+            if slot is None:
+                return None
+            item = self._items[slot]
+            func(item)
+            self._enqueue([_encode({"op": "put", "item": _meta(item)})])
+            updated = dict(item)
+        self._flush_journal()
+        if "content" not in updated:
+            updated["content"] = self.load_body(updated)
+        return public_item(updated)
+
+    def touch(self, knowledge_id: str):
+        """
+        Marca um acerto (last_seen) sem registrar no journal: a temperatura
+        usada pelos níveis da memória vai para o disco no próximo snapshot.
+        """
+        with self._lock.read():
+            slot = self._id_index.get(knowledge_id)
+            if slot is not None:
+                self._items[slot]["last_seen"] = time.time()
+
+    def delete(self, knowledge_id: str) -> bool:
+        """
+        Remove um conhecimento (de qualquer nível) e registra no journal.
+
+        O último item ocupa a posição liberada (O(1)), então a ordem de
+        inserção não é preservada após remoções.
+
+        Returns:
+            bool: True se o conhecimento existia
+        """
+        with self._lock.write():
+            removed = self._remove(knowledge_id)
+            if removed:
+                self._enqueue([_encode({"op": "delete", "id": knowledge_id})])
+        if not removed:
+            return self.cold.delete_many([knowledge_id]) > 0
+        self._flush_journal()
+        return True
+
+    def _remove(self, knowledge_id: str) -> bool:
+        """
+        Tira um item de _items/_id_index (chamar com o lock de escrita).
+        """
+        slot = self._id_index.pop(knowledge_id, None)
+        if slot is None:
+            return False
+        last = self._items.pop()
+        if slot < len(self._items):
+            self._items[slot] = last
+            self._id_index[last["id"]] = slot
+        return True
+
+    # =========================
+    # NÍVEL FRIO
+    # =========================
+
+    def evict_many(self, knowledge_ids: Iterable[str]) -> List[str]:
+        """
+        Rebaixa conhecimentos para o nível frio: saem da RAM e do snapshot
+        (no journal, como delete); corpos e blobs ficam onde estão.
+
+        Returns:
+            List[str]: Ids rebaixados (itens sem forma persistível ficam na RAM)
+        """
+        with self._lock.write():
+            items = [_meta(self._items[self._id_index[kid]]) for kid in knowledge_ids if kid in self._id_index]
+            moved = self.cold.put_many(items)
+            for knowledge_id in moved:
+                self._remove(knowledge_id)
+            self._enqueue([_encode({"op": "delete", "id": kid}) for kid in moved])
+        self._flush_journal()
+        return moved
+
+    def promote(self, knowledge_id: str) -> Optional[dict]:
+        """
+        Traz um conhecimento do nível frio de volta para a RAM.
+
+        Returns:
+            dict: Cópia do conhecimento promovido (com o corpo), ou None se não estava no nível frio
+        """
+        item = self.cold.get(knowledge_id)
+        if item is None:
+            return None
+        item["last_seen"] = time.time()
+        with self._lock.write():
+            if knowledge_id not in self._id_index:
+                self._id_index[knowledge_id] = len(self._items)
+                self._items.append(item)
+                self._enqueue([_encode({"op": "put", "item": item})])
+        self._flush_journal()
+        self.cold.delete_many([knowledge_id])  # Depois do put: numa queda, o quente prevalece
+        return self.get(knowledge_id)
+
+    def cold_count(self) -> int:
+        return len(self.cold)
+
+    # =========================
+    # CORPOS
+    # =========================
+
+    def _externalize(self, items: List[dict]):
+        """
+        Grava no arquivo de corpos o content de itens que ainda não têm "_body".
+
+        O content continua no item em RAM (itens novos costumam ser consultados
+        logo em seguida); conteúdos não serializáveis permanecem só inline.
+        """
+        lines = []
+        for item in items:
+            if "_body" in item or "_blob" in item or item.get("content") is None:
+                continue
+            try:
+                lines.append((item, (json.dumps(item["content"]) + "\n").encode("utf-8")))
+            except (TypeError, ValueError):
+                continue
+        if not lines:
+            return
+
+        with self._bodies_lock:
+            if self._bodies_fh is None:
+                os.makedirs(os.path.dirname(self.bodies_file) or ".", exist_ok=True)
+                self._bodies_fh = open(self.bodies_file, "ab")
+            offset = self._bodies_fh.seek(0, os.SEEK_END)
+            for item, data in lines:
+                item["_body"] = [offset, len(data)]
+                offset += len(data)
+            self._bodies_fh.write(b"".join(data for _, data in lines))
+            self._bodies_fh.flush()
+            if MEMORY_JOURNAL_FSYNC:
+                os.fsync(self._bodies_fh.fileno())
+
+    # =========================
+    # JOURNAL
+    # =========================
+
+    def _enqueue(self, lines: List[Optional[str]]):
+        """
+        Coloca linhas na fila do journal (chamado sob o lock de escrita,
+        preservando a ordem das mutações).
+        """
+        with self._pending_lock:
+            self._pending.extend(line for line in lines if line is not None)
+
+    def _flush_journal(self):
+        """
+        Group commit: quem obtém o lock do arquivo grava todas as linhas
+        pendentes, inclusive as de outras threads, em um único write.
+        """
+        with self._journal_lock:
+            with self._pending_lock:
+                lines, self._pending = self._pending, []
+            if lines:
+                if self._journal_fh is None:
+                    os.makedirs(os.path.dirname(self.journal_file) or ".", exist_ok=True)
+                    self._journal_fh = open(self.journal_file, "a", encoding="utf-8")
+                self._journal_fh.write("".join(lines))
+                self._journal_fh.flush()
+                if MEMORY_JOURNAL_FSYNC:
+                    os.fsync(self._journal_fh.fileno())
+                self._journal_ops += len(lines)
+            should_compact = self._journal_ops >= self.compact_every or (lines and self._needs_compaction)
+
+        if should_compact:
+            self.compact(background=True)
+
+    def _close_journal(self):
+        """
+        Fecha o handle do journal (chamado com _journal_lock).
+        """
+        if self._journal_fh is not None:
+            self._journal_fh.close()
+            self._journal_fh = None
+
+    # =========================
+    # PERSISTÊNCIA
+    # =========================
+
+    def _write_snapshot(self, items: List[dict], marks: dict):
+        """
+        Escreve o snapshot de forma atômica (arquivo temporário + os.replace).
+        """
+        os.makedirs(os.path.dirname(self.memory_file) or ".", exist_ok=True)
+        tmp_path = f"{self.memory_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"items": [_meta(item) for item in items], "marks": marks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.memory_file)
+
+    def _run_compaction_hooks(self):
+        """
+        Executa os hooks registrados após a escrita de um snapshot.
+        """
+        for hook in self._compaction_hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"[Store] Erro no hook de compactação: {e}")
+
+    def add_compaction_hook(self, func: Callable):
+        """
+        Registra uma função chamada sempre que um novo snapshot é escrito
+        (ex: persistir estruturas derivadas, como embeddings).
+        """
+        if func not in self._compaction_hooks:
+            self._compaction_hooks.append(func)
+
+    def ensure_loaded(self):
+        """
+        Carrega a memória só na primeira chamada (warm start idempotente).
+        """
+        if not self._loaded:
+            self._load()
+
+    def load(self) -> List[dict]:
+        """
+        Carrega a memória persistente: snapshot (só metadados) + replay do journal.
+
+        Snapshots antigos, com o content inline, são migrados para o arquivo de corpos.
+
+        Returns:
+            List[dict]: Snapshot da memória carregada (sem os corpos ainda em disco)
+        """
+        self._load()
+        return self.snapshot()
+
+    def _load(self):
+        """
+        Implementação de load() (sem montar o snapshot de retorno).
+        """
+        with self._lock.write():
+            with self._journal_lock:
+                self._close_journal()
+            try:
+                if os.path.exists(self.memory_file):
+                    with open(self.memory_file, "r", encoding="utf-8") as f:
+                        snapshot = json.load(f)
+                else:
+                    snapshot = {"items": []}
+            except Exception as e:
+                print(f"[Store] Erro ao carregar snapshot: {e}")
+                snapshot = {"items": []}
+
+            if isinstance(snapshot, list):
+                snapshot = {"items": snapshot}  # Formato anterior: só a lista de itens
+            marks = dict(snapshot.get("marks", {}))
+            items = {item["id"]: item for item in snapshot["items"]}
+            replayed = _replay_journal(self.compacting_file, items, marks)
+            replayed += _replay_journal(self.journal_file, items, marks)
+            self._items = list(items.values())
+            self._id_index = {item["id"]: slot for slot, item in enumerate(self._items)}
+            with self._marks_lock:
+                self._marks = marks
+            legacy = [item for item in self._items if "seq" not in item]
+            self._stamp(legacy)  # Itens anteriores ao seq: numerados na ordem de inserção
+            self._loaded = True
+
+            inline = [item for item in self._items if "_body" not in item and item.get("content") is not None]
+            self._externalize(inline)
+            for item in inline:
+                if "_body" in item:
+                    del item["content"]  # Corpo migrado: carregado sob demanda
+
+            needs_snapshot = (not os.path.exists(self.memory_file) or replayed or inline or legacy
+                              or os.path.exists(self.compacting_file))
+
+            # Queda entre gravar um nível e apagar do outro: o quente prevalece
+            duplicated = self.cold.existing(list(self._id_index))
+            if duplicated:
+                self.cold.delete_many(duplicated)
+
+        if not os.path.exists(self.memory_file):
+            print(f"[Store] Nenhum arquivo de memória encontrado. Será criado em {self.memory_file}")
+        # Carregar nunca reescreve nem apaga arquivos: o journal recuperado continua
+        # válido (é reaplicado de novo se o processo cair) e a consolidação em um
+        # snapshot limpo fica para a próxima compactação (compact_if_needed / escrita)
+        self._needs_compaction = needs_snapshot
+
+        print(f"[Store] Memória carregada com {len(self)} itens ({replayed} operações do journal)")
+
+    def save(self):
+        """
+        Salva a memória completa em um novo snapshot e descarta o journal.
+
+        Operação O(N): no fluxo normal as escritas só acrescentam ao journal.
+        """
+        with self._compaction_lock:
+            self._save()
+
+    def _save(self):
+        """
+        Implementação de save() (chamada com _compaction_lock).
+        """
         try:
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                MEMORY_STORE = json.load(f)
-            print(f"[Store] Memória carregada com {len(MEMORY_STORE)} itens")
+            with self._lock.write():
+                items = list(self._items)
+                with self._marks_lock:
+                    marks = dict(self._marks)
+                with self._journal_lock:
+                    self._write_snapshot(items, marks)
+                    self._close_journal()
+                    with self._pending_lock:
+                        self._pending = []
+                    for path in (self.journal_file, self.compacting_file):
+                        if os.path.exists(path):
+                            os.remove(path)
+                    self._journal_ops = 0
+                    self._needs_compaction = False
+            self._run_compaction_hooks()
+            print(f"[Store] Memória salva com {len(items)} itens")
         except Exception as e:
-            print(f"[Store] Erro ao carregar memória: {e}")
-            MEMORY_STORE = []
-    return MEMORY_STORE
+            print(f"[Store] Erro ao salvar memória: {e}")
+
+    def compact(self, background: bool = True):
+        """
+        Compacta o journal em um novo snapshot.
+
+        O journal atual é congelado (renomeado) e um novo começa a receber
+        operações imediatamente; o snapshot é escrito fora dos locks.
+        Se outra compactação já está em andamento, retorna sem fazer nada.
+
+        Args:
+            background (bool): Executa a escrita do snapshot em thread separada
+        """
+        if not self._compaction_lock.acquire(blocking=False):
+            return
+
+        try:
+            if os.path.exists(self.compacting_file):
+                # Compactação anterior não terminou: consolida tudo de forma síncrona
+                self._save()
+                self._compaction_lock.release()
+                return
+
+            with self._lock.write():
+                snapshot = [dict(item) for item in self._items]
+                with self._marks_lock:
+                    marks = dict(self._marks)
+                with self._journal_lock:
+                    # Linhas pendentes pertencem ao estado capturado: vão para o journal congelado
+                    with self._pending_lock:
+                        lines, self._pending = self._pending, []
+                    if lines:
+                        with open(self.journal_file, "a", encoding="utf-8") as f:
+                            f.write("".join(lines))
+                    self._close_journal()
+                    if os.path.exists(self.journal_file):
+                        os.replace(self.journal_file, self.compacting_file)
+                    self._journal_ops = 0
+                    self._needs_compaction = False
+        except Exception:
+            self._compaction_lock.release()
+            raise
+
+        def _run():
+            try:
+                self._write_snapshot(snapshot, marks)
+                if os.path.exists(self.compacting_file):
+                    os.remove(self.compacting_file)
+                self._run_compaction_hooks()
+                print(f"[Store] Journal compactado em snapshot com {len(snapshot)} itens")
+            except Exception as e:
+                print(f"[Store] Erro na compactação: {e}")
+            finally:
+                self._compaction_lock.release()
 
-def save_memory(store: list):
+        if background:
+            threading.Thread(target=_run, daemon=True).start()
+        else:
+            _run()
+
+    def compact_if_needed(self):
+        """
+        Compacta se o load deixou um snapshot pendente (job do Scheduler).
+        """
+        if self._loaded and self._needs_compaction:
+            self.compact(background=False)
+
+# =========================
+# INSTÂNCIA GLOBAL
+# =========================
+memory_store = MemoryStore()  # Única memória do processo (learner, decision, viewer, jobs)
+
+def load_memory() -> List[dict]:
     """
-    Salva a memória persistente no disco.
+    Carrega a memória persistente (uma única vez) e retorna um snapshot dos conhecimentos.
     """
-    try:
-        os.makedirs(os.path.dirname(MEMORY_FILE), exist_ok=True)
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(store, f, indent=2)
-        print(f"[Store] Memória salva com {len(store)} itens")
-    except Exception as e:
-        print(f"[Store] Erro ao salvar memória: {e}")
+    memory_store.ensure_loaded()
+    return memory_store.snapshot()
+
+def save_memory():
+    """
+    Força um snapshot completo da memória.
+    """
+    memory_store.save()
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
 # =========================
 if __name__ == "__main__":
-    # Teste de carga e salvamento
+    # Teste de carga e journal
     mem = load_memory()
     print("[Store] Conteúdo inicial:", mem)
 
@@ -75,6 +715,12 @@ if __name__ == "__main__":
         "relevance": 0.5,
         "times_seen": 1
     }
-    mem.append(test_item)
-    save_memory(mem)
-    print("[Store] Conteúdo após salvar:", mem)
+    memory_store.add(test_item)
+
+    def seen_again(item):
+        item["times_seen"] += 1
+
+    memory_store.update("abc123", seen_again)
+
+    memory_store.compact(background=False)
+    print("[Store] Conteúdo após compactar:", load_memory())
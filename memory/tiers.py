@@ -0,0 +1,181 @@
+"""
+NE-AI V1 — Tiers
+=================
+
+Memória em dois níveis com orçamento de residência:
+
+- Quente: memory_store (RAM) + EMBEDDINGS (busca indexada) + FINGERPRINTS
+  + digests em dicionário (memory.digests)
+- Fria: memory_store.cold (SQLite) + COLD_EMBEDDINGS (arquivos mapeados,
+  busca exata) + Bloom filter dos digests, consultada só quando a quente
+  não encontra nada
+
+enforce_memory_budget() (job periódico do Scheduler) rebaixa os itens mais
+frios quando a quente passa de MEMORY_HOT_MAX_ITEMS ou MEMORY_HOT_MAX_BYTES;
+promote() traz um item de volta quando ele volta a ser encontrado.
+
+Temperatura de um item: confiança × (1 + log(1 + times_seen)), com decaimento
+exponencial (meia-vida MEMORY_HEAT_HALF_LIFE) desde o último acerto.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import math
+import threading
+import time
+from typing import Dict, Optional
+from memory.store import memory_store
+from memory.embeddings import EMBEDDINGS, COLD_EMBEDDINGS, index_knowledge
+from memory.fingerprint import FINGERPRINTS, index_fingerprint
+from memory.digests import DIGESTS
+from core.config import (
+    MEMORY_HOT_MAX_ITEMS,
+    MEMORY_HOT_MAX_BYTES,
+    MEMORY_EVICT_TARGET,
+    MEMORY_HEAT_HALF_LIFE,
+)
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+_ITEM_OVERHEAD = 512          # Bytes estimados de um registro em RAM (dict + índices)
+_STARTED = time.time()        # Itens antigos, sem last_seen, envelhecem a partir daqui
+_tier_lock = threading.Lock() # Um rebaixamento/promoção por vez
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def heat(item: dict, now: float) -> float:
+    """
+    Temperatura de um conhecimento: quanto maior, mais motivo para ficar na RAM.
+    """
+    confidence = item.get("confidence") or 0.0
+    times_seen = item.get("times_seen") or 0
+    age = max(0.0, now - (item.get("last_seen") or _STARTED))
+    return confidence * (1.0 + math.log1p(times_seen)) * 0.5 ** (age / MEMORY_HEAT_HALF_LIFE)
+
+def item_bytes(item: dict) -> int:
+    """
+    Estimativa dos bytes que um conhecimento ocupa na RAM (registro + embedding).
+    """
+    size = _ITEM_OVERHEAD + len(item.get("thumbnail") or "")
+    content = item.get("content")
+    if isinstance(content, str):
+        size += len(content)
+    matrix = EMBEDDINGS.get(item.get("type"))
+    if matrix is not None:
+        size += matrix.row_nbytes(item["id"])
+    return size
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def enforce_memory_budget(max_items: int = MEMORY_HOT_MAX_ITEMS, max_bytes: int = MEMORY_HOT_MAX_BYTES,
+                          target: float = MEMORY_EVICT_TARGET) -> int:
+    """
+    Rebaixa os conhecimentos mais frios até a memória quente voltar a
+    `target` × orçamento (itens e bytes).
+
+    Args:
+        max_items (int): Máximo de conhecimentos na RAM
+        max_bytes (int): Máximo estimado de bytes na RAM
+        target (float): Fração do orçamento a atingir após rebaixar
+
+    Returns:
+        int: Nº de conhecimentos rebaixados
+    """
+    with _tier_lock:
+        items = memory_store.snapshot(copy=False)
+        sizes = [item_bytes(item) for item in items]
+        total = sum(sizes)
+        if len(items) <= max_items and total <= max_bytes:
+            return 0
+
+        now = time.time()
+        order = sorted(range(len(items)), key=lambda i: heat(items[i], now))
+        count, evict = len(items), []
+        for i in order:
+            if count <= max_items * target and total <= max_bytes * target:
+                break
+            evict.append(items[i])
+            count -= 1
+            total -= sizes[i]
+
+        # Embeddings primeiro: numa queda, o item continua quente e a cópia fria é descartada
+        for item in evict:
+            hot, cold = EMBEDDINGS.get(item.get("type")), COLD_EMBEDDINGS.get(item.get("type"))
+            vector = hot.vector(item["id"]) if hot is not None else None
+            if vector is not None and cold is not None:
+                cold.add(item["id"], vector)
+
+        moved = memory_store.evict_many([item["id"] for item in evict])
+        types = {item["id"]: item.get("type") for item in evict}
+        for knowledge_id in moved:
+            matrix = EMBEDDINGS.get(types[knowledge_id])
+            if matrix is not None:
+                matrix.remove(knowledge_id)
+            FINGERPRINTS.remove(knowledge_id)
+            DIGESTS.evict(knowledge_id)
+        for matrix in EMBEDDINGS.values():
+            matrix.compact()
+
+    print(f"[Tiers] {len(moved)} conhecimentos rebaixados para o nível frio "
+          f"({memory_store.cold_count()} frios, {len(memory_store)} quentes)")
+    return len(moved)
+
+def promote(knowledge_id: str) -> Optional[dict]:
+    """
+    Traz um conhecimento do nível frio de volta à memória quente (registro,
+    embedding e fingerprint).
+
+    Returns:
+        dict: Conhecimento promovido (ou o quente, se já estava na RAM), ou None
+    """
+    with _tier_lock:
+        item = memory_store.promote(knowledge_id)
+        if item is None:
+            return memory_store.get(knowledge_id)
+
+        hot, cold = EMBEDDINGS.get(item.get("type")), COLD_EMBEDDINGS.get(item.get("type"))
+        vector = cold.vector(knowledge_id) if cold is not None else None
+        if vector is not None and hot is not None and hot.dim == cold.dim:
+            hot.add(knowledge_id, vector)
+        else:
+            index_knowledge(item)  # Sem vetor frio compatível → revetoriza
+        if cold is not None:
+            cold.remove(knowledge_id)
+        index_fingerprint(item)
+        DIGESTS.add(item)
+
+    print(f"[Tiers] Conhecimento promovido: {knowledge_id}")
+    return item
+
+def forget_cold(knowledge_id: str):
+    """
+    Remove o embedding frio de um conhecimento (o registro sai em memory_store.delete()).
+    """
+    for matrix in COLD_EMBEDDINGS.values():
+        matrix.remove(knowledge_id)
+
+def tier_stats() -> Dict:
+    """
+    Tamanho dos dois níveis.
+    """
+    return {
+        "hot": len(memory_store),
+        "cold": memory_store.cold_count(),
+        "cold_vectors": {modality: len(matrix) for modality, matrix in COLD_EMBEDDINGS.items()},
+    }
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    now = time.time()
+    fresh = {"confidence": 0.9, "times_seen": 5, "last_seen": now}
+    stale = {"confidence": 0.9, "times_seen": 5, "last_seen": now - 4 * MEMORY_HEAT_HALF_LIFE}
+    print(f"[Tiers] Temperatura recente: {heat(fresh, now):.3f} | antiga: {heat(stale, now):.3f}")
+    print("[Tiers] Níveis:", tier_stats())
@@ -8,51 +8,295 @@ para armazenar e buscar similaridade:
 - Textos → embeddings vetoriais
 - Imagens → vetores simplificados (placeholder para futuras integrações)
 - Permite comparações de similaridade para aprendizado e decisões
+
+Modos de texto (VECTORIZER_MODE):
+- "hashing": feature hashing sem estado, dimensão fixa (HASHING_N_FEATURES).
+  Não precisa de corpus ajustado, palavras novas são vetorizadas normalmente
+  e vetores salvos há meses continuam comparáveis com os de hoje.
+  Opcionalmente pondera a busca por IDF, mantido incrementalmente e aplicado
+  só na hora da busca (os vetores armazenados guardam apenas TF, então o IDF
+  pode mudar à vontade sem revetorizar a memória).
+- "tfidf": TfidfVectorizer do scikit-learn (exige fit_text_corpus() antes)
+
+Vetores de texto são esparsos (scipy.sparse.csr_matrix de 1 linha): só as
+dimensões não nulas ocupam memória, mesmo com vocabulários de milhões.
+
+Ambos os vetorizadores passam por um cache LRU endereçado por conteúdo
+(memory/embedding_cache.py); o mesmo texto ou frame não é vetorizado duas vezes.
+Os vetores devolvidos são compartilhados com o cache: não alterar no lugar.
 """
 
 # =========================
 # IMPORTAÇÕES
 # =========================
+import hashlib
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional
+import cv2
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from memory.embedding_cache import EmbeddingCache, content_digest
+from core.config import (
+    VECTORIZER_MODE,
+    VECTORIZER_STATE_FILE,
+    HASHING_N_FEATURES,
+    HASHING_NGRAM_MAX,
+    HASHING_USE_IDF,
+)
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:  # scikit-learn só é necessário no modo "tfidf"
+    TfidfVectorizer = None
 
 # =========================
 # VARIÁVEIS GLOBAIS
 # =========================
-tfidf_vectorizer = TfidfVectorizer()  # Vetorizador TF-IDF para textos
-text_corpus = []                       # Corpus para ajustar o vetor
+tfidf_vectorizer = None  # Vetorizador TF-IDF para textos (modo "tfidf")
+text_corpus = []         # Corpus para ajustar o vetor
+
+_TOKEN_RE = re.compile(r"\w+")
+
+embedding_cache = EmbeddingCache()  # Cache de embeddings (texto e imagem)
+_tfidf_fits = 0                     # Versão do modelo TF-IDF (muda a cada fit)
+
+# Frequência de documento por bucket do hashing (IDF incremental das consultas)
+document_frequency = np.zeros(HASHING_N_FEATURES, dtype=np.int32)
+document_count = 0
+_idf_lock = threading.Lock()
+
+# =========================
+# FUNÇÕES DE TEXTO — HASHING
+# =========================
+
+def _tokens(text: str) -> List[str]:
+    """
+    Palavras (minúsculas) e n-gramas de palavras até HASHING_NGRAM_MAX.
+    """
+    words = _TOKEN_RE.findall(text.lower())
+    tokens = list(words)
+    for n in range(2, HASHING_NGRAM_MAX + 1):
+        tokens.extend(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return tokens
+
+@lru_cache(maxsize=65536)
+def _feature(token: str):
+    """
+    Bucket e sinal de um token.
+
+    Usa blake2b (estável entre execuções e máquinas, ao contrário de hash()).
+    O sinal derivado do hash faz colisões se cancelarem em média.
+    """
+    h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % HASHING_N_FEATURES, (1.0 if h >> 63 else -1.0)
+
+def hash_text(text: str) -> sp.csr_matrix:
+    """
+    Vetoriza um texto por feature hashing (TF sublinear: 1 + log(tf)).
+
+    Args:
+        text (str): Texto
+
+    Returns:
+        sp.csr_matrix: Vetor (1, HASHING_N_FEATURES)
+    """
+    weights = {}
+    for token, tf in Counter(_tokens(text)).items():
+        bucket, sign = _feature(token)
+        weights[bucket] = weights.get(bucket, 0.0) + sign * (1.0 + np.log(tf))
+
+    buckets = np.fromiter(sorted(weights), dtype=np.int32, count=len(weights))
+    data = np.array([weights[b] for b in buckets], dtype=np.float32)
+    vector = sp.csr_matrix((data, buckets, np.array([0, len(buckets)])), shape=(1, HASHING_N_FEATURES))
+    vector.eliminate_zeros()  # Colisões de sinal oposto podem se anular
+    return vector
+
+def observe_text_vector(vector: np.ndarray):
+    """
+    Atualiza o IDF incremental com um documento armazenado.
+
+    Args:
+        vector (sp.csr_matrix): Vetor de hash_text() do documento
+    """
+    global document_count
+    if VECTORIZER_MODE != "hashing" or not HASHING_USE_IDF:
+        return
+    with _idf_lock:
+        document_frequency[sp.csr_matrix(vector).indices] += 1
+        document_count += 1
+
+def idf_weights(buckets: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Pesos IDF atuais dos buckets informados: log((1 + N) / (1 + df)) + 1.
+
+    Usado pela matriz esparsa de textos para ponderar, na busca, tanto as
+    consultas quanto as linhas armazenadas (coseno TF-IDF de verdade).
+
+    Returns:
+        np.ndarray: Pesos por bucket, ou None se o IDF estiver desligado/vazio
+    """
+    if VECTORIZER_MODE != "hashing" or not HASHING_USE_IDF or document_count == 0:
+        return None
+    with _idf_lock:
+        df = document_frequency[buckets]
+        return (np.log((1.0 + document_count) / (1.0 + df)) + 1.0).astype(np.float32)
+
+def reset_idf():
+    """
+    Zera o IDF incremental (ex: a matriz de texto será reconstruída).
+    """
+    global document_count
+    with _idf_lock:
+        document_frequency[:] = 0
+        document_count = 0
+
+def idf_version() -> int:
+    """
+    Versão do IDF (nº de documentos observados); muda a cada atualização.
+    """
+    return document_count
 
 # =========================
-# FUNÇÕES DE TEXTO
+# FUNÇÕES DE TEXTO — TF-IDF (scikit-learn)
 # =========================
 
 def fit_text_corpus(texts):
     """
-    Ajusta o vetor TF-IDF a partir de um corpus de textos.
+    Ajusta o vetor TF-IDF a partir de um corpus de textos (modo "tfidf").
 
     Args:
         texts (List[str]): Lista de textos
     """
-    global tfidf_vectorizer, text_corpus
+    global tfidf_vectorizer, text_corpus, _tfidf_fits
+    if TfidfVectorizer is None:
+        raise ImportError("scikit-learn não instalado; use VECTORIZER_MODE = 'hashing'")
+    tfidf_vectorizer = TfidfVectorizer()
     text_corpus = texts.copy()
     tfidf_vectorizer.fit(text_corpus)
+    _tfidf_fits += 1
+    embedding_cache.invalidate()  # Vetores antigos não valem para o novo vocabulário
     print("[Vectorizer] Corpus de texto ajustado com", len(text_corpus), "itens")
 
-def vectorize_text(text: str) -> np.ndarray:
+def vectorize_text(text: str) -> sp.csr_matrix:
     """
-    Converte um texto em vetor TF-IDF.
+    Converte um texto em vetor (hashing ou TF-IDF, conforme VECTORIZER_MODE).
 
     Args:
         text (str): Texto a ser vetorizar
 
     Returns:
-        np.ndarray: Vetor TF-IDF
+        sp.csr_matrix: Vetor esparso (1, d) do texto
     """
-    if not text_corpus:
+    if VECTORIZER_MODE == "hashing":
+        key = ("text", text_model_version(), content_digest(text))
+        return embedding_cache.get_or_compute(key, lambda: hash_text(text))
+
+    if tfidf_vectorizer is None:
         raise ValueError("Corpus não ajustado. Use fit_text_corpus() primeiro.")
 
-    vector = tfidf_vectorizer.transform([text]).toarray()[0]
-    return vector
+    key = ("text", text_model_version(), content_digest(text))
+    # Já é CSR; não densifica
+    return embedding_cache.get_or_compute(key, lambda: tfidf_vectorizer.transform([text]).astype(np.float32))
+
+def text_model_version() -> str:
+    """
+    Identifica o modelo de texto atual (parte da chave do cache de embeddings).
+    """
+    if VECTORIZER_MODE == "hashing":
+        return f"hashing-{HASHING_N_FEATURES}-{HASHING_NGRAM_MAX}"
+    return f"tfidf-{_tfidf_fits}"
+
+def text_dimension() -> Optional[int]:
+    """
+    Dimensão dos vetores de texto no modo atual (None se ainda indefinida).
+    """
+    if VECTORIZER_MODE == "hashing":
+        return HASHING_N_FEATURES
+    if tfidf_vectorizer is not None:
+        return len(tfidf_vectorizer.vocabulary_)
+    return None
+
+# =========================
+# PERSISTÊNCIA DO ESTADO
+# =========================
+
+def save_vectorizer_state(path: str = VECTORIZER_STATE_FILE):
+    """
+    Salva o estado do vetorizador de texto (parte do snapshot de warm start):
+
+    - "hashing": frequências de documento não nulas do IDF incremental
+    - "tfidf": vocabulário (termos na ordem das colunas) e IDF do modelo ajustado
+    """
+    if VECTORIZER_MODE == "hashing":
+        if not HASHING_USE_IDF:
+            return
+        with _idf_lock:
+            buckets = np.flatnonzero(document_frequency).astype(np.int32)
+            state = {
+                "buckets": buckets,
+                "counts": document_frequency[buckets].astype(np.int32),
+                "document_count": document_count,
+                "n_features": HASHING_N_FEATURES,
+            }
+    else:
+        if tfidf_vectorizer is None:
+            return
+        vocabulary = tfidf_vectorizer.vocabulary_
+        state = {
+            "terms": np.array(sorted(vocabulary, key=vocabulary.get)),
+            "idf": tfidf_vectorizer.idf_.astype(np.float32),
+        }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, mode=VECTORIZER_MODE, **state)
+    os.replace(tmp_path, path)
+
+def load_vectorizer_state(path: str = VECTORIZER_STATE_FILE, idf: bool = True) -> bool:
+    """
+    Restaura o estado salvo por save_vectorizer_state(), sem refit.
+
+    Args:
+        path (str): Arquivo de estado
+        idf (bool): No modo "hashing", restaura também o IDF incremental
+            (só faz sentido junto com a matriz de texto que o gerou)
+
+    Returns:
+        bool: True se havia estado compatível persistido
+    """
+    global document_count, tfidf_vectorizer, _tfidf_fits
+    if not os.path.exists(path):
+        return False
+    with np.load(path) as data:
+        if str(data["mode"]) != VECTORIZER_MODE:
+            print("[Vectorizer] Estado salvo em outro VECTORIZER_MODE, ignorando")
+            return False
+        state = {name: data[name] for name in data.files}
+
+    if VECTORIZER_MODE == "hashing":
+        if not (HASHING_USE_IDF and idf):
+            return False
+        if int(state["n_features"]) != HASHING_N_FEATURES:
+            print("[Vectorizer] Estado do IDF com dimensão diferente, ignorando")
+            return False
+        with _idf_lock:
+            document_frequency[:] = 0
+            document_frequency[state["buckets"]] = state["counts"]
+            document_count = int(state["document_count"])
+        return True
+
+    if TfidfVectorizer is None:
+        return False
+    restored = TfidfVectorizer(vocabulary={str(t): i for i, t in enumerate(state["terms"])})
+    restored.idf_ = state["idf"].astype(np.float64)
+    tfidf_vectorizer = restored
+    _tfidf_fits += 1
+    embedding_cache.invalidate()
+    return True
 
 # =========================
 # FUNÇÕES DE IMAGEM (placeholder)
@@ -68,11 +312,13 @@ def vectorize_image(image_array: np.ndarray) -> np.ndarray:
     Returns:
         np.ndarray: vetor flatten da imagem redimensionada
     """
-    # Reduz tamanho para 32x32 e flatten
-    resized = cv2.resize(image_array, (32, 32))
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-    vector = gray.flatten() / 255.0  # Normaliza valores entre 0 e 1
-    return vector
+    def _compute():
+        # Reduz tamanho para 32x32 e flatten
+        resized = cv2.resize(image_array, (32, 32))
+        gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+        return gray.flatten() / 255.0  # Normaliza valores entre 0 e 1
+
+    return embedding_cache.get_or_compute(("vision", "gray32", content_digest(image_array)), _compute)
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
@@ -80,12 +326,19 @@ def vectorize_image(image_array: np.ndarray) -> np.ndarray:
 if __name__ == "__main__":
     # Teste de texto
     texts = ["Botão iniciar", "Abrir janela", "Enviar dados"]
-    fit_text_corpus(texts)
+    for t in texts:
+        observe_text_vector(vectorize_text(t))
     vec = vectorize_text("Abrir janela")
-    print("[Vectorizer] Vetor de 'Abrir janela':", vec[:10], "...")  # Mostra primeiros 10 valores
+    print("[Vectorizer] Vetor de 'Abrir janela':", vec.indices[:10], "...")  # Buckets ativos
+    query = vectorize_text("abrir nova janela")
+    dot = query.multiply(vec).sum()
+    print("[Vectorizer] Similaridade consulta × 'Abrir janela':",
+          float(dot / (np.linalg.norm(query.data) * np.linalg.norm(vec.data))))
 
     # Teste de imagem (usando numpy fake)
     import numpy as np
     dummy_img = np.random.randint(0, 255, (64, 64, 3), dtype=np.uint8)
     vec_img = vectorize_image(dummy_img)
     print("[Vectorizer] Vetor de imagem shape:", vec_img.shape)
+    vectorize_image(dummy_img)
+    print("[Vectorizer] Cache:", embedding_cache.stats())
@@ -9,13 +9,56 @@ Funcionalidades:
 - Evita processamento repetitivo de frames quase iguais
 - Pode ser usado tanto em streaming quanto em vídeo pré-gravado
 - Integração com inputs/screen_stream.py e video_stream.py
+- FrameChangeDetector: mantém o frame de referência já reduzido e informa
+  quais tiles (FRAME_TILE_SIZE px) mudaram e as caixas das regiões alteradas,
+  para OCR/vetorização trabalharem só no que mudou
+
+Custo por tick do detector: uma redução do frame atual (cada tile vira
+FRAME_TILE_CELLS × FRAME_TILE_CELLS pixels de cinza) e uma diferença sobre
+essa imagem pequena — o frame anterior nunca é reprocessado.
 """
 
 # =========================
 # IMPORTAÇÕES
 # =========================
+import threading
+from typing import Dict, List, Optional, Tuple
 import cv2
 import numpy as np
+from core.config import (
+    FRAME_SIMILARITY_THRESHOLD,
+    FRAME_TILE_SIZE,
+    FRAME_TILE_CELLS,
+    FRAME_PIXEL_DELTA,
+    FRAME_TILE_CHANGED_RATIO,
+)
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+_last_small = (None, None)   # (último last_frame, sua versão 64x64 em cinza)
+_last_lock = threading.Lock()
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def _small_gray(frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Reduz e converte para cinza (reduzir antes: a conversão roda na imagem pequena).
+    """
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return small
+
+def tile_rect(row: int, col: int, shape: tuple, tile_size: int = FRAME_TILE_SIZE) -> Tuple[int, int, int, int]:
+    """
+    Retângulo (x, y, w, h) de um tile no frame original (tiles da borda são menores).
+    """
+    height, width = shape[:2]
+    x, y = col * tile_size, row * tile_size
+    return x, y, min(tile_size, width - x), min(tile_size, height - y)
 
 # =========================
 # FUNÇÕES PRINCIPAIS
@@ -38,13 +81,15 @@ def is_frame_unique(current_frame: np.ndarray, last_frame: np.ndarray, threshold
     if last_frame is None:
         return True
 
-    # Reduz tamanho para acelerar comparação (ex: 64x64)
-    small_current = cv2.resize(current_frame, (64, 64))
-    small_last = cv2.resize(last_frame, (64, 64))
-
-    # Converte para escala de cinza
-    gray_current = cv2.cvtColor(small_current, cv2.COLOR_BGR2GRAY)
-    gray_last = cv2.cvtColor(small_last, cv2.COLOR_BGR2GRAY)
+    # Reduz tamanho para acelerar comparação (ex: 64x64) e converte para cinza;
+    # a versão reduzida do último frame é reaproveitada entre chamadas
+    global _last_small
+    gray_current = _small_gray(current_frame, (64, 64))
+    with _last_lock:
+        cached_frame, gray_last = _last_small
+        if cached_frame is not last_frame or gray_last.shape != gray_current.shape:
+            gray_last = _small_gray(last_frame, (64, 64))
+            _last_small = (last_frame, gray_last)
 
     # Calcula diferença absoluta entre frames
     diff = cv2.absdiff(gray_current, gray_last)
@@ -61,29 +106,127 @@ def is_frame_unique(current_frame: np.ndarray, last_frame: np.ndarray, threshold
         return True   # Frame único
 
 # =========================
-# FUNÇÃO DE TESTE ISOLADO
+# CLASSE FRAME CHANGE DETECTOR
 # =========================
-if __name__ == "__main__":
-    import cv2
-
-    # Carrega dois frames de exemplo (ou use webcam)
-    cap = cv2.VideoCapture(0)  # Webcam
-
-    last = None
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
 
-        if is_frame_unique(frame, last):
-            print("[FrameFilter] Frame único detectado")
-            last = frame.copy()
-        else:
-            print("[FrameFilter] Frame repetido ignorado")
+class FrameChangeDetector:
+    """
+    Detector de mudanças entre frames com estado: guarda a referência (último
+    frame aceito) já reduzida, um pixel-bloco por tile.
 
-        cv2.imshow("Frame Filter Test", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    A referência só é trocada quando um frame é aceito, como no fluxo de
+    is_frame_unique(): mudanças pequenas e graduais se acumulam até passar
+    do threshold, e o mapa de tiles descreve tudo que mudou desde o último
+    frame processado.
+    """
+    def __init__(self, threshold: float = FRAME_SIMILARITY_THRESHOLD, tile_size: int = FRAME_TILE_SIZE,
+                 cells: int = FRAME_TILE_CELLS, pixel_delta: int = FRAME_PIXEL_DELTA,
+                 tile_ratio: float = FRAME_TILE_CHANGED_RATIO):
+        """
+        Args:
+            threshold (float): Similaridade acima da qual o frame é considerado repetido
+            tile_size (int): Lado de um tile no frame original (pixels)
+            cells (int): Lado de um tile na imagem reduzida (pixels)
+            pixel_delta (int): Diferença de cinza tolerada por pixel
+            tile_ratio (float): Fração de pixels diferentes que marca um tile como alterado
+        """
+        self.threshold = threshold
+        self.tile_size = tile_size
+        self.cells = cells
+        self.pixel_delta = pixel_delta
+        self.tile_ratio = tile_ratio
+        self.reset()
+
+    def reset(self):
+        self.reference: Optional[np.ndarray] = None   # Último frame aceito, reduzido (cinza)
+        self.shape: Optional[tuple] = None            # (altura, largura) do frame original
+        self.grid: Tuple[int, int] = (0, 0)           # (linhas, colunas) de tiles
+
+    def _reduce(self, frame: np.ndarray) -> np.ndarray:
+        rows, cols = self.grid
+        return _small_gray(frame, (cols * self.cells, rows * self.cells))
+
+    def update(self, frame: np.ndarray) -> Dict:
+        """
+        Compara um frame com a referência e, se ele for aceito, passa a usá-lo
+        como nova referência.
+
+        Args:
+            frame (np.ndarray): Frame atual (BGR)
+
+        Returns:
+            dict: {
+                "changed": bool — frame suficientemente diferente (processar),
+                "similarity": float — fração de pixels iguais (imagem reduzida),
+                "tiles": np.ndarray — (linhas, colunas) bool, tiles alterados,
+                "boxes": [(x, y, w, h)] — regiões alteradas no frame original
+                         (tiles vizinhos agrupados)
+            }
+        """
+        shape = frame.shape[:2]
+        if shape != self.shape:
+            # Primeiro frame (ou mudança de resolução): tudo mudou
+            self.shape = shape
+            self.grid = (-(-shape[0] // self.tile_size), -(-shape[1] // self.tile_size))
+            self.reference = self._reduce(frame)
+            tiles = np.ones(self.grid, dtype=bool)
+            return {"changed": True, "similarity": 0.0, "tiles": tiles, "boxes": [(0, 0, shape[1], shape[0])]}
+
+        current = self._reduce(frame)
+        different = cv2.absdiff(current, self.reference) > self.pixel_delta
+        similarity = 1.0 - np.count_nonzero(different) / different.size
+        rows, cols = self.grid
+        ratios = different.reshape(rows, self.cells, cols, self.cells).mean(axis=(1, 3))
+        tiles = ratios >= self.tile_ratio if self.tile_ratio > 0 else ratios > 0
+
+        changed = similarity <= self.threshold
+        if changed:
+            self.reference = current
+        return {"changed": changed, "similarity": similarity, "tiles": tiles, "boxes": self.boxes(tiles)}
+
+    def boxes(self, tiles: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Caixas (x, y, w, h) no frame original de cada grupo de tiles alterados
+        vizinhos (conectividade 8).
+        """
+        if not tiles.any():
+            return []
+        count, _, stats, _ = cv2.connectedComponentsWithStats(tiles.astype(np.uint8), connectivity=8)
+        height, width = self.shape
+        result = []
+        for col, row, n_cols, n_rows, _ in stats[1:count]:
+            x, y = int(col) * self.tile_size, int(row) * self.tile_size
+            result.append((x, y, min(int(n_cols) * self.tile_size, width - x),
+                           min(int(n_rows) * self.tile_size, height - y)))
+        return result
 
-    cap.release()
-    cv2.destroyAllWindows()
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import time
+
+    # Tela sintética 1080p: estática, depois um "relógio" muda no canto
+    screen = np.full((1080, 1920, 3), 40, dtype=np.uint8)
+    cv2.putText(screen, "Documento aberto", (200, 300), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 5)
+
+    detector = FrameChangeDetector()
+    print("[FrameFilter] Primeiro frame:", detector.update(screen)["boxes"])
+
+    start = time.perf_counter()
+    for _ in range(100):
+        result = detector.update(screen)
+    elapsed = (time.perf_counter() - start) / 100
+    print(f"[FrameFilter] Tela estática: changed={result['changed']} | {elapsed * 1000:.2f} ms por frame")
+
+    clock = screen.copy()
+    cv2.putText(clock, "12:34", (1700, 1050), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    result = detector.update(clock)
+    print(f"[FrameFilter] Relógio: changed={result['changed']} similarity={result['similarity']:.4f} "
+          f"tiles={int(result['tiles'].sum())} boxes={result['boxes']}")
+
+    window = clock.copy()
+    cv2.rectangle(window, (300, 400), (1200, 900), (200, 200, 200), -1)
+    result = detector.update(window)
+    print(f"[FrameFilter] Janela nova: changed={result['changed']} boxes={result['boxes']}")
+    print("[FrameFilter] is_frame_unique:", is_frame_unique(window, screen), is_frame_unique(screen, screen))
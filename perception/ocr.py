@@ -9,32 +9,239 @@ Funcionalidades:
 - Recebe imagem (numpy array) e retorna texto detectado
 - Integração direta com learner e text_normalizer
 - Pode ser usado em conjunto com frame_filter para evitar processamento desnecessário
+- OCR incremental de telas (IncrementalOCR): o frame é dividido em regiões
+  de texto (perception/text_regions.py) e cada região tem seu texto em cache
+  pelo hash dos pixels — só regiões novas ou alteradas passam pelo Tesseract,
+  e os textos são recompostos em ordem de leitura
+- Com as regiões alteradas do FrameChangeDetector (extract_text_from_frame(
+  frame, changes)), só as áreas sujas são re-detectadas e re-hasheadas; as
+  regiões do frame anterior fora delas são reaproveitadas com o texto que já tinham
+- O Tesseract só vê os recortes de texto, normalizados em escala e lidos em
+  lote (folhas empilhadas) pelo serviço de OCR (perception/ocr_service.py)
+- Regiões fora do cache em RAM consultam o cache persistente
+  (perception/ocr_cache.py) antes do Tesseract: telas já vistas em sessões
+  anteriores não são relidas
+
+Com isso, o custo de OCR de um frame acompanha o quanto da tela mudou (um
+relógio, o cursor, uma linha nova), não o tamanho da tela.
 """
 
 # =========================
 # IMPORTAÇÕES
 # =========================
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import cv2
-import pytesseract  # Biblioteca OCR
 import numpy as np
 from perception.text_normalizer import normalize_text  # Normaliza o texto extraído
+from perception.text_regions import (  # Recortes de texto
+    detect_text_regions, text_boxes, prepare_region, read_regions, reading_order,
+)
+from perception.ocr_cache import OCR_CACHE, ocr_hash  # Cache persistente (hash perceptual → texto)
+from memory.embedding_cache import content_digest
+from core.config import (
+    OCR_LANG,
+    OCR_BLOCK_PADDING,
+    OCR_BLOCK_CACHE_SIZE,
+    OCR_REGION_JOIN_WIDTH,
+)
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def _to_gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+def _overlaps(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+def _union(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    x, y = min(a[0], b[0]), min(a[1], b[1])
+    return x, y, max(a[0] + a[2], b[0] + b[2]) - x, max(a[1] + a[3], b[1] + b[3]) - y
+
+def _dirty_areas(boxes: List[Tuple[int, int, int, int]], regions: List[Tuple[int, int, int, int]],
+                 shape: tuple, margin: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+    """
+    Áreas a re-detectar: as caixas alteradas com uma margem (x, y), crescidas
+    até conter as regiões conhecidas que tocam (uma linha de texto que cruza
+    um tile alterado é relida inteira) e unidas quando se sobrepõem.
+    """
+    height, width = shape
+    areas = []
+    for x, y, w, h in boxes:
+        x0, y0 = max(0, x - margin[0]), max(0, y - margin[1])
+        areas.append((x0, y0, min(width, x + w + margin[0]) - x0, min(height, y + h + margin[1]) - y0))
+
+    changed = True
+    while changed:
+        changed = False
+        merged = []
+        for area in areas:
+            for i, other in enumerate(merged):
+                if _overlaps(area, other):
+                    merged[i], changed = _union(area, other), True
+                    break
+            else:
+                merged.append(area)
+        for i, area in enumerate(merged):
+            for region in regions:
+                if _overlaps(area, region) and _union(area, region) != area:
+                    area, changed = _union(area, region), True
+            merged[i] = area
+        areas = merged
+    return areas
+
+# =========================
+# CLASSE INCREMENTAL OCR
+# =========================
+
+class IncrementalOCR:
+    """
+    OCR por regiões de texto com cache LRU do texto de cada região (chave:
+    digest dos pixels em cinza do recorte). Uma região idêntica a uma já
+    lida, em qualquer posição e em qualquer frame, não volta ao Tesseract.
+
+    Guarda também as regiões (caixa → texto) do último frame: com as caixas
+    alteradas desde ele, o próximo extract() só processa as áreas sujas.
+    """
+    def __init__(self, cache_size: int = OCR_BLOCK_CACHE_SIZE, padding: int = OCR_BLOCK_PADDING):
+        """
+        Args:
+            cache_size (int): Máximo de textos de regiões em cache
+            padding (int): Margem em volta de cada região recortada
+        """
+        self.cache_size = cache_size
+        self.padding = padding
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._frame_shape: Optional[tuple] = None
+        self._frame_regions: Dict[Tuple[int, int, int, int], str] = {}  # Último frame: caixa → texto
+        self._frame_order: List[Tuple[int, int, int, int]] = []         # Suas caixas em ordem de leitura
+
+    def _cached(self, key: str):
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return text
+
+    def _store(self, key: str, text: str):
+        with self._lock:
+            self._cache[key] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def extract(self, frame: np.ndarray, dirty: Optional[List[Tuple[int, int, int, int]]] = None) -> str:
+        """
+        Texto normalizado de um frame, relendo só as regiões que não estão em cache.
+
+        As regiões fora do cache em RAM são procuradas no OCR_CACHE; as que
+        faltarem são lidas em lote (read_regions) e o resultado é montado na
+        ordem de leitura.
+
+        Args:
+            frame (np.ndarray): Imagem em BGR (ou cinza)
+            dirty (list, opcional): Caixas (x, y, w, h) alteradas desde o frame
+                anterior passado a esta instância (FrameChangeDetector.update()
+                ["boxes"]); None = detecta no frame inteiro
+
+        Returns:
+            str: Textos das regiões em ordem de leitura
+        """
+        height, width = frame.shape[:2]
+        with self._lock:
+            previous = self._frame_regions if self._frame_shape == (height, width) else None
+            previous_order = self._frame_order
+
+        full = dirty is None or previous is None
+        if full:
+            source = _to_gray(frame)
+            kept, boxes = {}, detect_text_regions(source)
+        else:
+            # Só as áreas sujas são convertidas, detectadas e hasheadas
+            source = frame
+            areas = _dirty_areas(dirty, list(previous), (height, width),
+                                 (self.padding + OCR_REGION_JOIN_WIDTH, self.padding))
+            kept = {box: text for box, text in previous.items() if not any(_overlaps(box, a) for a in areas)}
+            boxes = []
+            for ax, ay, aw, ah in areas:
+                found = text_boxes(_to_gray(frame[ay:ay + ah, ax:ax + aw]))
+                boxes.extend((ax + x, ay + y, w, h) for x, y, w, h in found.tolist())
+
+        pad = self.padding
+        regions, pending = dict(kept), []
+        for x, y, w, h in boxes:
+            crop = _to_gray(source[max(0, y - pad):min(height, y + h + pad), max(0, x - pad):min(width, x + w + pad)])
+            key = content_digest(crop)
+            text = self._cached(key)
+            if text is None:
+                prepared = prepare_region(crop)
+                persistent_key = f"region:{OCR_LANG}:{ocr_hash(prepared)}"
+                text = OCR_CACHE.get(persistent_key)
+                if text is not None:
+                    self._store(key, text)
+                else:
+                    pending.append(((x, y, w, h), key, persistent_key, prepared))
+            regions[(x, y, w, h)] = text
+
+        if pending:
+            raw_texts = read_regions([prepared for _, _, _, prepared in pending], lang=OCR_LANG)
+            for (box, key, persistent_key, _), raw_text in zip(pending, raw_texts):
+                # Normaliza o texto (minúsculas, sem caracteres especiais)
+                regions[box] = normalize_text(raw_text)
+                self._store(key, regions[box])
+                OCR_CACHE.put(persistent_key, regions[box])
+
+        if full:
+            order = boxes
+        elif regions.keys() == previous.keys():
+            order = previous_order  # Mesmas caixas (ex: só o texto do relógio mudou)
+        else:
+            order = reading_order(np.array(list(regions)), (height, width))
+        with self._lock:
+            self._frame_shape, self._frame_regions, self._frame_order = (height, width), regions, order
+        return " ".join(regions[box] for box in order if regions[box])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
 
 # =========================
-# CONFIGURAÇÕES
+# VARIÁVEIS GLOBAIS
 # =========================
-# Caso esteja usando Windows, defina o caminho para o executável do Tesseract
-# pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+FRAME_OCR = IncrementalOCR()  # Compartilhado: frames consecutivos reaproveitam as regiões
 
 # =========================
 # FUNÇÃO PRINCIPAL
 # =========================
 
-def extract_text_from_frame(frame: np.ndarray) -> str:
+def extract_text_from_frame(frame: np.ndarray, changes: Optional[Dict] = None) -> str:
     """
     Extrai texto de um frame (imagem) usando OCR.
 
+    Os blocos de texto do frame que já foram lidos (mesmos pixels) vêm do
+    cache de FRAME_OCR; só os novos/alterados passam pelo Tesseract.
+
     Args:
         frame (np.ndarray): Imagem em BGR (OpenCV)
+        changes (dict, opcional): Resultado de FrameChangeDetector.update() para
+            este frame; só as regiões em changes["boxes"] são reprocessadas
+            (os frames anteriores do mesmo fluxo devem ter passado por aqui)
 
     Returns:
         str: Texto detectado e normalizado
@@ -42,19 +249,7 @@ def extract_text_from_frame(frame: np.ndarray) -> str:
     if frame is None:
         return ""
 
-    # Converte para escala de cinza (OCR funciona melhor)
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-    # Opcional: aplicar thresholding para melhorar contraste
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-    # Aplica OCR
-    raw_text = pytesseract.image_to_string(thresh, lang='eng')  # pode adicionar outros idiomas
-
-    # Normaliza o texto (remove espaços extras, caracteres especiais, converte para minúsculas)
-    normalized_text = normalize_text(raw_text)
-
-    return normalized_text
+    return FRAME_OCR.extract(frame, changes["boxes"] if changes is not None else None)
 
 # =========================
 # FUNÇÃO DE TESTE ISOLADO
@@ -72,7 +267,7 @@ if __name__ == "__main__":
 
         text = extract_text_from_frame(frame)
         if text:
-            print("[OCR] Texto detectado:", text)
+            print("[OCR] Texto detectado:", text, "| cache:", FRAME_OCR.stats())
 
         cv2.imshow("OCR Test", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
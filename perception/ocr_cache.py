@@ -0,0 +1,220 @@
+"""
+NE-AI V1 — OCR Cache
+=====================
+
+Cache persistente de resultados de OCR (SQLite), na frente do Tesseract:
+
+- Chave: hash perceptual da imagem pré-processada (bloco de tela ou imagem
+  inteira) + tipo de pré-processamento + idioma
+- Hash perceptual: a imagem binarizada reduzida a células de
+  OCR_CACHE_HASH_CELL px (1 bit por célula), com digest do mapa de bits e
+  do tamanho — tolera variações abaixo de uma célula (antialiasing,
+  compressão leve) sem confundir caracteres diferentes
+- Evicção LRU (last_used) quando os textos passam de OCR_CACHE_MAX_BYTES
+- Um acerto é só um SELECT: os novos last_used ficam em RAM e são gravados
+  em lote (no put, a cada OCR_CACHE_TOUCH_BATCH acertos e no close)
+- Sobrevive a reinícios: rever uma tela conhecida ou reenviar um screenshot
+  devolve o texto sem chamar o Tesseract
+
+Um hash perceptual "clássico" de 64/256 bits (memory.fingerprint) não serve
+aqui: a troca de um dígito do relógio mal muda o hash e o cache devolveria
+o texto antigo.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import cv2
+import numpy as np
+from memory.embedding_cache import content_digest
+from core.config import (
+    OCR_CACHE_FILE,
+    OCR_CACHE_MAX_BYTES,
+    OCR_CACHE_EVICT_TARGET,
+    OCR_CACHE_HASH_CELL,
+    OCR_CACHE_TOUCH_BATCH,
+)
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def ocr_hash(image: np.ndarray, cell: int = OCR_CACHE_HASH_CELL) -> str:
+    """
+    Hash perceptual de uma imagem pré-processada (cinza ou binarizada).
+
+    Args:
+        image (np.ndarray): Imagem 2D uint8
+        cell (int): Lado da célula (px) que vira 1 bit
+
+    Returns:
+        str: Digest hexadecimal
+    """
+    height, width = image.shape[:2]
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    small = cv2.resize(binary, (max(1, width // cell), max(1, height // cell)), interpolation=cv2.INTER_AREA)
+    return content_digest(f"{width}x{height}".encode() + np.packbits(small > 127).tobytes())
+
+# =========================
+# CLASSE OCR CACHE
+# =========================
+
+class OCRCache:
+    """
+    Tabela SQLite chave → texto com LRU por bytes, segura para uso entre
+    threads (uma conexão + lock).
+    """
+    def __init__(self, path: str = OCR_CACHE_FILE, max_bytes: int = OCR_CACHE_MAX_BYTES,
+                 target: float = OCR_CACHE_EVICT_TARGET, touch_batch: int = OCR_CACHE_TOUCH_BATCH):
+        """
+        Args:
+            path (str): Arquivo SQLite
+            max_bytes (int): Máximo de bytes de texto armazenados
+            target (float): Fração de max_bytes a atingir após uma evicção
+            touch_batch (int): Acertos acumulados antes de gravar os last_used
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.target = target
+        self.touch_batch = touch_batch
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._touched: Dict[str, float] = {}  # Acertos ainda não gravados: chave → last_used
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        """
+        Abre o banco na primeira utilização (chamar com o lock adquirido).
+        """
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_lru ON ocr_cache (last_used)")
+            self.bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        return self._conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Texto em cache para `key` (marca como usado agora), ou None.
+        """
+        with self._lock:
+            conn = self._db()
+            row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                with conn:
+                    self._flush_touched(conn)
+            return row[0]
+
+    def _flush_touched(self, conn: sqlite3.Connection):
+        """
+        Grava os last_used pendentes numa única transação (chamar com o lock adquirido).
+        """
+        if self._touched:
+            conn.executemany("UPDATE ocr_cache SET last_used = ? WHERE key = ?",
+                             [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def put(self, key: str, text: str):
+        """
+        Grava um resultado e, se o limite foi ultrapassado, remove os menos usados.
+        """
+        size = len(text.encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            with self._db() as conn:
+                self._flush_touched(conn)  # A evicção precisa das recências atuais
+                self._touched.pop(key, None)
+                old = conn.execute("SELECT size FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                conn.execute("INSERT OR REPLACE INTO ocr_cache (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                             (key, text, size, time.time()))
+                self.bytes += size - (old[0] if old else 0)
+                if self.bytes > self.max_bytes:
+                    self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """
+        Remove as entradas menos usadas até target × max_bytes (chamar com o lock adquirido).
+        """
+        limit = self.max_bytes * self.target
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_used"):
+            if self.bytes <= limit:
+                break
+            keys.append((key,))
+            self.bytes -= size
+        conn.executemany("DELETE FROM ocr_cache WHERE key = ?", keys)
+        self.evictions += len(keys)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                with self._conn as conn:
+                    self._flush_touched(conn)
+                self._conn.close()
+                self._conn = None
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+OCR_CACHE = OCRCache()
+atexit.register(OCR_CACHE.close)  # Grava os last_used pendentes
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import tempfile
+
+    def render(text: str) -> np.ndarray:
+        image = np.full((30, 120), 255, dtype=np.uint8)
+        cv2.putText(image, text, (3, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 1)
+        return image
+
+    print("[OCRCache] Hash 12:08 == 12:09?", ocr_hash(render("12:08")) == ocr_hash(render("12:09")))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = OCRCache(os.path.join(tmp, "ocr.sqlite"), max_bytes=2000)
+        for i in range(100):
+            cache.put(ocr_hash(render(f"linha {i}")), f"linha {i}")
+        print("[OCRCache] Linha 99:", cache.get(ocr_hash(render("linha 99"))),
+              "| linha 0:", cache.get(ocr_hash(render("linha 0"))))
+        print("[OCRCache] Estatísticas:", cache.stats(), "| entradas:", len(cache))
+        cache.close()
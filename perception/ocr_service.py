@@ -0,0 +1,181 @@
+"""
+NE-AI V1 — OCR Service
+=======================
+
+Serviço de OCR compartilhado por perception/ocr.py e processing/ocr.py:
+
+- Até OCR_WORKERS (padrão = nº de núcleos) processos do Tesseract em
+  paralelo, fora da thread de quem pede (loop de captura, requisições Flask)
+- submit() devolve um Future; read() é o atalho bloqueante
+- Fila limitada (OCR_QUEUE_SIZE imagens pendentes): quem submete espera uma
+  vaga por até OCR_SUBMIT_TIMEOUT s, depois recebe queue.Full
+- Coalescência: imagens idênticas (mesmos pixels, idioma e saída) em andamento
+  compartilham o mesmo Future — streaming, uploads e vídeos nunca fazem OCR
+  dos mesmos pixels duas vezes ao mesmo tempo
+
+Os processos de OCR são os próprios executáveis do Tesseract, que o
+pytesseract lança a cada chamada; o pool só tem threads que os disparam e
+esperam (sem GIL durante o OCR). Não há interpretador Python filho: um pool
+multiprocessing ("spawn" ou "forkserver") reimportaria o script de entrada
+em cada worker (web_server → learner → memória), e importar a aplicação não
+pode ter efeitos em storage/.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+import atexit
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import numpy as np
+from memory.embedding_cache import content_digest
+from core.config import OCR_LANG, OCR_WORKERS, OCR_QUEUE_SIZE, OCR_SUBMIT_TIMEOUT
+
+# =========================
+# FUNÇÃO DE OCR
+# =========================
+
+def _tesseract(image: np.ndarray, lang: str, words: bool = False):
+    """
+    Executada nas threads do pool: OCR de uma imagem já pré-processada (o
+    pytesseract roda o executável do Tesseract em um processo próprio).
+
+    Returns:
+        str | dict: Texto bruto, ou (words=True) as palavras com suas caixas
+                    (image_to_data: "text", "left", "top", "width", "height", ...)
+    """
+    import pytesseract  # Importado no primeiro OCR: quem não usa OCR não precisa do Tesseract
+    # Caso esteja usando Windows, defina o caminho para o executável do Tesseract
+    # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+    if words:
+        return pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    return pytesseract.image_to_string(image, lang=lang)
+
+# =========================
+# CLASSE OCR SERVICE
+# =========================
+
+class OCRService:
+    """
+    Pool de OCR (um processo Tesseract por thread) com fila limitada e
+    coalescência de pedidos iguais.
+    """
+    def __init__(self, workers: int = OCR_WORKERS, queue_size: int = OCR_QUEUE_SIZE,
+                 timeout: float = OCR_SUBMIT_TIMEOUT):
+        """
+        Args:
+            workers (int): Processos Tesseract simultâneos (0 = nº de núcleos)
+            queue_size (int): Máximo de imagens pendentes
+            timeout (float): Espera máxima por uma vaga na fila (s)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.submitted = 0
+        self.coalesced = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._inflight: Dict[Tuple[str, str, bool], Future] = {}
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        """
+        Pool criado no primeiro uso (chamar com o lock adquirido).
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+            print(f"[OCRService] Pool iniciado com {self.workers} processos Tesseract simultâneos")
+        return self._pool
+
+    def submit(self, image: np.ndarray, lang: str = OCR_LANG, words: bool = False) -> Future:
+        """
+        Agenda o OCR de uma imagem (cinza ou binarizada).
+
+        Args:
+            image (np.ndarray): Imagem pré-processada
+            lang (str): Idioma do Tesseract
+            words (bool): Devolver as palavras com caixas em vez do texto
+
+        Returns:
+            Future: Resolve com o texto bruto (ou o dict de palavras), compartilhado
+                    com pedidos idênticos em andamento
+
+        Raises:
+            queue.Full: Fila cheia por mais de `timeout` segundos
+        """
+        key = (content_digest(image), lang, words)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+
+        # Espera a vaga fora do lock: pedidos idênticos continuam sendo coalescidos
+        if not self._slots.acquire(timeout=self.timeout):
+            raise queue.Full(f"Fila de OCR cheia ({self.queue_size} imagens pendentes)")
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._slots.release()
+                self.coalesced += 1
+                return future
+            try:
+                future = self._executor().submit(_tesseract, image, lang, words)
+            except Exception:
+                self._slots.release()
+                raise
+            self._inflight[key] = future
+            self.submitted += 1
+        future.add_done_callback(lambda _, key=key: self._finish(key))
+        return future
+
+    def _finish(self, key: Tuple[str, str, bool]):
+        with self._lock:
+            self._inflight.pop(key, None)
+        self._slots.release()
+
+    def read(self, image: np.ndarray, lang: str = OCR_LANG) -> str:
+        """
+        OCR bloqueante (submit() + espera o resultado).
+        """
+        return self.submit(image, lang).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": len(self._inflight),
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+            }
+
+    def shutdown(self):
+        """
+        Encerra o pool (espera os pedidos em andamento).
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+            print("[OCRService] Pool encerrado")
+
+# =========================
+# VARIÁVEIS GLOBAIS
+# =========================
+OCR_SERVICE = OCRService()
+atexit.register(OCR_SERVICE.shutdown)
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import cv2
+
+    image = np.full((80, 400), 255, dtype=np.uint8)
+    cv2.putText(image, "Hello OCR", (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 0, 3)
+    futures = [OCR_SERVICE.submit(image) for _ in range(4)]  # 1 execução, 3 coalescidos
+    print("[OCRService] Texto:", repr(futures[0].result().strip()), "| mesmo Future:", futures[0] is futures[-1])
+    print("[OCRService] Estatísticas:", OCR_SERVICE.stats())
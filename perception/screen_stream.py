@@ -8,7 +8,10 @@ e enviar frames para o módulo de percepção e cognição.
 Funcionalidades:
 - Captura contínua de tela usando threads
 - Conversão de frames para OpenCV (processamento futuro)
-- Filtragem mínima para evitar frames repetidos
+- Filtragem mínima para evitar frames repetidos (FrameChangeDetector)
+- Inscritos com changes=True recebem também o mapa de tiles/regiões alteradas
+- subscribe_text(): texto da tela via OCR incremental — as regiões alteradas
+  do detector vão direto ao OCR, que só relê o que mudou
 - Integração com o learner ou outros módulos
 """
 
@@ -20,7 +23,8 @@ import time               # Para controlar intervalo entre frames
 import cv2                # OpenCV para manipulação de imagens
 import numpy as np        # Arrays para imagens
 from PIL import ImageGrab # Captura da tela
-from perception.frame_filter import is_frame_unique  # Função para filtrar frames repetidos
+from perception.frame_filter import FrameChangeDetector  # Filtra frames repetidos e localiza mudanças
+from perception.ocr import extract_text_from_frame      # OCR incremental (só as regiões alteradas)
 
 # =========================
 # VARIÁVEIS GLOBAIS
@@ -28,6 +32,9 @@ from perception.frame_filter import is_frame_unique  # Função para filtrar fra
 streaming = False        # Flag global para controlar se o streaming está ativo
 frame_interval = 0.5     # Intervalo entre frames (em segundos), ajustável
 subscribers = []         # Lista de funções que recebem os frames capturados
+change_subscribers = set()  # Inscritos que recebem (frame, mudanças) em vez de só o frame
+text_subscribers = []    # Funções que recebem o texto da tela (OCR incremental)
+last_text = None         # Último texto lido da tela
 
 # =========================
 # FUNÇÕES PRINCIPAIS
@@ -55,32 +62,60 @@ def stop_stream():
     streaming = False
     print("[ScreenStream] Streaming parado")
 
-def subscribe(callback):
+def subscribe(callback, changes: bool = False):
     """
     Permite que outros módulos recebam frames capturados.
     callback: função que recebe um frame (numpy array)
+    changes: se True, callback(frame, changes) recebe também o resultado de
+             FrameChangeDetector.update() ("tiles", "boxes", "similarity")
     """
     if callback not in subscribers:
         subscribers.append(callback)
+    if changes:
+        change_subscribers.add(callback)
+
+def subscribe_text(callback):
+    """
+    Permite que outros módulos recebam o texto da tela quando ele muda.
+    O OCR roda uma vez por frame aceito, só nas regiões alteradas
+    ("boxes" do FrameChangeDetector), e o texto vai a todos os inscritos.
+    callback: função que recebe o texto (str)
+    """
+    if callback not in text_subscribers:
+        text_subscribers.append(callback)
+    subscribe(_read_screen_text, changes=True)
+
+def _read_screen_text(frame, changes):
+    """
+    Inscrito interno: OCR incremental do frame aceito e repasse do texto novo.
+    """
+    global last_text
+    text = extract_text_from_frame(frame, changes)
+    if text and text != last_text:
+        last_text = text
+        for callback in text_subscribers:
+            callback(text)
 
 def _stream_loop():
     """
     Loop contínuo que captura a tela e envia frames aos inscritos.
     """
-    last_frame = None  # Armazena último frame para comparação
+    detector = FrameChangeDetector()  # Guarda o último frame aceito já reduzido
     while streaming:
         # Captura a tela inteira como imagem PIL
         screenshot = ImageGrab.grab()
         # Converte para array numpy (OpenCV usa BGR)
         frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
 
-        # Verifica se o frame é diferente do último capturado
-        if is_frame_unique(frame, last_frame):
-            # Atualiza último frame
-            last_frame = frame.copy()
+        # Verifica se o frame é diferente do último aceito (e onde mudou)
+        changes = detector.update(frame)
+        if changes["changed"]:
             # Envia para todos os inscritos (learner, perception, etc.)
             for callback in subscribers:
-                callback(frame)
+                if callback in change_subscribers:
+                    callback(frame, changes)
+                else:
+                    callback(frame)
 
         # Espera intervalo definido antes de capturar próximo frame
         time.sleep(frame_interval)
@@ -99,8 +134,9 @@ if __name__ == "__main__":
             stop_stream()
             cv2.destroyAllWindows()
 
-    # Inscreve callback
+    # Inscreve callbacks (frames e texto da tela)
     subscribe(show_frame)
+    subscribe_text(lambda text: print("[ScreenStream] Texto da tela:", text[:120]))
     # Inicia streaming
     start_stream()
     # Mantém o loop principal vivo enquanto streaming ativo
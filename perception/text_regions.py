@@ -0,0 +1,257 @@
+"""
+NE-AI V1 — Text Regions
+========================
+
+Proposta barata de regiões de texto (OpenCV) antes do Tesseract:
+
+- Gradiente morfológico: letras viram bordas densas, áreas lisas somem
+- Threshold de Otsu + fechamento horizontal (OCR_REGION_JOIN_WIDTH) une
+  letras e palavras de uma mesma linha
+- Componentes conexos filtrados por altura, largura e densidade de bordas:
+  fotos e ilustrações (componentes altos) e contornos vazios ficam de fora
+- Ordem de leitura: cortes XY sobre as caixas aceitas (colunas e painéis),
+  depois linha a linha dentro de cada bloco
+- text_boxes() detecta sem ordenar, para rodar só em recortes do frame (ex:
+  as regiões alteradas informadas pelo FrameChangeDetector); reading_order()
+  junta depois as caixas novas às que foram reaproveitadas
+
+Os recortes são normalizados (escala para OCR_REGION_TEXT_HEIGHT px, texto
+escuro sobre fundo branco) e lidos em lote: empilhados em folhas de até
+OCR_SHEET_MAX_HEIGHT px, uma chamada do Tesseract por folha, com as palavras
+devolvidas a cada recorte pela posição vertical. O Tesseract só vê texto —
+em telas Full HD isso é uma fração da área total.
+"""
+
+# =========================
+# IMPORTAÇÕES
+# =========================
+from typing import List, Tuple
+import cv2
+import numpy as np
+from perception.ocr_service import OCR_SERVICE
+from core.config import (
+    OCR_LANG,
+    OCR_THRESHOLD_VALUE,
+    OCR_BLOCK_ROW_GAP,
+    OCR_BLOCK_COL_GAP,
+    OCR_REGION_GRADIENT_KERNEL,
+    OCR_REGION_JOIN_WIDTH,
+    OCR_REGION_MIN_HEIGHT,
+    OCR_REGION_MAX_HEIGHT,
+    OCR_REGION_MIN_WIDTH,
+    OCR_REGION_MIN_FILL,
+    OCR_REGION_TEXT_HEIGHT,
+    OCR_REGION_MAX_SCALE,
+    OCR_SHEET_MAX_HEIGHT,
+    OCR_SHEET_GAP,
+)
+
+# =========================
+# FUNÇÕES AUXILIARES
+# =========================
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """
+    Thresholding para melhorar contraste (entrada do Tesseract).
+    """
+    _, thresh = cv2.threshold(gray, OCR_THRESHOLD_VALUE, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def _segments(profile: np.ndarray, gap: int) -> List[Tuple[int, int]]:
+    """
+    Trechos [início, fim) com tinta de um perfil, separados por >= `gap` posições vazias.
+    """
+    filled = np.flatnonzero(profile)
+    if filled.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(filled) > gap)
+    starts = np.concatenate(([filled[0]], filled[breaks + 1]))
+    ends = np.concatenate((filled[breaks], [filled[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def xy_cut(ink: np.ndarray, row_gap: int = OCR_BLOCK_ROW_GAP,
+           col_gap: int = OCR_BLOCK_COL_GAP) -> List[Tuple[int, int, int, int]]:
+    """
+    Divide uma máscara em blocos por cortes XY recursivos: faixas horizontais
+    separadas por linhas vazias, depois colunas separadas por colunas vazias,
+    até não haver mais cortes.
+
+    Returns:
+        list: Caixas (x, y, w, h) em ordem de leitura (cima → baixo, esquerda → direita)
+    """
+    blocks = []
+    pending = [(0, 0, ink.shape[1], ink.shape[0])]
+    while pending:
+        x, y, w, h = pending.pop()
+        region = ink[y:y + h, x:x + w]
+        rows = _segments(region.any(axis=1), row_gap)
+        if len(rows) == 1:
+            top, bottom = rows[0]
+            cols = _segments(region[top:bottom].any(axis=0), col_gap)
+            if len(cols) == 1:
+                left, right = cols[0]
+                blocks.append((x + left, y + top, right - left, bottom - top))
+                continue
+            parts = [(x + left, y + top, right - left, bottom - top) for left, right in cols]
+        else:
+            parts = [(x, y + top, w, bottom - top) for top, bottom in rows]
+        pending.extend(reversed(parts))  # Pilha: o primeiro trecho é processado primeiro
+    return blocks
+
+def text_boxes(gray: np.ndarray) -> np.ndarray:
+    """
+    Caixas (n, 4) de texto de uma imagem em cinza, sem ordem (ver
+    detect_text_regions; útil para detectar só num recorte do frame).
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (OCR_REGION_GRADIENT_KERNEL, OCR_REGION_GRADIENT_KERNEL))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    joined = cv2.morphologyEx(edges, cv2.MORPH_CLOSE,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (OCR_REGION_JOIN_WIDTH, 1)))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+    if count <= 1:
+        return np.zeros((0, 4), dtype=np.int64)
+
+    x, y, w, h = (stats[1:, i] for i in range(4))
+    # Densidade de bordas em cada caixa (imagem integral: O(1) por caixa)
+    integral = cv2.integral((edges > 0).astype(np.uint8))
+    filled = integral[y + h, x + w] - integral[y, x + w] - integral[y + h, x] + integral[y, x]
+    keep = ((h >= OCR_REGION_MIN_HEIGHT) & (h <= OCR_REGION_MAX_HEIGHT) & (w >= OCR_REGION_MIN_WIDTH) &
+            (filled >= OCR_REGION_MIN_FILL * w * h))
+    return stats[1:, :4][keep].astype(np.int64)
+
+def reading_order(boxes: np.ndarray, shape: tuple) -> List[Tuple[int, int, int, int]]:
+    """
+    Ordena caixas (n, 4) por bloco (cortes XY sobre as caixas) e, dentro de
+    cada bloco, por linha (centros a menos de meia altura) e depois por x.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    if not len(boxes):
+        return []
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, w, h in boxes:
+        mask[y:y + h, x:x + w] = True
+    centers_x = boxes[:, 0] + boxes[:, 2] // 2
+    centers_y = boxes[:, 1] + boxes[:, 3] // 2
+
+    ordered = []
+    for bx, by, bw, bh in xy_cut(mask):
+        inside = np.flatnonzero((centers_x >= bx) & (centers_x < bx + bw) &
+                                (centers_y >= by) & (centers_y < by + bh))
+        inside = inside[np.argsort(centers_y[inside], kind="stable")]
+        line, line_center = [], None
+        for i in inside.tolist():
+            if line and centers_y[i] - line_center > boxes[i, 3] // 2:
+                ordered.extend(sorted(line, key=lambda j: boxes[j, 0]))
+                line = []
+            if not line:
+                line_center = centers_y[i]
+            line.append(i)
+        ordered.extend(sorted(line, key=lambda j: boxes[j, 0]))
+    return [tuple(int(v) for v in boxes[i]) for i in ordered]
+
+# =========================
+# FUNÇÕES PRINCIPAIS
+# =========================
+
+def detect_text_regions(gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    Regiões (linhas/trechos) que provavelmente contêm texto.
+
+    Args:
+        gray (np.ndarray): Imagem em tons de cinza
+
+    Returns:
+        list: Caixas (x, y, w, h) em ordem de leitura
+    """
+    return reading_order(text_boxes(gray), gray.shape)
+
+def prepare_region(crop: np.ndarray, text_height: int = OCR_REGION_TEXT_HEIGHT,
+                   max_scale: float = OCR_REGION_MAX_SCALE) -> np.ndarray:
+    """
+    Normaliza um recorte em cinza para o Tesseract: escala para `text_height`
+    px de altura (0 = mantém), binariza e deixa texto escuro sobre fundo branco.
+    """
+    if text_height:
+        scale = min(max_scale, text_height / max(1, crop.shape[0]))
+        if abs(scale - 1.0) > 0.05:
+            size = (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale)))
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA)
+    thresh = binarize(crop)
+    if 2 * np.count_nonzero(thresh) < thresh.size:
+        thresh = 255 - thresh  # Tema escuro: inverte
+    return thresh
+
+def _sheets(images: List[np.ndarray], max_height: int, gap: int) -> List[Tuple[np.ndarray, List[int], List[int]]]:
+    """
+    Empilha imagens em folhas brancas de até `max_height` px.
+
+    Returns:
+        list: (folha, índices das imagens, y inicial de cada uma na folha)
+    """
+    groups, current, height = [], [], gap
+    for i, image in enumerate(images):
+        if current and height + image.shape[0] + gap > max_height:
+            groups.append(current)
+            current, height = [], gap
+        current.append(i)
+        height += image.shape[0] + gap
+    if current:
+        groups.append(current)
+
+    sheets = []
+    for group in groups:
+        width = max(images[i].shape[1] for i in group) + 2 * gap
+        sheet = np.full((gap + sum(images[i].shape[0] + gap for i in group), width), 255, dtype=np.uint8)
+        tops, top = [], gap
+        for i in group:
+            image = images[i]
+            sheet[top:top + image.shape[0], gap:gap + image.shape[1]] = image
+            tops.append(top)
+            top += image.shape[0] + gap
+        sheets.append((sheet, group, tops))
+    return sheets
+
+def read_regions(images: List[np.ndarray], lang: str = OCR_LANG, max_height: int = OCR_SHEET_MAX_HEIGHT,
+                 gap: int = OCR_SHEET_GAP) -> List[str]:
+    """
+    OCR em lote de recortes já normalizados (prepare_region): uma chamada do
+    Tesseract por folha, folhas lidas em paralelo pelo OCR_SERVICE.
+
+    Returns:
+        list: Texto bruto de cada recorte, na mesma ordem
+    """
+    texts = [[] for _ in images]
+    sheets = _sheets(images, max_height, gap)
+    futures = [OCR_SERVICE.submit(sheet, lang=lang, words=True) for sheet, _, _ in sheets]
+    for (_, group, tops), future in zip(sheets, futures):
+        data = future.result()
+        starts = np.asarray(tops)
+        for word, top, height in zip(data["text"], data["top"], data["height"]):
+            if not str(word).strip():
+                continue
+            # Palavra → recorte cuja faixa contém o centro vertical dela
+            position = max(0, int(np.searchsorted(starts, int(top) + int(height) / 2, side="right")) - 1)
+            texts[group[position]].append(str(word))
+    return [" ".join(words) for words in texts]
+
+# =========================
+# FUNÇÃO DE TESTE ISOLADO
+# =========================
+if __name__ == "__main__":
+    import time
+
+    screen = np.full((1080, 1920), 245, dtype=np.uint8)
+    screen[100:700, 1000:1800] = np.random.default_rng(0).integers(0, 255, (600, 800), dtype=np.uint8)  # "foto"
+    for i, line in enumerate(["File Edit View Help", "def main():", "    return 42", "Terminal: ok"]):
+        cv2.putText(screen, line, (60, 150 + i * 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 20, 2)
+    cv2.putText(screen, "Sidebar", (60, 900), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 20, 1)
+
+    start = time.perf_counter()
+    regions = detect_text_regions(screen)
+    elapsed = time.perf_counter() - start
+    area = sum(w * h for _, _, w, h in regions) / screen.size
+    print(f"[TextRegions] {len(regions)} regiões em {elapsed * 1000:.1f} ms ({area:.1%} da tela): {regions}")
+    prepared = [prepare_region(screen[y:y + h, x:x + w]) for x, y, w, h in regions]
+    sheet, group, tops = _sheets(prepared, OCR_SHEET_MAX_HEIGHT, OCR_SHEET_GAP)[0]
+    print(f"[TextRegions] Folha {sheet.shape} com {len(group)} recortes")
@@ -60,7 +60,7 @@ def process_text_file(file_path: str):
     # Vetorizar e aprender
     vector = vectorize_text(content)  # Para uso futuro em similarity
     learn({"type": "text", "data": content, "confidence": 0.7})
-    log_event("upload_text", {"file": file_path, "vector_length": len(vector)})
+    log_event("upload_text", {"file": file_path, "vector_length": vector.shape[-1]})
 
 def process_image_file(file_path: str):
     """
@@ -72,8 +72,8 @@ def process_image_file(file_path: str):
         print(f"[UploadHandler] Erro ao ler imagem: {file_path}")
         return
     vector = vectorize_image(img)
-    learn({"type": "vision", "data": img, "confidence": 0.7})
-    log_event("upload_image", {"file": file_path, "vector_length": len(vector)})
+    learn({"type": "vision", "data": img, "confidence": 0.7}, vector)
+    log_event("upload_image", {"file": file_path, "vector_length": vector.shape[-1]})
 
 def process_video_file(file_path: str, frame_interval: int = 30):
     """
@@ -98,7 +98,7 @@ def process_video_file(file_path: str, frame_interval: int = 30):
 
         if frame_count % frame_interval == 0:
             vector = vectorize_image(frame)
-            learn({"type": "vision", "data": frame, "confidence": 0.7})
+            learn({"type": "vision", "data": frame, "confidence": 0.7}, vector)
             learned_frames += 1
 
         frame_count += 1
@@ -1,9 +1,14 @@
 """
 OCR simples (opcional na V1).
+
+O Tesseract roda no serviço de OCR compartilhado (perception/ocr_service.py),
+atrás do cache persistente de resultados (perception/ocr_cache.py).
 """
 
 import cv2
-import pytesseract
+from perception.ocr_service import OCR_SERVICE
+from perception.ocr_cache import OCR_CACHE, ocr_hash
+from core.config import OCR_LANG
 
 
 def extract_text_from_image(image):
@@ -12,4 +17,9 @@ def extract_text_from_image(image):
     """
 
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    return pytesseract.image_to_string(gray)
+    key = f"image:{OCR_LANG}:{ocr_hash(gray)}"
+    text = OCR_CACHE.get(key)
+    if text is None:
+        text = OCR_SERVICE.read(gray, lang=OCR_LANG)
+        OCR_CACHE.put(key, text)
+    return text
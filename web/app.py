@@ -1,8 +1,9 @@
-from flask import Flask, render_template, request, redirect
+from flask import Flask, render_template, request, redirect, jsonify
 from handlers.upload import handle_upload
-from handlers.viewer import get_memory
+from handlers.viewer import get_memory, find_similar, get_concepts
 from handlers.stream import start_stream, stop_stream
 from handlers.feedback import apply_feedback
+from cognition.learner import warm_start
 
 app = Flask(__name__)
 
@@ -12,6 +13,19 @@ def index():
     memory = get_memory()
     return render_template("index.html", memory=memory)
 
+# Busca por similaridade (matrizes compartilhadas, somente leitura)
+@app.route("/similar")
+def similar():
+    text = request.args.get("q", "")
+    k = request.args.get("k", default=5, type=int)
+    return jsonify([{"id": kid, "similarity": sim} for kid, sim in find_similar(text, k)])
+
+# Conceitos da memória (centróides e conhecimento mais central de cada um)
+@app.route("/concepts")
+def concepts():
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify(get_concepts(limit))
+
 # Upload de arquivos
 @app.route("/upload", methods=["POST"])
 def upload():
@@ -38,4 +52,6 @@ def feedback(knowledge_id, action):
     return redirect("/")
 
 if __name__ == "__main__":
+    # Carrega memória persistida, seus embeddings e fingerprints
+    warm_start()
     app.run(debug=True)
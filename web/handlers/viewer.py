@@ -1,9 +1,46 @@
 # web/handlers/viewer.py
 
-from cognition.learner import MEMORY_STORE
+from memory.store import memory_store, public_item
+from memory.embeddings import open_shared_embeddings
+from memory.vectorizer import vectorize_text, load_vectorizer_state
+
+_shared = None  # Matrizes do learner, mapeadas somente leitura (abertas sob demanda)
+
+def _matrices():
+    global _shared
+    if _shared is None:
+        load_vectorizer_state()
+        _shared = open_shared_embeddings()
+    return _shared
 
 def get_memory():
     """
-    Retorna a memória atual para a interface web.
+    Retorna um snapshot da memória atual para a interface web (corpos
+    resolvidos, sem as referências internas; blobs aparecem pela miniatura).
+    """
+    return [public_item(item) for item in memory_store.snapshot(bodies=True)]
+
+def find_similar(text, k=5):
+    """
+    Busca os conhecimentos mais parecidos com um texto direto nas matrizes
+    compartilhadas do learner (sem copiá-las para este processo).
+    """
+    return _matrices()["text"].search_batch(vectorize_text(text), k=k)[0]
+
+def get_concepts(limit=20):
+    """
+    Conceitos de cada modalidade (tamanho, coesão e conhecimento mais central),
+    a partir dos centróides salvos pelo learner.
+
+    Só o representante de cada conceito é lido, sem o blob: imagens aparecem
+    pela miniatura guardada no registro.
     """
-    return MEMORY_STORE
+    concepts = {}
+    for modality, matrix in _matrices().items():
+        summaries = matrix.concept_summaries(limit)
+        for summary in summaries:
+            item = memory_store.get(summary["representative"], blobs=False) or {}
+            content = item.get("content")
+            summary["example"] = content if isinstance(content, str) else item.get("thumbnail")
+        concepts[modality] = summaries
+    return concepts
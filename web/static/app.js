@@ -25,7 +25,7 @@ async function updateMemory() {
             div.className = 'memory-item';
             div.innerHTML = `<b>ID:</b> ${item.id}<br>
                              <b>Tipo:</b> ${item.type}<br>
-                             <b>Conteúdo:</b> ${item.content}<br>
+                             <b>Conteúdo:</b> ${item.thumbnail ? `<img src="${item.thumbnail}">` : item.content}<br>
                              <b>Confiança:</b> ${item.confidence.toFixed(2)}<br>
                              <b>Relevância:</b> ${item.relevance.toFixed(2)}<br>
                              <b>Visualizações:</b> ${item.times_seen}
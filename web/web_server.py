@@ -18,6 +18,9 @@ from inputs.upload_handler import handle_upload
 from agent.decision import decide_action
 from agent.intent import extract_intent
 from agent.executor import execute_action
+from memory.history import query_history
+from memory.vectorizer import embedding_cache
+from cognition.learner import warm_start
 import os
 
 # =========================
@@ -77,15 +80,46 @@ def action_text():
 
     return jsonify({"status": "success", "intent": intent_payload.get("intent")})
 
+# =========================
+# ENDPOINT DE HISTÓRICO
+# =========================
+@app.route("/history", methods=["GET"])
+def history():
+    """
+    Consulta o histórico com filtros e paginação.
+    Parâmetros: type, since, until (epoch), limit, offset.
+    """
+    # request.args.get(..., type=) engole o erro de conversão e devolve o default:
+    # os valores crus são convertidos aqui para responder 400 a entradas inválidas
+    args = request.args
+    try:
+        since = float(args["since"]) if "since" in args else None
+        until = float(args["until"]) if "until" in args else None
+        limit = int(args.get("limit", 100))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Parâmetros inválidos"}), 400
+    if limit < 0 or offset < 0:
+        return jsonify({"status": "error", "message": "limit e offset não podem ser negativos"}), 400
+
+    result = query_history(args.get("type"), since, until, limit, offset)
+    return jsonify({"status": "success", **result})
+
 # =========================
 # ENDPOINT DE STATUS
 # =========================
 @app.route("/status", methods=["GET"])
 def status():
-    return jsonify({"status": "online", "uploads_temp": len(os.listdir(UPLOAD_TEMP))})
+    return jsonify({
+        "status": "online",
+        "uploads_temp": len(os.listdir(UPLOAD_TEMP)),
+        "embedding_cache": embedding_cache.stats(),
+    })
 
 # =========================
 # RODAR SERVIDOR
 # =========================
 if __name__ == "__main__":
+    # Carrega memória persistida, seus embeddings e fingerprints
+    warm_start()
     app.run(host="0.0.0.0", port=5000, debug=True)